@@ -0,0 +1,146 @@
+"""Benchmark of the shared ingestion core with the spot and perps pipelines.
+
+Synthetic order books and trades go through each pipeline's normalizers into its buffers
+and are drained by its `QueueProcessor` into a null database, which sleeps like an insert
+(`--base-latency` + `--row-latency` per row). Reports the normalize + put cost per event,
+the rows written and the staleness of the rows when inserted.
+
+Run with
+
+```bash
+uv run python -m crypto_hft.benchmarks.ingestion --rate 2000 --duration 10
+```
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import cast
+
+# the perps processor stages its (unused here) fallback files in a scratch directory
+os.environ.setdefault('GCS_FALLBACK_STAGING_DIR', tempfile.mkdtemp(prefix='ingestion_bench_'))
+
+from crypto_hft.utils.config import Config # noqa: E402
+from crypto_hft.utils.time_utils import time_iso8601 # noqa: E402
+from crypto_hft.ingestion.columnar_buffer import ColumnarBuffer # noqa: E402
+from crypto_hft.ingestion.database import PostgreSQLDatabase # noqa: E402
+from crypto_hft.ingestion.queue_processor import QueueProcessor # noqa: E402
+from crypto_hft.ingestion.schemas import ORDER_BOOK_SCHEMA, TRADE_SCHEMA # noqa: E402
+from crypto_hft.spot.data_processor import process_order_book_data, process_trade_data # noqa: E402
+from crypto_hft.spot.db_writer import QueueProcessor as SpotQueueProcessor # noqa: E402
+from crypto_hft.perps.normalizers import normalize_order_book, normalize_trade, flatten_order_book # noqa: E402
+from crypto_hft.perps.postgres_utils import QueueProcessor as PerpsQueueProcessor # noqa: E402
+
+SYMBOLS = ['BTC_USDT', 'ETH_USDT', 'SOL_USDT', 'XRP_USDT']
+
+
+class NullDatabase:
+    def __init__(self, base_latency: float, row_latency: float):
+        self.base_latency = base_latency
+        self.row_latency = row_latency
+        self.rows = 0
+
+    async def insert_batch(self, table_name: str, batch_data: list, columns: list):
+        await asyncio.sleep(self.base_latency + self.row_latency * len(batch_data))
+        self.rows += len(batch_data)
+
+
+def spot_events(symbol: str, rng: random.Random):
+    now = time_iso8601()
+    mid = 100 + rng.random()
+    book = {
+        'exchange': 'binance', 'timestamp': now, 'localTimestamp': now,
+        'bids': [{'price': mid - 0.01 * (i + 1), 'amount': rng.random()} for i in range(Config.orderbook_levels)],
+        'asks': [{'price': mid + 0.01 * (i + 1), 'amount': rng.random()} for i in range(Config.orderbook_levels)],
+    }
+    trade = {'exchange': 'binance', 'id': str(rng.getrandbits(32)), 'price': mid, 'amount': rng.random(),
+             'side': 'buy', 'timestamp': now, 'localTimestamp': now}
+    return process_order_book_data(book, symbol), process_trade_data(trade, symbol)
+
+
+def perps_events(symbol: str, rng: random.Random):
+    now_ms = int(time.time() * 1000)
+    mid = 100 + rng.random()
+    ccxt_symbol = symbol.replace('_', '/') + ':USDT'
+    book = normalize_order_book('binance', {
+        'symbol': ccxt_symbol, 'timestamp': now_ms,
+        'bids': [[mid - 0.01 * (i + 1), rng.random()] for i in range(Config.orderbook_levels)],
+        'asks': [[mid + 0.01 * (i + 1), rng.random()] for i in range(Config.orderbook_levels)],
+    })
+    book['local_timestamp'] = time_iso8601()
+    trade = normalize_trade('binance', {'symbol': ccxt_symbol, 'id': rng.getrandbits(32), 'price': mid,
+                                        'amount': rng.random(), 'side': 'sell', 'timestamp': now_ms})
+    trade['local_timestamp'] = time_iso8601()
+    return flatten_order_book(book), trade
+
+
+async def produce(make_events, books: dict, trades: dict, rate: float, duration: float) -> tuple[int, float]:
+    """Puts `rate` order books and trades per second per symbol, returns the events and their cost."""
+    rng = random.Random(0)
+    events, cost = 0, 0.
+    tick = 0.01
+    end = time.time() + duration
+    while time.time() < end:
+        start = time.perf_counter()
+        for symbol in SYMBOLS:
+            for _ in range(max(1, int(rate * tick))):
+                book, trade = make_events(symbol, rng)
+                books[symbol].put_nowait(book)
+                trades[symbol].put_nowait(trade)
+                events += 2
+        cost += time.perf_counter() - start
+        await asyncio.sleep(tick)
+    return events, cost
+
+
+async def run_pipeline(name: str, args: argparse.Namespace) -> None:
+    db = NullDatabase(args.base_latency, args.row_latency)
+    processor: QueueProcessor
+    if name == 'spot':
+        # the null database stands in for PostgreSQL, the processors only call insert_batch
+        processor = SpotQueueProcessor(cast(PostgreSQLDatabase, db), Config)
+        make_events, tz_aware, keys = spot_events, True, SYMBOLS
+    else:
+        processor = PerpsQueueProcessor(db, Config)
+        make_events, tz_aware = perps_events, False
+        keys = [symbol.replace('_', '').lower() for symbol in SYMBOLS]
+
+    books = {symbol: ColumnarBuffer(ORDER_BOOK_SCHEMA, tz_aware=tz_aware) for symbol in SYMBOLS}
+    trades = {symbol: ColumnarBuffer(TRADE_SCHEMA, tz_aware=tz_aware) for symbol in SYMBOLS}
+    writers = [
+        asyncio.create_task(processor.process_queues(dict(zip(keys, books.values())), 'orderbook')),
+        asyncio.create_task(processor.process_queues(dict(zip(keys, trades.values())), 'trade')),
+    ]
+
+    events, cost = await produce(make_events, books, trades, args.rate, args.duration)
+    # let the writers catch up
+    await asyncio.sleep(Config.batch_freshness_target * 2)
+    await processor.shutdown()
+    await asyncio.gather(*writers, return_exceptions=True)
+
+    metrics = processor.metrics()
+    staleness = max(m['staleness'] for m in metrics)
+    max_staleness = max(m['max_staleness'] for m in metrics)
+    print(
+        f'{name:<6} {events:>8} events   {1e6 * cost / max(events, 1):6.2f} us/event   '
+        f'{db.rows:>8} rows written   staleness {staleness:5.2f}s (max {max_staleness:5.2f}s)'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the spot and perps pipelines on the shared ingestion core.')
+    parser.add_argument('--rate', type=float, default=2000, help='order books and trades per second per symbol')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per pipeline')
+    parser.add_argument('--base-latency', type=float, default=0.005, help='null insert latency, seconds')
+    parser.add_argument('--row-latency', type=float, default=2e-6, help='null insert latency per row, seconds')
+    parser.add_argument('--pipeline', choices=['spot', 'perps', 'both'], default='both')
+    args = parser.parse_args()
+
+    for name in (['spot', 'perps'] if args.pipeline == 'both' else [args.pipeline]):
+        asyncio.run(run_pipeline(name, args))
+
+
+if __name__ == "__main__":
+    main()
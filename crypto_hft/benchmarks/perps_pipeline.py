@@ -0,0 +1,138 @@
+"""Throughput and latency of the perps pipeline driven by a local mock exchange.
+
+Runs the real `streamer.main` (stream supervisor, normalizers, routing, buffers) against
+`MockExchange`s and the perps `QueueProcessor` into a null sink (or the PostgreSQL of the
+`.env` with `--sink postgres`, the `orderbook_perps_*` / `trade_perps_*` tables must exist),
+then reports the updates generated, the rows written per second and the latency from the
+exchange timestamp of a row to the end of its insert.
+
+Run with
+
+```bash
+uv run python -m crypto_hft.benchmarks.perps_pipeline --exchanges 2 --symbols 20 --book-rate 50 --trade-rate 100
+```
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import timezone
+
+from crypto_hft.benchmarks.ingestion import NullDatabase
+from crypto_hft.utils.config import Config, get_config
+from crypto_hft.ingestion.columnar_buffer import ColumnarBuffer
+from crypto_hft.ingestion.conflating_buffer import ConflatingBuffer, sample_periodically
+from crypto_hft.ingestion.database import PostgreSQLDatabase
+from crypto_hft.ingestion.schemas import ORDER_BOOK_SCHEMA, TRADE_SCHEMA
+from crypto_hft.perps import streamer
+from crypto_hft.perps.create_queue import order_book_queues_perps, trade_queues_perps
+from crypto_hft.perps.mock_exchange import MockExchange
+from crypto_hft.perps.normalizers import normalize_symbol
+from crypto_hft.perps.postgres_utils import QueueProcessor
+
+
+class LatencySink:
+    """Wraps a database and records the latency of every inserted row."""
+
+    def __init__(self, db):
+        self.db = db
+        self.rows: dict[str, int] = {'orderbook': 0, 'trade': 0}
+        self.latencies: list[float] = []
+
+    async def insert_batch(self, table_name: str, batch_data: list, columns: list):
+        await self.db.insert_batch(table_name, batch_data, columns)
+        now = time.time()
+        index = columns.index('timestamp')
+        self.rows[table_name.split('_')[0]] += len(batch_data)
+        self.latencies += [
+            now - row[index].replace(tzinfo=timezone.utc).timestamp()
+            for row in batch_data if row[index] is not None
+        ]
+
+
+def register_queues(symbols: list[str]) -> None:
+    """Adds buffers for the synthetic symbols beyond `TARGET_TOKENS`."""
+    for symbol in symbols:
+        normalized = normalize_symbol(symbol)
+        if normalized not in order_book_queues_perps:
+            order_book_queues_perps[normalized] = (
+                ConflatingBuffer(ORDER_BOOK_SCHEMA, tz_aware=False)
+                if Config.perps_book_sample_interval > 0 else
+                ColumnarBuffer(ORDER_BOOK_SCHEMA, tz_aware=False)
+            )
+            trade_queues_perps[normalized] = ColumnarBuffer(TRADE_SCHEMA, tz_aware=False)
+
+
+async def run(args: argparse.Namespace) -> None:
+    exchanges = [
+        MockExchange(f'mock{i}', args.symbols, args.book_rate, args.trade_rate, multi_symbol=not args.single_symbol, seed=i)
+        for i in range(args.exchanges)
+    ]
+    register_queues(exchanges[0].symbols)
+
+    db: PostgreSQLDatabase | NullDatabase
+    if args.sink == 'postgres':
+        db = PostgreSQLDatabase(get_config())
+        await db.connect()
+    else:
+        db = NullDatabase(args.base_latency, args.row_latency)
+    sink = LatencySink(db)
+    processor = QueueProcessor(sink, Config)
+
+    shutdown_event = asyncio.Event()
+    tasks = [
+        asyncio.create_task(streamer.main(exchanges, {ex.id: ex.symbols for ex in exchanges})),
+        asyncio.create_task(processor.batch_insert_order_books(order_book_queues_perps)),
+        asyncio.create_task(processor.batch_insert_trades(trade_queues_perps)),
+    ]
+    if Config.perps_book_sample_interval > 0:
+        tasks.append(asyncio.create_task(sample_periodically(
+            order_book_queues_perps.values(), Config.perps_book_sample_interval, shutdown_event
+        )))
+
+    await asyncio.sleep(args.duration)
+    streamer.shutdown_event.set()
+    await tasks[0]
+    books = sum(ex.books_sent for ex in exchanges)
+    trades = sum(ex.trades_sent for ex in exchanges)
+    # let the writers catch up
+    await asyncio.sleep(Config.batch_freshness_target * 2)
+
+    shutdown_event.set()
+    await processor.shutdown()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if isinstance(db, PostgreSQLDatabase):
+        await db.close()
+
+    latencies = sorted(sink.latencies) or [float('nan')]
+    print(
+        f'{args.exchanges} exchanges x {args.symbols} symbols, {args.duration:.0f}s: '
+        f'{books / args.duration:,.0f} books/s and {trades / args.duration:,.0f} trades/s generated'
+    )
+    print(
+        f'written: {sink.rows["orderbook"] / args.duration:,.0f} book rows/s, {sink.rows["trade"] / args.duration:,.0f} trade rows/s '
+        f'({trades - sink.rows["trade"]} trades not written)'
+    )
+    print(
+        f'latency: median {statistics.median(latencies):.3f}s, '
+        f'p99 {latencies[int(0.99 * (len(latencies) - 1))]:.3f}s, max {latencies[-1]:.3f}s'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the perps pipeline against mock exchanges.')
+    parser.add_argument('--exchanges', type=int, default=2)
+    parser.add_argument('--symbols', type=int, default=20, help='symbols per exchange')
+    parser.add_argument('--book-rate', type=float, default=50, help='order book updates per second per symbol')
+    parser.add_argument('--trade-rate', type=float, default=100, help='trades per second per symbol')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load')
+    parser.add_argument('--single-symbol', action='store_true', help='one subscription per symbol instead of multi-symbol ones')
+    parser.add_argument('--sink', choices=['null', 'postgres'], default='null')
+    parser.add_argument('--base-latency', type=float, default=0.005, help='null insert latency, seconds')
+    parser.add_argument('--row-latency', type=float, default=2e-6, help='null insert latency per row, seconds')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Compare the single-loop spot consumer with the pipeline mode (decode in a process pool).
+
+Synthetic Tardis frames (book snapshots and trades) are fed to a `WebSocketConsumer` in
+dry-run mode, as fast as a socket reader would hand them over, while a probe task
+measures how late the event loop wakes it up (loop lag). The throughput is the number of
+frames fully dispatched (derived data, streamer) per second.
+
+Run with
+
+```bash
+uv run python -m crypto_hft.benchmarks.pipeline_offload --frames 50000 --workers 4
+```
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import aiohttp
+import msgspec
+from crypto_hft.utils.config import Config
+from crypto_hft.utils.symbol_mapper import EXCHANGE_SYMBOLS
+import crypto_hft.spot.websocket as websocket_module
+from crypto_hft.spot.websocket import WebSocketConsumer
+from crypto_hft.spot.websocket_streamer import WebsocketStreamer
+from crypto_hft.spot.decode_pool import DecodePipeline
+
+PROBE_INTERVAL = 0.001
+READ_CHUNK = 16 # frames handed over per socket read
+
+def make_frames(n_frames: int, trade_ratio: float = 0.3, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    encoder = msgspec.json.Encoder()
+    exchanges = [ex for ex in Config.exchanges if EXCHANGE_SYMBOLS.get(ex)]
+    frames = []
+
+    for i in range(n_frames):
+        exchange = rng.choice(exchanges)
+        symbol = rng.choice(EXCHANGE_SYMBOLS[exchange])
+        timestamp = f"2025-01-01T00:{(i // 60000) % 60:02d}:{(i // 1000) % 60:02d}.{i % 1000:03d}Z"
+        mid = 100 + rng.random()
+
+        if rng.random() < trade_ratio:
+            message = {
+                "type": "trade", "exchange": exchange, "symbol": symbol.upper(), "id": str(i),
+                "price": mid, "amount": rng.random(), "side": rng.choice(["buy", "sell"]),
+                "timestamp": timestamp, "localTimestamp": timestamp,
+            }
+        else:
+            message = {
+                "type": "book_snapshot", "exchange": exchange, "symbol": symbol.upper(),
+                "bids": [{"price": mid - 0.01 * (j + 1), "amount": rng.random()} for j in range(Config.orderbook_levels)],
+                "asks": [{"price": mid + 0.01 * (j + 1), "amount": rng.random()} for j in range(Config.orderbook_levels)],
+                "timestamp": timestamp, "localTimestamp": timestamp,
+            }
+        frames.append(encoder.encode(message).decode())
+    return frames
+
+async def probe_loop_lag(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+async def run_mode(frames: list[str], workers: int) -> dict:
+    consumer = WebSocketConsumer(websocket_streamer=WebsocketStreamer())
+    pipeline = DecodePipeline(consumer.dispatch_batch, workers=workers) if workers else None
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(lags, stop))
+    pipeline_task = asyncio.create_task(pipeline.run()) if pipeline else None
+
+    if pipeline:
+        # start the workers before timing, spawning is a one-off cost
+        await pipeline.submit(frames[0])
+        await pipeline.join()
+
+    start = time.perf_counter()
+    for i in range(0, len(frames), READ_CHUNK):
+        for frame in frames[i:i + READ_CHUNK]:
+            if pipeline:
+                await pipeline.submit(frame)
+            else:
+                await consumer.handle_message(aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, frame, None))
+        # a socket read yields to the event loop
+        await asyncio.sleep(0)
+    if pipeline:
+        await pipeline.join()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    if pipeline and pipeline_task:
+        pipeline_task.cancel()
+        pipeline.shutdown()
+
+    lags.sort()
+    return {
+        'frames/s': len(frames) / elapsed,
+        'lag p50 ms': 1e3 * statistics.median(lags) if lags else float('nan'),
+        'lag p99 ms': 1e3 * lags[int(0.99 * (len(lags) - 1))] if lags else float('nan'),
+        'lag max ms': 1e3 * lags[-1] if lags else float('nan'),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline mode of the spot consumer.')
+    parser.add_argument('--frames', type=int, default=50_000)
+    parser.add_argument('--workers', type=int, default=4, help='pool size of the pipeline mode')
+    args = parser.parse_args()
+
+    # nothing is queued for the writers
+    websocket_module.DRY_RUN = True
+    frames = make_frames(args.frames)
+
+    results = {
+        'single loop': asyncio.run(run_mode(frames, 0)),
+        f'pipeline ({args.workers} workers)': asyncio.run(run_mode(frames, args.workers)),
+    }
+
+    print(f"{'mode':<24}" + ''.join(f'{column:>14}' for column in next(iter(results.values()))))
+    for mode, result in results.items():
+        print(f'{mode:<24}' + ''.join(f'{value:>14.2f}' for value in result.values()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure the import (startup) time of every entry point of the project.
+
+Each entry point is imported in a fresh interpreter several times and the median
+wall-clock time is reported, net of the bare interpreter startup.
+
+Run with
+
+```bash
+uv run python -m crypto_hft.benchmarks.startup_time --runs 5
+```
+
+Use `--importtime` to also print the slowest modules imported by each entry point
+(parsed from `python -X importtime`).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# (name, module to import, working directory)
+ENTRY_POINTS: list[tuple[str, str, Path]] = [
+    ('spot collector', 'crypto_hft.spot.main_loop', PROJECT_ROOT),
+    ('perps collector', 'crypto_hft.perps.launcher_script', PROJECT_ROOT),
+    ('funding loop', 'crypto_hft.funding_rate.funding_fetch_loop', PROJECT_ROOT),
+    ('currency tracker', 'crypto_hft.metadata.currency_tracker', PROJECT_ROOT),
+    ('logging setup', 'crypto_hft.utils.logging.logger', PROJECT_ROOT),
+    ('models package', 'crypto_hft.models', PROJECT_ROOT),
+    ('fair value model', 'crypto_hft.models.fair_value_model', PROJECT_ROOT),
+    ('dashboard plotting', 'crypto_hft.streamlit.plotting_utils', PROJECT_ROOT),
+    ('dashboard db utils', 'crypto_hft.streamlit.util_functions', PROJECT_ROOT),
+]
+
+def _run(code: str, cwd: Path, extra_args: list[str] | None = None) -> tuple[float, subprocess.CompletedProcess]:
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get('PYTHONPATH')]))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *(extra_args or []), '-c', code],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    return time.perf_counter() - start, proc
+
+def measure(module: str, cwd: Path, runs: int) -> float | None:
+    """Median import time of `module` in seconds, or None if the import fails."""
+    timings = []
+    for _ in range(runs):
+        elapsed, proc = _run(f'import {module}', cwd)
+        if proc.returncode != 0:
+            last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'unknown error'
+            print(f'  [❌] {module} failed to import: {last_line}')
+            return None
+        timings.append(elapsed)
+    return statistics.median(timings)
+
+def slowest_imports(module: str, cwd: Path, top: int) -> list[tuple[float, str]]:
+    """Return the `top` modules with the highest cumulative import time (seconds)."""
+    _, proc = _run(f'import {module}', cwd, ['-X', 'importtime'])
+    rows = []
+    for line in proc.stderr.splitlines():
+        # format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split(':', 1)[1].split('|'))
+        rows.append((int(cumulative) / 1e6, name))
+    return sorted(rows, reverse=True)[:top]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='number of fresh interpreters per entry point')
+    parser.add_argument('--importtime', action='store_true', help='show the slowest imports of each entry point')
+    parser.add_argument('--top', type=int, default=5, help='number of slow imports to show with --importtime')
+    args = parser.parse_args()
+
+    baseline = measure('sys', PROJECT_ROOT, args.runs) or 0.0
+    print(f'Interpreter startup: {baseline * 1e3:.0f} ms (subtracted below)\n')
+    print(f'{"entry point":<22} {"module":<45} {"import time":>12}')
+
+    for name, module, cwd in ENTRY_POINTS:
+        median = measure(module, cwd, args.runs)
+        if median is None:
+            continue
+        print(f'{name:<22} {module:<45} {(median - baseline) * 1e3:>9.0f} ms')
+
+        if args.importtime:
+            for seconds, imported in slowest_imports(module, cwd, args.top):
+                print(f'{"":<22}   {imported:<43} {seconds * 1e3:>9.0f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,14 @@
 import asyncio
 import datetime
+import logging
 import ccxt.async_support as ccxt # type: ignore
 
 from crypto_hft.funding_rate.symbol_manager import get_all_symbols
 from crypto_hft.utils.config import Config
+from crypto_hft.utils.rate_limiter import rate_limiter
+
+# exchanges of the funding services
+FUNDING_EXCHANGES = ["binance", "bybit", "hyperliquid"]
 
 
 def normalize(data, exchange: str, symbol: str) -> dict:
@@ -22,61 +27,69 @@ def normalize(data, exchange: str, symbol: str) -> dict:
 
 class AsyncFundingRateFetcher:
     def __init__(self):
-        self.binance = ccxt.binance({'options': {'defaultType': 'future'}})
-        self.bybit = ccxt.bybit({'options': {'defaultType': 'future'}})
-        self.hyperliquid = ccxt.hyperliquid()
+        self.binance = rate_limiter.create(ccxt, 'binance', {'options': {'defaultType': 'future'}})
+        self.bybit = rate_limiter.create(ccxt, 'bybit', {'options': {'defaultType': 'future'}})
+        self.hyperliquid = rate_limiter.create(ccxt, 'hyperliquid')
+
+    async def load_all_markets(self, catalog=None):
+        """Loads the markets, taking them from the `MarketCatalog` when it has them."""
+        exchanges = [self.binance, self.bybit, self.hyperliquid]
+        await asyncio.gather(*(
+            exchange.load_markets() for exchange in exchanges
+            if catalog is None or not catalog.set_markets(exchange)
+        ))
+
+    async def fetch_funding_rates(self, exchange, name: str, symbols: list[dict]) -> list[dict]:
+        """
+        Funding rates of `symbols` on one exchange: a single `fetchFundingRates` request where
+        the exchange has the bulk endpoint, batches of `Config.funding_symbols_per_request`
+        concurrent `fetchFundingRate` calls otherwise.
+        """
+        index = {s["unified"]: s for s in symbols}
+        if not index:
+            return []
+
+        results = []
+        if exchange.has.get("fetchFundingRates"):
+            try:
+                data = await exchange.fetchFundingRates(list(index))
+            except Exception as e:
+                return [{"exchange": name, "symbol": "ALL", "error": str(e)}]
+            for symbol, rate in data.items():
+                match = index.get(rate.get("symbol") or symbol)
+                if match:
+                    results.append(normalize(rate, name, match["normalized"]))
+            if len(results) < len(index):
+                logging.warning(f"[{name}] {len(index) - len(results)} symbols missing from fetchFundingRates")
+            return results
+
+        unified = list(index)
+        size = Config.funding_symbols_per_request
+        for batch in (unified[i:i + size] for i in range(0, len(unified), size)):
+            responses = await asyncio.gather(*(exchange.fetchFundingRate(symbol) for symbol in batch), return_exceptions=True)
+            for symbol, r in zip(batch, responses):
+                if isinstance(r, Exception):
+                    results.append({"exchange": name, "symbol": index[symbol]["normalized"], "error": str(r)})
+                else:
+                    results.append(normalize(r, name, index[symbol]["normalized"]))
+        return results
 
-    async def load_all_markets(self):
-        await asyncio.gather(
-            self.binance.load_markets(),
-            self.bybit.load_markets(),
-            self.hyperliquid.load_markets()
-        )
+    @staticmethod
+    def exchange_symbols(name: str, symbols: list[dict]) -> list[dict]:
+        """The symbols of `symbols` tracked on exchange `name`."""
+        return [
+            s for s in symbols
+            if s["exchange"] == name and "error" not in s and (name != "bybit" or "PERP" in s["id"])
+        ]
 
     async def fetch_binance(self, symbols: list[dict]) -> list[dict]:
-        tasks, results = [], []
-        binance_symbols = [s for s in symbols if s["exchange"] == "binance"]
-
-        for s in binance_symbols:
-            tasks.append(self.binance.fetchFundingRate(s["unified"]))
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-        for s, r in zip(binance_symbols, responses):
-            if isinstance(r, Exception):
-                results.append({"exchange": "binance", "symbol": s["normalized"], "error": str(r)})
-            else:
-                results.append(normalize(r, "binance", s["normalized"]))
-        return results
+        return await self.fetch_funding_rates(self.binance, "binance", self.exchange_symbols("binance", symbols))
 
     async def fetch_bybit(self, symbols: list[dict]) -> list[dict]:
-        tasks, results = [], []
-        bybit_symbols = [s for s in symbols if s["exchange"] == "bybit" and "PERP" in s["id"]]
-
-        for s in bybit_symbols:
-            tasks.append(self.bybit.fetchFundingRate(s["id"]))
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-        for s, r in zip(bybit_symbols, responses):
-            if isinstance(r, Exception):
-                results.append({"exchange": "bybit", "symbol": s["normalized"], "error": str(r)})
-            else:
-                results.append(normalize(r, "bybit", s["normalized"]))
-        return results
+        return await self.fetch_funding_rates(self.bybit, "bybit", self.exchange_symbols("bybit", symbols))
 
     async def fetch_hyperliquid(self, symbols: list[dict]) -> list[dict]:
-        results = []
-        try:
-            data = await self.hyperliquid.fetchFundingRates()
-            for rate in data.values():
-                match = next(
-                    (s for s in symbols if s["exchange"] == "hyperliquid" and s["unified"] == rate["symbol"]),
-                    None
-                )
-                if match:
-                    results.append(normalize(rate, "hyperliquid", match["normalized"]))
-        except Exception as e:
-            results.append({"exchange": "hyperliquid", "symbol": "ALL", "error": str(e)})
-        return results
+        return await self.fetch_funding_rates(self.hyperliquid, "hyperliquid", self.exchange_symbols("hyperliquid", symbols))
 
     async def fetch_all(self, symbols: list[dict]) -> list[dict]:
         return sum(await asyncio.gather(
@@ -96,7 +109,7 @@ class AsyncFundingRateFetcher:
 #     import pprint
 
 #     async def main():
-#         config = Config()
+#         config = get_config()
 #         symbols = get_all_symbols(
 #             base_assets=config.target_tokens,
 #             include_spot=False,
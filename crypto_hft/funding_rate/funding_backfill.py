@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+import msgspec
+from crypto_hft.utils.config import Config, get_config
+from crypto_hft.funding_rate.fetch_data import AsyncFundingRateFetcher, FUNDING_EXCHANGES, normalize
+from crypto_hft.funding_rate.symbol_manager import filter_markets, get_all_symbols
+from crypto_hft.utils.rate_limiter import rate_limiter
+
+if TYPE_CHECKING:
+    from crypto_hft.funding_rate.insert_funding_data import FundingRateInserter
+
+'''
+Historical funding backfill: pages `fetchFundingRateHistory` for every symbol in parallel,
+with at most `Config.funding_backfill_concurrency[exchange]` requests in flight per exchange,
+and bulk-loads each page into `funding_<exchange>` with the `FundingRateInserter` upsert
+(settled rates merge into the snapshots of the same funding period). The next timestamp of
+every symbol is checkpointed to a JSON file once its page is stored, so an interrupted run
+resumes where it stopped, and a later run only fetches what is new.
+
+Run with
+
+```bash
+uv run python -m crypto_hft.funding_rate.funding_backfill --start 2024-01-01
+uv run python -m crypto_hft.funding_rate.funding_backfill --start 2024-01-01 --mock --dry-run
+```
+'''
+
+HOUR_MS = 3600 * 1000
+# exchange -> (max entries per request, default funding interval in ms)
+HISTORY_PAGES = {
+    "binance": (1000, 8 * HOUR_MS),
+    "bybit": (200, 8 * HOUR_MS),
+    "hyperliquid": (500, HOUR_MS),
+}
+
+
+def history_row(entry: dict, exchange: str, symbol: str) -> dict:
+    """Funding history entry -> funding table row (the settlement time is the funding time)."""
+    return {**normalize(entry, exchange, symbol), "funding_time": entry["datetime"]}
+
+
+class DryRunInserter:
+    """Counts the rows instead of writing them."""
+
+    def __init__(self):
+        self.written = 0
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def insert_batch(self, table_name: str, rows: list[dict]) -> bool:
+        self.written += len(rows)
+        return True
+
+
+class FundingBackfill:
+    def __init__(
+        self,
+        exchanges: dict,
+        inserter,
+        symbols: list[dict],
+        start: int,
+        end: int | None = None,
+        checkpoint_path: str = Config.funding_backfill_checkpoint,
+        concurrency: dict[str, int] = Config.funding_backfill_concurrency,
+    ):
+        self.exchanges = exchanges # name -> ccxt client
+        self.inserter = inserter
+        self.symbols = symbols
+        self.start = start # ms
+        self.end = end or int(time.time() * 1000)
+        self.checkpoint_path = Path(checkpoint_path).expanduser()
+        self.concurrency = concurrency
+        self.semaphores: dict[str, asyncio.Semaphore] = {}
+
+        self.progress: dict[str, int] = {} # "exchange:symbol" -> next timestamp to fetch (ms)
+        self.requests = 0
+        self.rows = 0
+        self.failed: list[str] = []
+
+    # --- Checkpoint ---
+    def read_checkpoint(self) -> None:
+        try:
+            checkpoint = msgspec.json.decode(self.checkpoint_path.read_bytes())
+        except FileNotFoundError:
+            return
+        if checkpoint.get("start") != self.start:
+            logging.warning(f"[BACKFILL] Ignoring checkpoint {self.checkpoint_path} of another start date")
+            return
+        self.progress = checkpoint["progress"]
+        logging.info(f"[BACKFILL] Resuming {len(self.progress)} symbols from {self.checkpoint_path}")
+
+    def write_checkpoint(self) -> None:
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_name(f"{self.checkpoint_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(msgspec.json.encode({"start": self.start, "progress": self.progress}))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # --- Paging ---
+    def page_window(self, name: str, exchange, unified: str) -> tuple[int, int]:
+        """Entries per request and time span of a request. Some exchanges return the latest
+        entries of the span, so it must not hold more than a page: it is sized from the funding
+        interval of the market when the exchange gives it."""
+        limit, interval = HISTORY_PAGES.get(name, (100, 8 * HOUR_MS))
+        market = (getattr(exchange, "markets", None) or {}).get(unified) or {}
+        minutes = (market.get("info") or {}).get("fundingInterval")
+        if minutes:
+            interval = int(minutes) * 60 * 1000
+        return limit, limit * interval
+
+    async def fetch_page(self, name: str, exchange, unified: str, since: int, limit: int, until: int) -> list[dict]:
+        for attempt in range(1, Config.max_retries + 1):
+            try:
+                async with self.semaphores[name]:
+                    self.requests += 1
+                    return await exchange.fetchFundingRateHistory(unified, since, limit, {"until": until})
+            except Exception as e:
+                if attempt == Config.max_retries:
+                    raise
+                logging.warning(f"[BACKFILL] {name} {unified} attempt {attempt} failed: {e}")
+                await asyncio.sleep(Config.retry_wait_time)
+        return []
+
+    async def backfill_symbol(self, name: str, exchange, symbol: dict) -> None:
+        unified = symbol["unified"]
+        key = f"{name}:{unified}"
+        since = self.progress.get(key, self.start)
+        limit, window = self.page_window(name, exchange, unified)
+
+        while since < self.end:
+            until = min(since + window, self.end) - 1
+            try:
+                page = await self.fetch_page(name, exchange, unified, since, limit, until)
+            except Exception as e:
+                logging.error(f"[BACKFILL] {name} {unified} stopped at {since}: {e}")
+                self.failed.append(key)
+                return
+            page = [entry for entry in page if since <= entry["timestamp"] <= until]
+
+            if page:
+                rows = [history_row(entry, name, symbol["normalized"]) for entry in page]
+                if not await self.inserter.insert_batch(f"funding_{name}", rows):
+                    logging.error(f"[BACKFILL] {name} {unified} stopped at {since}: insert failed")
+                    self.failed.append(key)
+                    return
+                self.rows += len(rows)
+            # a full page may have stopped before the end of the window
+            since = page[-1]["timestamp"] + 1 if len(page) >= limit else until + 1
+            self.progress[key] = since
+            self.write_checkpoint()
+
+    async def run(self) -> None:
+        self.read_checkpoint()
+        self.semaphores = {name: asyncio.Semaphore(self.concurrency.get(name, 4)) for name in self.exchanges}
+        start = time.time()
+        await asyncio.gather(*(
+            self.backfill_symbol(name, exchange, symbol)
+            for name, exchange in self.exchanges.items()
+            for symbol in AsyncFundingRateFetcher.exchange_symbols(name, self.symbols)
+        ))
+        logging.info(
+            f"[BACKFILL] {self.rows} rows in {self.requests} requests, {time.time() - start:.1f}s"
+            + (f", {len(self.failed)} symbols failed (rerun to resume): {self.failed}" if self.failed else "")
+        )
+
+
+async def mock_exchanges(names: list[str], latency: float) -> tuple[dict, list[dict]]:
+    """Local mock exchanges serving a synthetic funding history, and their symbols."""
+    from crypto_hft.perps.mock_exchange import MockExchange
+
+    exchanges, symbols = {}, []
+    for i, name in enumerate(names):
+        exchange = MockExchange(
+            name, seed=i, request_latency=latency,
+            funding_interval=HISTORY_PAGES.get(name, (100, 8 * HOUR_MS))[1] / 1000,
+        )
+        markets = await exchange.load_markets()
+        for s in filter_markets(markets.values(), base_assets=Config.target_tokens):
+            s["exchange"] = name
+            s["id"] = f"{s['id']}PERP" # the bybit symbol filter
+            symbols.append(s)
+        exchanges[name] = exchange
+    return exchanges, symbols
+
+
+async def main(args: argparse.Namespace) -> None:
+    start = int(datetime.datetime.fromisoformat(args.start).replace(tzinfo=datetime.UTC).timestamp() * 1000)
+    end = int(datetime.datetime.fromisoformat(args.end).replace(tzinfo=datetime.UTC).timestamp() * 1000) if args.end else None
+
+    fetcher = None
+    if args.mock:
+        exchanges, symbols = await mock_exchanges(args.exchanges, args.mock_latency)
+    else:
+        from crypto_hft.utils.market_catalog import MarketCatalog
+
+        catalog = await MarketCatalog(FUNDING_EXCHANGES).load()
+        symbols = get_all_symbols(base_assets=Config.target_tokens, include_spot=False, include_perp=True, linear_only=True, catalog=catalog)
+        fetcher = AsyncFundingRateFetcher()
+        await fetcher.load_all_markets(catalog)
+        exchanges = {name: getattr(fetcher, name) for name in args.exchanges}
+
+    inserter: 'DryRunInserter | FundingRateInserter'
+    if args.dry_run:
+        inserter = DryRunInserter()
+    else:
+        from crypto_hft.funding_rate.insert_funding_data import FundingRateInserter
+
+        config = get_config()
+        inserter = FundingRateInserter({
+            "host": config.postgres_host,
+            "port": config.postgres_port,
+            "user": config.postgres_user,
+            "password": config.postgres_password,
+            "database": config.postgres_database
+        })
+    await inserter.connect()
+
+    backfill = FundingBackfill(exchanges, inserter, symbols, start, end, args.checkpoint)
+    try:
+        await backfill.run()
+    finally:
+        if fetcher is not None:
+            await fetcher.close()
+        await rate_limiter.close()
+        await inserter.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Backfill the funding rate history into the funding tables.")
+    parser.add_argument("--start", required=True, help="UTC date of the first funding rate, e.g. 2024-01-01")
+    parser.add_argument("--end", help="UTC date of the last funding rate (now by default)")
+    parser.add_argument("--exchanges", nargs="+", default=list(HISTORY_PAGES))
+    parser.add_argument("--checkpoint", default=Config.funding_backfill_checkpoint)
+    parser.add_argument("--mock", action="store_true", help="use local mock exchanges instead of the real ones")
+    parser.add_argument("--mock-latency", type=float, default=0.05, help="mock request latency, seconds")
+    parser.add_argument("--dry-run", action="store_true", help="count the rows instead of writing them")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import logging
+import time
+from crypto_hft.utils.config import Config
+from crypto_hft.funding_rate.fetch_data import AsyncFundingRateFetcher, FUNDING_EXCHANGES, normalize
+from crypto_hft.utils.time_utils import unix_to_iso8601
+
+'''
+Live estimate of the next funding rate of every symbol from the streamed mark and index prices,
+without REST requests. The premium index is approximated by (mark - index) / index (the
+exchanges use impact bid / ask prices, which ccxt does not stream), averaged over time since
+the start of the current funding window, and the rate follows the usual formula
+
+    rate = P + clamp(I - P, -Config.funding_premium_clamp, Config.funding_premium_clamp)
+
+with I = `Config.funding_interest_rate` per 8 hours. Binance and Bybit scale the interest to the
+funding interval of the symbol; Hyperliquid computes an 8-hour rate and pays 1/8 of it every
+hour. Every update produces a row of the `normalize` schema of `fetch_data.py`, kept in
+`estimates` and passed to the `on_estimate` callbacks.
+
+Run with
+
+```bash
+uv run python -m crypto_hft.funding_rate.funding_estimator
+uv run python -m crypto_hft.funding_rate.funding_estimator --mock
+```
+'''
+
+EIGHT_HOURS = 8 * 3600
+# exchanges computing an 8-hour rate and paying interval / 8h of it
+SCALED_RATE_EXCHANGES = {"hyperliquid"}
+# exchanges whose watch_tickers only carries mid prices, mark and index come with watch_ticker
+SINGLE_TICKER_EXCHANGES = {"hyperliquid"}
+# exchange-specific next funding time field of the streamed tickers (ms)
+FUNDING_TIME_FIELDS = ("T", "nextFundingTime")
+
+
+class PremiumWindow:
+    """Time-weighted average of the premium over the current funding window."""
+    __slots__ = ('interval', 'end', 'premium', 'last_time', 'weighted', 'elapsed', 'mark', 'index')
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.end: float | None = None # next funding time
+        self.premium: float | None = None
+        self.last_time: float | None = None
+        self.weighted = 0.0
+        self.elapsed = 0.0
+        self.mark: float | None = None
+        self.index: float | None = None
+
+    def update(self, mark: float, index: float, timestamp: float, funding_time: float | None = None) -> None:
+        # the exchange's next funding time when it streams it (a time already passed is stale)
+        if funding_time is not None and funding_time > timestamp and funding_time != self.end:
+            if self.end is not None and funding_time > self.end:
+                self._roll(self.end)
+            self.end = funding_time
+        elif self.end is None:
+            # funding happens on the interval grid (00:00, 08:00, 16:00 UTC for 8h)
+            self.end = (timestamp // self.interval + 1) * self.interval
+
+        while timestamp >= self.end:
+            self._accumulate(self.end)
+            self._roll(self.end)
+            self.end += self.interval
+        self._accumulate(timestamp)
+        self.premium = (mark - index) / index
+        self.mark, self.index = mark, index
+
+    def _accumulate(self, until: float) -> None:
+        """Weights the current premium by the time it held."""
+        assert self.end is not None, 'The window end is set before accumulating.'
+        if self.premium is not None and self.last_time is not None and until > self.last_time:
+            start = max(self.last_time, self.end - self.interval)
+            if until > start:
+                self.weighted += self.premium * (until - start)
+                self.elapsed += until - start
+        self.last_time = until
+
+    def _roll(self, start: float) -> None:
+        self.weighted = 0.0
+        self.elapsed = 0.0
+        self.last_time = start
+
+    def average(self, now: float) -> float | None:
+        """Average premium of the window up to `now`, the current premium holding since its update."""
+        if self.premium is None:
+            return None
+        held = max(now - self.last_time, 0.0) if self.last_time is not None else 0.0
+        elapsed = self.elapsed + held
+        if elapsed <= 0:
+            return self.premium
+        return (self.weighted + self.premium * held) / elapsed
+
+
+class FundingEstimator:
+    def __init__(
+        self,
+        exchanges: dict,
+        symbols: list[dict],
+        interest_rate: float = Config.funding_interest_rate,
+        clamp: float = Config.funding_premium_clamp,
+    ):
+        self.exchanges = exchanges # name -> ccxt.pro client
+        self.symbols = symbols
+        self.interest_rate = interest_rate
+        self.clamp = clamp
+
+        self.index = {
+            name: {s["unified"]: s for s in AsyncFundingRateFetcher.exchange_symbols(name, symbols)}
+            for name in exchanges
+        }
+        self.windows: dict[tuple[str, str], PremiumWindow] = {}
+        self.estimates: dict[tuple[str, str], dict] = {} # (exchange, normalized symbol) -> latest row
+        self.on_estimate: list = [] # callbacks called with every estimate row
+        self.updates = 0
+
+    def interval(self, name: str, unified: str) -> float:
+        market = (getattr(self.exchanges.get(name), "markets", None) or {}).get(unified) or {}
+        minutes = (market.get("info") or {}).get("fundingInterval")
+        if minutes:
+            return int(minutes) * 60
+        return 3600 if name == "hyperliquid" else EIGHT_HOURS
+
+    def funding_rate(self, name: str, premium: float, interval: float) -> float:
+        if name in SCALED_RATE_EXCHANGES:
+            rate = premium + min(max(self.interest_rate - premium, -self.clamp), self.clamp)
+            return rate * interval / EIGHT_HOURS
+        interest = self.interest_rate * interval / EIGHT_HOURS
+        return premium + min(max(interest - premium, -self.clamp), self.clamp)
+
+    def update(self, name: str, ticker: dict, now: float | None = None) -> dict | None:
+        """Adds a streamed ticker, returns the new estimate row (None if the ticker is not usable)."""
+        symbol = self.index.get(name, {}).get(ticker.get("symbol"))
+        mark, index = ticker.get("markPrice"), ticker.get("indexPrice")
+        if symbol is None or not mark or not index:
+            return None
+        now = now or time.time()
+        timestamp = ticker["timestamp"] / 1000 if ticker.get("timestamp") else now
+
+        info = ticker.get("info") or {}
+        funding_time = next((info[field] for field in FUNDING_TIME_FIELDS if info.get(field)), None)
+        funding_time = int(funding_time) / 1000 if funding_time is not None else None
+
+        key = (name, symbol["normalized"])
+        window = self.windows.get(key)
+        if window is None:
+            window = self.windows[key] = PremiumWindow(self.interval(name, symbol["unified"]))
+        window.update(float(mark), float(index), timestamp, funding_time)
+        self.updates += 1
+        premium = window.average(timestamp)
+        assert premium is not None and window.end is not None, 'The window was just updated.'
+
+        row = normalize({
+            "fundingRate": self.funding_rate(name, premium, window.interval),
+            "fundingDatetime": unix_to_iso8601(window.end),
+            "markPrice": window.mark,
+            "indexPrice": window.index,
+            "interval": f"{window.interval / 3600:g}h",
+        }, name, symbol["normalized"])
+        self.estimates[key] = row
+        for callback in self.on_estimate:
+            callback(row)
+        return row
+
+    # --- Streams ---
+    async def stream(self, name: str, client, symbols: list[str]) -> None:
+        while True:
+            try:
+                if client.has.get("watchMarkPrices"):
+                    tickers = (await client.watch_mark_prices(symbols)).values()
+                elif name in SINGLE_TICKER_EXCHANGES or not client.has.get("watchTickers"):
+                    tickers = [await client.watch_ticker(symbols[0])]
+                else:
+                    tickers = (await client.watch_tickers(symbols)).values()
+                for ticker in tickers:
+                    self.update(name, ticker)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"[ESTIMATOR] {name} stream error: {e}, reconnecting")
+                await asyncio.sleep(Config.retry_wait_time)
+
+    async def run(self, shutdown_event: asyncio.Event | None = None) -> None:
+        tasks = []
+        for name, client in self.exchanges.items():
+            symbols = list(self.index[name])
+            if not symbols:
+                continue
+            single = not client.has.get("watchMarkPrices") and (
+                name in SINGLE_TICKER_EXCHANGES or not client.has.get("watchTickers")
+            )
+            groups = [[symbol] for symbol in symbols] if single else [symbols]
+            tasks += [asyncio.create_task(self.stream(name, client, group)) for group in groups]
+            logging.info(f"[ESTIMATOR] Streaming {name} mark and index prices for {len(symbols)} symbols")
+        try:
+            if shutdown_event is None:
+                await asyncio.gather(*tasks)
+            else:
+                await shutdown_event.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def main(args: argparse.Namespace) -> None:
+    from crypto_hft.utils.rate_limiter import rate_limiter
+
+    if args.mock:
+        from crypto_hft.funding_rate.funding_backfill import mock_exchanges
+
+        exchanges, symbols = await mock_exchanges(FUNDING_EXCHANGES, 0)
+        for exchange in exchanges.values():
+            exchange.book_rate = args.mock_rate
+    else:
+        import ccxt.pro as ccxtpro # type: ignore
+        from crypto_hft.funding_rate.symbol_manager import get_all_symbols
+        from crypto_hft.utils.market_catalog import MarketCatalog
+
+        catalog = await MarketCatalog(FUNDING_EXCHANGES).load()
+        symbols = get_all_symbols(base_assets=Config.target_tokens, include_spot=False, include_perp=True, linear_only=True, catalog=catalog)
+        exchanges = {}
+        for name in FUNDING_EXCHANGES:
+            exchanges[name] = rate_limiter.create(ccxtpro, name, {'options': {'defaultType': 'future'}})
+            if not catalog.set_markets(exchanges[name]):
+                await exchanges[name].load_markets()
+
+    estimator = FundingEstimator(exchanges, symbols)
+    shutdown_event = asyncio.Event()
+    task = asyncio.create_task(estimator.run(shutdown_event))
+    try:
+        while not task.done():
+            await asyncio.sleep(Config.funding_estimate_report_interval)
+            for (name, symbol), row in sorted(estimator.estimates.items()):
+                logging.info(f"[ESTIMATOR] {name} {symbol}: {row['funding_rate']:+.6f} until {row['funding_time']}")
+            logging.info(f"[ESTIMATOR] {estimator.updates} updates")
+    finally:
+        shutdown_event.set()
+        await task
+        for exchange in exchanges.values():
+            await exchange.close()
+        await rate_limiter.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Estimate the next funding rates from the streamed mark and index prices.")
+    parser.add_argument("--mock", action="store_true", help="use local mock exchanges instead of the real ones")
+    parser.add_argument("--mock-rate", type=float, default=10, help="mock updates per second per symbol")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        logging.warning("🛑 Interrupted manually")
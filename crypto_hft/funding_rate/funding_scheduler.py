@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import re
+import time
+from crypto_hft.utils.config import Config
+from crypto_hft.utils.time_utils import iso8601_to_unix
+
+'''
+Funding-schedule-aware fetching: each exchange is fetched right after the earliest funding
+time of its symbols (to capture the settled rates) and polled for the predicted rates every
+`Config.funding_poll_interval` seconds in between. Exchanges with a ccxt.pro funding rate
+stream (`watchFundingRates` / `watchFundingRate`) are streamed instead of polled: the latest
+streamed rate of every symbol is written at the poll cadence.
+'''
+
+INTERVAL_PATTERN = re.compile(r'^(\d+)([mhd])$')
+INTERVAL_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+def interval_seconds(interval: str | None, default: float = 8 * 3600) -> float:
+    """'8h' -> 28800"""
+    match = INTERVAL_PATTERN.match(interval or '')
+    return int(match.group(1)) * INTERVAL_UNITS[match.group(2)] if match else default
+
+
+class SymbolSchedule:
+    __slots__ = ('symbol', 'interval', 'next_funding', 'missed')
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.interval = 8 * 3600.
+        self.next_funding: float | None = None
+        self.missed = 0 # consecutive successful fetches without the symbol
+
+    def update(self, row: dict, now: float, retry_delay: float) -> None:
+        self.interval = interval_seconds(row.get('interval'), self.interval)
+        next_funding = None
+        if row.get('funding_time'):
+            try:
+                next_funding = iso8601_to_unix(row['funding_time'])
+            except Exception:
+                pass
+        if next_funding is None:
+            # funding happens on the interval grid (00:00, 08:00, 16:00 UTC for 8h)
+            next_funding = (now // self.interval + 1) * self.interval
+        if next_funding <= now:
+            # the exchange has not rolled over to the next funding yet, check again shortly
+            next_funding = now + retry_delay
+        self.next_funding = next_funding
+
+
+class ExchangeSchedule:
+    def __init__(self, name: str, fetch):
+        self.name = name
+        self.fetch = fetch # coroutine function returning the normalized rows of the exchange
+        self.symbols: dict[str, SymbolSchedule] = {}
+        self.next_poll = 0.
+        self.streaming = False
+        self.streamed: dict[str, dict] = {} # latest streamed row per symbol, written at the poll cadence
+
+        self.settlement_fetches = 0
+        self.polls = 0
+        self.rows = 0
+
+    @property
+    def next_settlement(self) -> float | None:
+        times = [s.next_funding for s in self.symbols.values() if s.next_funding is not None]
+        return min(times, default=None)
+
+    def update(self, rows: list[dict], now: float, retry_delay: float, complete: bool = True) -> None:
+        """Updates the schedules from fetched rows. With `complete` (a fetch of all the symbols,
+        not streamed updates), symbols missing from `Config.funding_max_missed_fetches`
+        successful responses in a row are dropped."""
+        received = set()
+        for row in rows:
+            if 'error' in row:
+                continue
+            schedule = self.symbols.get(row['symbol'])
+            if schedule is None:
+                schedule = self.symbols[row['symbol']] = SymbolSchedule(row['symbol'])
+            schedule.update(row, now, retry_delay)
+            schedule.missed = 0
+            received.add(row['symbol'])
+
+        # a failed request says nothing about the symbols
+        if complete and received:
+            for symbol in [s for s in self.symbols if s not in received]:
+                schedule = self.symbols[symbol]
+                schedule.missed += 1
+                if schedule.missed >= Config.funding_max_missed_fetches:
+                    logging.warning(f"[FUNDING] {self.name} {symbol} missing from {schedule.missed} fetches, dropped")
+                    del self.symbols[symbol]
+
+    def defer_overdue(self, now: float, delay: float) -> None:
+        """Moves the funding times already passed (symbols that errored or were missing from the
+        last fetch) to `now + delay`, so that the settlement event is not due again at once."""
+        for schedule in self.symbols.values():
+            if schedule.next_funding is not None and schedule.next_funding <= now:
+                schedule.next_funding = now + delay
+
+
+class FundingScheduler:
+    def __init__(
+        self,
+        fetcher,
+        inserter,
+        symbols: list[dict],
+        poll_interval: float = Config.funding_poll_interval,
+        settlement_delay: float = Config.funding_settlement_delay,
+    ):
+        self.fetcher = fetcher
+        self.inserter = inserter
+        self.symbols = symbols
+        self.poll_interval = poll_interval
+        self.settlement_delay = settlement_delay
+        self.exchanges = {
+            name: ExchangeSchedule(name, getattr(fetcher, f"fetch_{name}"))
+            for name in ("binance", "bybit", "hyperliquid")
+        }
+        self.stream_tasks: list[asyncio.Task] = []
+        self.stream_clients: list = []
+
+    async def write(self, schedule: ExchangeSchedule, rows: list[dict]) -> None:
+        rows = [row for row in rows if 'error' not in row]
+        if rows:
+            await self.inserter.insert_batch(f"funding_{schedule.name}", rows)
+            schedule.rows += len(rows)
+
+    async def fetch(self, schedule: ExchangeSchedule, settlement: bool) -> None:
+        rows = await schedule.fetch(self.symbols)
+        for row in rows:
+            if 'error' in row:
+                logging.warning(f"[FUNDING] {schedule.name} {row.get('symbol')}: {row['error']}")
+        schedule.update(rows, time.time(), self.settlement_delay)
+        if settlement:
+            schedule.settlement_fetches += 1
+        else:
+            schedule.polls += 1
+        await self.write(schedule, rows)
+
+    async def poll(self, schedule: ExchangeSchedule) -> None:
+        if schedule.streaming:
+            rows, schedule.streamed = list(schedule.streamed.values()), {}
+            schedule.update(rows, time.time(), self.settlement_delay, complete=False)
+            schedule.polls += 1
+            await self.write(schedule, rows)
+        else:
+            await self.fetch(schedule, settlement=False)
+
+    # --- Streams ---
+    async def stream(self, schedule: ExchangeSchedule, client, symbols: list[str], index: dict[str, dict]) -> None:
+        from crypto_hft.funding_rate.fetch_data import normalize
+
+        while True:
+            try:
+                if client.has.get("watchFundingRates"):
+                    updates = await client.watch_funding_rates(symbols)
+                    updates = updates.values() if isinstance(updates, dict) else updates
+                else:
+                    updates = [await client.watch_funding_rate(symbols[0])]
+                for rate in updates:
+                    match = index.get(rate.get("symbol"))
+                    if match:
+                        schedule.streamed[match["normalized"]] = normalize(rate, schedule.name, match["normalized"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"[FUNDING] {schedule.name} funding stream error: {e}, falling back to polling")
+                schedule.streaming = False
+                return
+
+    async def start_streams(self) -> None:
+        """Subscribes to the ccxt.pro funding rate streams of the exchanges that have them."""
+        import ccxt.pro as ccxtpro # type: ignore # deferred: only needed to check for streams
+        from crypto_hft.utils.rate_limiter import rate_limiter
+
+        for name, schedule in self.exchanges.items():
+            client = rate_limiter.create(ccxtpro, name, {'options': {'defaultType': 'future'}})
+            index = {s["unified"]: s for s in self.symbols if s.get("exchange") == name}
+            if not index or not (client.has.get("watchFundingRates") or client.has.get("watchFundingRate")):
+                await client.close()
+                continue
+
+            schedule.streaming = True
+            self.stream_clients.append(client)
+            if client.has.get("watchFundingRates"):
+                groups = [list(index)]
+            else:
+                groups = [[symbol] for symbol in index]
+            self.stream_tasks += [
+                asyncio.create_task(self.stream(schedule, client, group, index)) for group in groups
+            ]
+            logging.info(f"[FUNDING] Streaming {name} funding rates for {len(index)} symbols")
+
+    # --- Main loop ---
+    async def run(self, shutdown_event: asyncio.Event | None = None) -> None:
+        # the first fetch gives the funding times and intervals
+        for schedule in self.exchanges.values():
+            await self.fetch(schedule, settlement=False)
+            schedule.next_poll = time.time() + self.poll_interval
+        try:
+            await self.start_streams()
+        except Exception as e:
+            logging.warning(f"[FUNDING] Funding streams unavailable: {e}")
+
+        try:
+            while shutdown_event is None or not shutdown_event.is_set():
+                now = time.time()
+                events = []
+                for schedule in self.exchanges.values():
+                    settlement = schedule.next_settlement
+                    if settlement is not None:
+                        events.append((settlement + self.settlement_delay, True, schedule))
+                    events.append((schedule.next_poll, False, schedule))
+                when, settlement, schedule = min(events, key=lambda event: event[0])
+                if when > now:
+                    await asyncio.sleep(when - now)
+
+                try:
+                    if settlement:
+                        logging.info(f"[FUNDING] {schedule.name} settlement, fetching settled rates")
+                        await self.fetch(schedule, settlement=True)
+                    else:
+                        await self.poll(schedule)
+                except Exception as e:
+                    logging.error(f"[FUNDING] {schedule.name} fetch error: {e}")
+                # retry the symbols still past their funding time later instead of spinning
+                schedule.defer_overdue(time.time(), self.settlement_delay)
+                # a settlement fetch also counts as a poll
+                schedule.next_poll = time.time() + self.poll_interval
+        finally:
+            for task in self.stream_tasks:
+                task.cancel()
+            await asyncio.gather(*self.stream_tasks, return_exceptions=True)
+            for client in self.stream_clients:
+                await client.close()
+
+    def metrics(self) -> list[dict]:
+        return [
+            {
+                "exchange": schedule.name,
+                "streaming": schedule.streaming,
+                "symbols": len(schedule.symbols),
+                "next_settlement": schedule.next_settlement,
+                "settlement_fetches": schedule.settlement_fetches,
+                "polls": schedule.polls,
+                "rows": schedule.rows,
+            }
+            for schedule in self.exchanges.values()
+        ]
@@ -1,11 +1,63 @@
+import argparse
+import asyncio
 import logging
+from crypto_hft.utils.config import Config, get_config
 from crypto_hft.utils.time_utils import iso8601_to_datetime
 import asyncpg # type: ignore
 
+'''
+Change-only storage of funding snapshots. A batch is COPYed into a temporary staging table
+and merged with `INSERT ... ON CONFLICT (exchange, symbol, funding_time)`, so each funding
+period of a symbol is one row holding its latest rates. A row is only written when its
+funding rate moved by more than `Config.funding_rate_tolerance` or its mark or index price by
+more than `Config.funding_price_tolerance` (relative): rows are filtered against the last
+written values in memory, and again in the `ON CONFLICT ... WHERE` after a restart. Missing
+values (the funding history has no prices) keep the stored ones. Tables written before the
+upsert may hold several snapshots of a funding period, which block the unique index: remove
+them once with `python -m crypto_hft.funding_rate.insert_funding_data --dedupe`.
+'''
+
+COLUMNS = [
+    "exchange", "symbol", "funding_rate", "funding_time",
+    "next_funding_rate", "mark_price", "index_price", "interval", "local_time"
+]
+KEY = ["exchange", "symbol", "funding_time"]
+RATE_COLUMNS = ["funding_rate"] # compared with an absolute tolerance
+PRICE_COLUMNS = ["mark_price", "index_price"] # compared with a relative tolerance
+
+
+def moved(old, new, tolerance: float, relative: bool = False) -> bool:
+    """A missing new value (e.g. no prices in the funding history) is not a move."""
+    if old is None or new is None:
+        return old is None and new is not None
+    return abs(new - old) > tolerance * (abs(old) if relative else 1)
+
+
+def sql_moved(column: str, tolerance: str, relative: bool = False) -> str:
+    """SQL equivalent of `moved` for the ON CONFLICT clause (t is the stored row)."""
+    scale = f" * abs(t.{column})" if relative else ""
+    return (
+        f"((t.{column} IS NULL AND EXCLUDED.{column} IS NOT NULL) "
+        f"OR abs(t.{column} - EXCLUDED.{column}) > {tolerance}{scale})"
+    )
+
+
 class FundingRateInserter:
-    def __init__(self, db_config: dict):
+    def __init__(
+        self,
+        db_config: dict,
+        rate_tolerance: float = Config.funding_rate_tolerance,
+        price_tolerance: float = Config.funding_price_tolerance,
+    ):
         self.db_config = db_config
         self.pool = None
+        self.rate_tolerance = rate_tolerance
+        self.price_tolerance = price_tolerance
+
+        self.last: dict[tuple, tuple] = {} # (table, exchange, symbol) -> (funding_time, last written rates) of the latest period
+        self.prepared: set[str] = set() # tables with the unique index ON CONFLICT needs
+        self.written = 0
+        self.skipped = 0
 
     async def connect(self):
         self.pool = await asyncpg.create_pool(**self.db_config)
@@ -16,36 +68,153 @@ class FundingRateInserter:
             await self.pool.close()
             logging.info("🔒 PostgreSQL pool closed")
 
-    async def insert_batch(self, table_name: str, rows: list[dict]):
-        if not rows:
+    @staticmethod
+    def format_row(row: dict) -> tuple:
+        values = []
+        for col in COLUMNS:
+            val = row.get(col)
+            if "time" in col and isinstance(val, str):
+                val = iso8601_to_datetime(val)
+            values.append(val)
+        return tuple(values)
+
+    def changed(self, table_name: str, record: tuple) -> bool:
+        row = dict(zip(COLUMNS, record))
+        last = self.last.get((table_name, row["exchange"], row["symbol"]))
+        if last is None or last[0] != row["funding_time"]:
+            return True
+        previous = dict(zip(RATE_COLUMNS + PRICE_COLUMNS, last[1]))
+        return (
+            any(moved(previous[col], row[col], self.rate_tolerance) for col in RATE_COLUMNS)
+            or any(moved(previous[col], row[col], self.price_tolerance, relative=True) for col in PRICE_COLUMNS)
+        )
+
+    def remember(self, table_name: str, record: tuple) -> None:
+        """Keeps only the latest funding period of each symbol, older periods are compared in SQL."""
+        row = dict(zip(COLUMNS, record))
+        key = (table_name, row["exchange"], row["symbol"])
+        last = self.last.get(key)
+        funding_time = row["funding_time"]
+        if last is None or last[0] is None or (funding_time is not None and funding_time >= last[0]):
+            self.last[key] = (funding_time, tuple(row[col] for col in RATE_COLUMNS + PRICE_COLUMNS))
+
+    async def prepare_table(self, conn, table_name: str) -> None:
+        """Creates the unique index of the upsert, raises if duplicate snapshots block it."""
+        index = f"{table_name}_funding_key"
+        if await conn.fetchval("SELECT to_regclass($1)", index) is not None:
             return
 
-        # Use column ordering consistent with your table schema
-        columns = [
-            "exchange", "symbol", "funding_rate", "funding_time",
-            "next_funding_rate", "mark_price", "index_price", "interval", "local_time"
-        ]
-        batch_data = []
+        try:
+            await conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table_name} ({', '.join(KEY)})")
+        except asyncpg.exceptions.UniqueViolationError as e:
+            raise RuntimeError(
+                f"{table_name} holds several snapshots of a funding period, remove them with "
+                f"`python -m crypto_hft.funding_rate.insert_funding_data --dedupe --tables {table_name}`"
+            ) from e
+        logging.info(f"[✅] Created {index}")
+
+    async def dedupe_table(self, table_name: str) -> int:
+        """One-off migration: deletes all but the latest snapshot (by `local_time`) of each
+        funding period and creates the unique index. Returns the number of deleted rows."""
+        assert self.pool is not None, 'Call connect() first.'
+        key = ", ".join(KEY)
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # no write between the cleanup and the index (another service may write the table)
+                await conn.execute(f"LOCK TABLE {table_name} IN SHARE ROW EXCLUSIVE MODE")
+                status = await conn.execute(
+                    f"DELETE FROM {table_name} WHERE ctid IN ("
+                    f"SELECT ctid FROM (SELECT ctid, row_number() OVER ("
+                    f"PARTITION BY {key} ORDER BY local_time DESC NULLS LAST) AS n "
+                    f"FROM {table_name} WHERE funding_time IS NOT NULL) d WHERE n > 1)"
+                )
+                await self.prepare_table(conn, table_name)
+        deleted = int(status.split()[-1])
+        logging.info(f"[✅] Deleted {deleted} older duplicate snapshots from {table_name}")
+        return deleted
+
+    def merge_query(self, table_name: str, staging: str) -> str:
+        cols = ", ".join(COLUMNS)
+        # ON CONFLICT cannot update a row twice, keep the latest snapshot of each key
+        select = (
+            f"SELECT DISTINCT ON ({', '.join(KEY)}) {cols} FROM {staging} "
+            f"ORDER BY {', '.join(KEY)}, local_time DESC"
+        )
+        updates = ", ".join(f"{col} = COALESCE(EXCLUDED.{col}, t.{col})" for col in COLUMNS if col not in KEY)
+        changed = " OR ".join(
+            [sql_moved(col, "$1::float8") for col in RATE_COLUMNS]
+            + [sql_moved(col, "$2::float8", relative=True) for col in PRICE_COLUMNS]
+        )
+        return (
+            f"INSERT INTO {table_name} AS t ({cols}) {select} "
+            f"ON CONFLICT ({', '.join(KEY)}) DO UPDATE SET {updates} WHERE {changed}"
+        )
+
+    async def insert_batch(self, table_name: str, rows: list[dict]) -> bool:
+        """Writes the changed rows, returns False if the batch could not be written."""
+        if not rows:
+            return True
 
+        records = []
         for row in rows:
             try:
-                formatted_row = []
-                for col in columns:
-                    val = row.get(col)
-                    if "time" in col and isinstance(val, str):
-                        val = iso8601_to_datetime(val)
-                    formatted_row.append(val)
-                batch_data.append(tuple(formatted_row))
+                records.append(self.format_row(row))
             except Exception as e:
                 logging.warning(f"[⚠️] Skipping invalid row for {table_name}: {e}")
 
-        placeholders = ", ".join(f"${i+1}" for i in range(len(columns)))
-        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+        changed = [record for record in records if self.changed(table_name, record)]
+        self.skipped += len(records) - len(changed)
+        if not changed:
+            logging.info(f"[✅] No funding changes for {table_name} ({len(records)} rows unchanged)")
+            return True
 
+        staging = f"staging_{table_name}"
         try:
             async with self.pool.acquire() as conn:
+                if table_name not in self.prepared:
+                    await self.prepare_table(conn, table_name)
+                    self.prepared.add(table_name)
+                query = self.merge_query(table_name, staging)
                 async with conn.transaction():
-                    await conn.executemany(query, batch_data)
-            logging.info(f"[✅] Inserted {len(batch_data)} rows into {table_name}")
+                    await conn.execute(
+                        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+                        f"SELECT {', '.join(COLUMNS)} FROM {table_name} WITH NO DATA"
+                    )
+                    await conn.copy_records_to_table(staging, records=changed, columns=COLUMNS)
+                    status = await conn.execute(query, self.rate_tolerance, self.price_tolerance)
         except Exception as e:
             logging.error(f"[❌] Failed batch insert for {table_name}: {e}")
+            return False
+
+        for record in changed:
+            self.remember(table_name, record)
+        written = int(status.split()[-1])
+        self.written += written
+        logging.info(f"[✅] Wrote {written} of {len(records)} rows into {table_name} ({len(records) - len(changed)} unchanged)")
+        return True
+
+
+async def main(args: argparse.Namespace) -> None:
+    config = get_config()
+    inserter = FundingRateInserter({
+        "host": config.postgres_host,
+        "port": config.postgres_port,
+        "user": config.postgres_user,
+        "password": config.postgres_password,
+        "database": config.postgres_database
+    })
+    await inserter.connect()
+    try:
+        for table_name in args.tables:
+            await inserter.dedupe_table(table_name)
+    finally:
+        await inserter.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Migrate the funding tables to the upsert.")
+    parser.add_argument("--dedupe", action="store_true", required=True,
+                        help="delete all but the latest snapshot of each funding period and create the unique index")
+    parser.add_argument("--tables", nargs="+", default=["funding_binance", "funding_bybit", "funding_hyperliquid"])
+    asyncio.run(main(parser.parse_args()))
@@ -1,7 +1,11 @@
-import ccxt # type: ignore 
+# symbol manager exchange -> ccxt id, for the market catalog
+CATALOG_IDS = {"poloniexperpetuals": "poloniexfutures"}
+
 
 # --- Exchange Loader ---
 def load_exchange(name: str, spot: bool = False):
+    import ccxt # type: ignore # deferred: the sync client is slow to import and only needed here
+
     exchange_map = {
         "binance": ccxt.binance,
         "bybit": ccxt.bybit,
@@ -20,9 +24,13 @@ def load_exchange(name: str, spot: bool = False):
 # --- Symbol Extractor ---
 def get_symbol_metadata(exchange, only_perps=True, base_assets=None, linear_only=True):
     exchange.load_markets()
+    return filter_markets(exchange.markets.values(), only_perps, base_assets, linear_only)
+
+
+def filter_markets(markets, only_perps=True, base_assets=None, linear_only=True):
     symbols = []
 
-    for m in exchange.markets.values():
+    for m in markets:
         if only_perps and m.get("type") != "swap":
             continue
         if not only_perps and m.get("type") != "spot":
@@ -52,7 +60,8 @@ def get_symbol_metadata(exchange, only_perps=True, base_assets=None, linear_only
 
 
 # --- Main Symbol Aggregator ---
-def get_all_symbols(base_assets=None, include_spot=True, include_perp=True, linear_only=True):
+def get_all_symbols(base_assets=None, include_spot=True, include_perp=True, linear_only=True, catalog=None):
+    """Symbols of every exchange, from the `MarketCatalog` if given (no request), by loading the markets otherwise."""
     exchanges = [
         ("binance", False),
         ("bybit", False),
@@ -70,13 +79,22 @@ def get_all_symbols(base_assets=None, include_spot=True, include_perp=True, line
             continue
 
         try:
-            ex = load_exchange(name, spot=is_spot)
-            symbols = get_symbol_metadata(
-                ex,
-                only_perps=not is_spot,
-                base_assets=base_assets,
-                linear_only=linear_only
-            )
+            if catalog is not None:
+                catalog_id = CATALOG_IDS.get(name, name)
+                market_type = "spot" if is_spot else "swap"
+                markets = (
+                    [m for base in base_assets for m in catalog.lookup(catalog_id, base, market_type)]
+                    if base_assets else catalog.markets(catalog_id).values()
+                )
+                symbols = filter_markets(markets, only_perps=not is_spot, base_assets=base_assets, linear_only=linear_only)
+            else:
+                ex = load_exchange(name, spot=is_spot)
+                symbols = get_symbol_metadata(
+                    ex,
+                    only_perps=not is_spot,
+                    base_assets=base_assets,
+                    linear_only=linear_only
+                )
             for s in symbols:
                 s["exchange"] = name
             all_symbols.extend(symbols)
@@ -0,0 +1,111 @@
+import math
+from crypto_hft.utils.config import Config
+
+class AdaptiveBatchController:
+    """Chooses the batch size and flush interval of one table from what it observes.
+
+    The insert latency is modelled as `base + per_row * rows` (exponentially weighted
+    least squares over the recent inserts) and the arrival rate as an exponentially
+    weighted rows/s. The oldest buffered row waits for the batch to fill and then for the
+    insert, so the largest batch meeting the freshness target solves
+
+        batch / arrival_rate + base + per_row * batch <= freshness_target
+
+    and the flush interval caps the wait of quiet tables at `freshness_target` minus the
+    expected insert latency.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        initial_batch_size: int,
+        freshness_target: float = Config.batch_freshness_target,
+        min_batch_size: int = Config.batch_min_size,
+        max_batch_size: int = Config.batch_max_size,
+        alpha: float = Config.batch_ewma_alpha,
+        rate_window: float = Config.batch_rate_window
+    ) -> None:
+        self.table_name = table_name
+        self.freshness_target = freshness_target
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.alpha = alpha
+        self.rate_window = rate_window
+
+        self.batch_size = min(max(initial_batch_size, min_batch_size), max_batch_size)
+        self.flush_interval = freshness_target
+        self.arrival_rate = 0.
+
+        # exponentially weighted moments of (rows, latency) for the latency model
+        self._rows = self._latency = self._rows_sq = self._rows_latency = 0.
+        self.base_latency = 0.
+        self.per_row_latency = 0.
+
+        self.inserts = 0
+        self.rows_per_insert = 0.
+        self.staleness = 0.
+        self.max_staleness = 0.
+
+    @property
+    def poll_interval(self) -> float:
+        return min(0.1, max(0.01, self.flush_interval / 5))
+
+    def predicted_latency(self, rows: float) -> float:
+        return self.base_latency + self.per_row_latency * rows
+
+    def record_arrivals(self, rows: int, elapsed: float) -> None:
+        if elapsed <= 0:
+            return
+        weight = 1 - math.exp(-elapsed / self.rate_window)
+        self.arrival_rate += weight * (max(rows, 0) / elapsed - self.arrival_rate)
+        self.update()
+
+    def record_insert(self, rows: int, latency: float, age: float) -> None:
+        """Records an insert of `rows` taking `latency` seconds, whose oldest row had waited `age` seconds."""
+        a = self.alpha if self.inserts else 1.
+        self.inserts += 1
+        self._rows += a * (rows - self._rows)
+        self._latency += a * (latency - self._latency)
+        self._rows_sq += a * (rows * rows - self._rows_sq)
+        self._rows_latency += a * (rows * latency - self._rows_latency)
+        self.rows_per_insert = self._rows
+
+        variance = self._rows_sq - self._rows ** 2
+        if variance > 1e-9 * max(self._rows_sq, 1.):
+            self.per_row_latency = max((self._rows_latency - self._rows * self._latency) / variance, 0.)
+            self.base_latency = max(self._latency - self.per_row_latency * self._rows, 0.)
+        else:
+            # every batch had the same size, attribute the latency to the rows
+            self.base_latency = 0.
+            self.per_row_latency = self._latency / max(self._rows, 1.)
+
+        staleness = age + latency
+        self.staleness += a * (staleness - self.staleness)
+        self.max_staleness = max(self.max_staleness, staleness)
+        self.update()
+
+    def update(self) -> None:
+        budget = max(self.freshness_target - self.base_latency, 0.)
+        if self.arrival_rate > 0:
+            batch_size = budget / (1 / self.arrival_rate + self.per_row_latency)
+        else:
+            batch_size = self.min_batch_size
+        self.batch_size = int(min(max(batch_size, self.min_batch_size), self.max_batch_size))
+        self.flush_interval = max(self.freshness_target - self.predicted_latency(self.batch_size), 0.01)
+
+    def should_flush(self, queue_size: int, age: float) -> bool:
+        return queue_size >= self.batch_size or (queue_size > 0 and age >= self.flush_interval)
+
+    def metrics(self) -> dict:
+        return {
+            'table': self.table_name,
+            'arrival_rate': self.arrival_rate,
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval,
+            'base_latency': self.base_latency,
+            'per_row_latency': self.per_row_latency,
+            'rows_per_insert': self.rows_per_insert,
+            'inserts': self.inserts,
+            'staleness': self.staleness,
+            'max_staleness': self.max_staleness,
+        }
@@ -0,0 +1,182 @@
+from datetime import datetime, timezone
+import numpy as np
+import ciso8601
+
+'''
+Columnar replacement for the per-symbol `asyncio.Queue` of dicts feeding the writers of
+the spot and perps pipelines.
+
+Rows are copied into preallocated typed NumPy arrays when they are put, so a buffered
+order book snapshot costs ~500 bytes (60 float64 levels, two int64 timestamps and an
+exchange code) instead of a 63-key dict, and the writers take contiguous blocks of rows.
+'''
+
+# column kinds
+FLOAT = 'float' # float64, None is stored as NaN
+TIMESTAMP = 'timestamp' # ISO 8601 string, datetime or epoch milliseconds, stored as int64 ns since epoch (UTC)
+CATEGORY = 'category' # few distinct values (exchange, side), stored as int16 codes
+INT = 'int' # int64
+OBJECT = 'object' # anything else (trade ids)
+
+NAT = np.iinfo(np.int64).min
+UTC = timezone.utc
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+def to_ns(value: str | datetime | int | float | None) -> int:
+    if value is None:
+        return NAT
+    if isinstance(value, (int, float)):
+        # epoch milliseconds (ccxt)
+        return int(value * 1_000_000)
+    if isinstance(value, str):
+        value = ciso8601.parse_datetime(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    delta = value - EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1_000
+
+class ColumnarBatch:
+    """Contiguous block of rows drained from a `ColumnarBuffer`."""
+
+    def __init__(self, buffer: 'ColumnarBuffer', count: int, floats: np.ndarray, timestamps: np.ndarray,
+                 codes: np.ndarray, ints: np.ndarray, objects: np.ndarray) -> None:
+        self.buffer = buffer
+        self.count = count
+        self.floats = floats
+        self.timestamps = timestamps
+        self.codes = codes
+        self.ints = ints
+        self.objects = objects
+
+    def __len__(self) -> int:
+        return self.count
+
+    def records(self) -> list[list]:
+        """Rows in the buffer's column order, with Python values (NaN -> None, UTC datetimes,
+        timezone aware unless the buffer was created with `tz_aware=False`)."""
+        buffer = self.buffer
+        out = np.empty((self.count, len(buffer.columns)), dtype=object)
+
+        if buffer.float_index:
+            floats = self.floats.astype(object)
+            floats[np.isnan(self.floats)] = None
+            out[:, buffer.float_index] = floats
+        if buffer.timestamp_index:
+            # NaT converts to None
+            naive = self.timestamps.view('datetime64[ns]').astype('datetime64[us]').tolist()
+            if buffer.tz_aware:
+                naive = [
+                    [None if value is None else value.replace(tzinfo=UTC) for value in row]
+                    for row in naive
+                ]
+            out[:, buffer.timestamp_index] = naive
+        for i, (index, categories) in enumerate(zip(buffer.category_index, buffer.categories)):
+            out[:, index] = np.array(categories, dtype=object)[self.codes[:, i]]
+        if buffer.int_index:
+            out[:, buffer.int_index] = self.ints
+        if buffer.object_index:
+            out[:, buffer.object_index] = self.objects
+
+        return out.tolist()
+
+class ColumnarBuffer:
+    """Growable columnar buffer of rows with the producer side of `asyncio.Queue`.
+
+    `schema` maps the columns, in insert order, to their kind. Producers keep calling
+    `put` / `put_nowait` with dicts (extra keys are ignored), writers call `drain(n)`
+    to take the oldest `n` rows as a `ColumnarBatch`.
+
+    `tz_aware` selects aware (`timestamptz` columns) or naive UTC datetimes (`timestamp` columns).
+    """
+
+    def __init__(self, schema: dict[str, str], capacity: int = 1024, tz_aware: bool = True) -> None:
+        self.columns = list(schema)
+        self.capacity = capacity
+        self.tz_aware = tz_aware
+        self.size = 0
+
+        def of_kind(kind: str) -> tuple[list[str], list[int]]:
+            names = [column for column in self.columns if schema[column] == kind]
+            return names, [self.columns.index(column) for column in names]
+
+        self.float_columns, self.float_index = of_kind(FLOAT)
+        self.timestamp_columns, self.timestamp_index = of_kind(TIMESTAMP)
+        self.category_columns, self.category_index = of_kind(CATEGORY)
+        self.int_columns, self.int_index = of_kind(INT)
+        self.object_columns, self.object_index = of_kind(OBJECT)
+
+        unknown = set(schema.values()) - {FLOAT, TIMESTAMP, CATEGORY, INT, OBJECT}
+        assert not unknown, f'Unknown column kinds {unknown}'
+
+        # per category column, values by code and codes by value
+        self.categories: list[list] = [[] for _ in self.category_columns]
+        self.category_codes: list[dict] = [{} for _ in self.category_columns]
+
+        self.floats = np.empty((capacity, len(self.float_columns)))
+        self.timestamps = np.empty((capacity, len(self.timestamp_columns)), dtype=np.int64)
+        self.codes = np.empty((capacity, len(self.category_columns)), dtype=np.int16)
+        self.ints = np.empty((capacity, len(self.int_columns)), dtype=np.int64)
+        self.objects = np.empty((capacity, len(self.object_columns)), dtype=object)
+
+    def _code(self, i: int, value) -> int:
+        codes = self.category_codes[i]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.categories[i])
+            self.categories[i].append(value)
+        return code
+
+    def _grow(self) -> None:
+        self.capacity *= 2
+        for name in ('floats', 'timestamps', 'codes', 'ints', 'objects'):
+            old: np.ndarray = getattr(self, name)
+            new = np.empty((self.capacity, old.shape[1]), dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def put_nowait(self, item: dict) -> None:
+        if self.size == self.capacity:
+            self._grow()
+        n = self.size
+
+        if self.float_columns:
+            # None becomes NaN
+            self.floats[n] = [item[column] for column in self.float_columns]
+        if self.timestamp_columns:
+            self.timestamps[n] = [to_ns(item[column]) for column in self.timestamp_columns]
+        if self.category_columns:
+            self.codes[n] = [self._code(i, item[column]) for i, column in enumerate(self.category_columns)]
+        if self.int_columns:
+            self.ints[n] = [item[column] for column in self.int_columns]
+        for i, column in enumerate(self.object_columns):
+            self.objects[n, i] = item[column]
+
+        self.size += 1
+
+    async def put(self, item: dict) -> None:
+        # never full, the buffer grows instead
+        self.put_nowait(item)
+
+    def qsize(self) -> int:
+        return self.size
+
+    def empty(self) -> bool:
+        return self.size == 0
+
+    def full(self) -> bool:
+        return False
+
+    def drain(self, n: int | None = None) -> ColumnarBatch:
+        """Removes the oldest `n` rows (all of them by default) and returns them."""
+        count = self.size if n is None else min(n, self.size)
+        arrays = [
+            array[:count].copy()
+            for array in (self.floats, self.timestamps, self.codes, self.ints, self.objects)
+        ]
+        rest = self.size - count
+        if rest:
+            for array in (self.floats, self.timestamps, self.codes, self.ints, self.objects):
+                array[:rest] = array[count:self.size]
+        self.objects[rest:self.size] = None # release the references
+        self.size = rest
+        return ColumnarBatch(self, count, *arrays)
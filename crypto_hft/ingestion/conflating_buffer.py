@@ -0,0 +1,58 @@
+import asyncio
+from typing import Iterable
+from crypto_hft.ingestion.columnar_buffer import ColumnarBuffer
+
+'''
+Latest-value buffer for full book snapshots (ccxt.pro `watch_order_book` returns the whole
+current book on every update): intermediate books are overwritten instead of queued, and
+`sample_periodically` copies the latest book of each key into the buffer at a fixed cadence.
+The writers drain it like any `ColumnarBuffer`, so stored books are at most one per key and
+interval, and memory and insert load stay bounded during bursts.
+'''
+
+class ConflatingBuffer(ColumnarBuffer):
+    """`ColumnarBuffer` whose producers only replace the latest row of their `key` (the
+    exchange by default), rows enter the buffer when `sample()` is called."""
+
+    def __init__(self, schema: dict[str, str], key: str = 'exchange', capacity: int = 1024, tz_aware: bool = True) -> None:
+        super().__init__(schema, capacity, tz_aware)
+        self.key = key
+        self.latest: dict = {}
+        self.received = 0
+        self.conflated = 0
+        self.sampled = 0
+
+    def put_nowait(self, item: dict) -> None:
+        self.received += 1
+        if item[self.key] in self.latest:
+            self.conflated += 1
+        self.latest[item[self.key]] = item
+
+    def sample(self) -> int:
+        """Copies the rows updated since the last sample into the buffer, returns their number."""
+        latest, self.latest = self.latest, {}
+        for item in latest.values():
+            super().put_nowait(item)
+        self.sampled += len(latest)
+        return len(latest)
+
+    def metrics(self) -> dict:
+        return {'received': self.received, 'conflated': self.conflated, 'sampled': self.sampled}
+
+def sample_all(buffers: Iterable[ColumnarBuffer]) -> int:
+    """Samples the conflating `buffers` (e.g. a last time on shutdown), returns the number of rows."""
+    return sum(buffer.sample() for buffer in buffers if isinstance(buffer, ConflatingBuffer))
+
+async def sample_periodically(buffers: Iterable[ColumnarBuffer], interval: float, shutdown_event: asyncio.Event) -> None:
+    """Samples the conflating `buffers` every `interval` seconds, on a fixed grid."""
+    conflating = [buffer for buffer in buffers if isinstance(buffer, ConflatingBuffer)]
+    loop = asyncio.get_running_loop()
+    next_sample = loop.time()
+    while not shutdown_event.is_set():
+        next_sample += interval
+        delay = next_sample - loop.time()
+        if delay < 0:
+            # fell behind by more than an interval, skip the missed samples
+            next_sample, delay = loop.time(), 0
+        await asyncio.sleep(delay)
+        sample_all(conflating)
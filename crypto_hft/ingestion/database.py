@@ -0,0 +1,43 @@
+import logging
+import asyncpg # type: ignore
+from crypto_hft.utils.config import Config
+
+
+class PostgreSQLDatabase:
+    """Handles async PostgreSQL connections and batch inserts."""
+    
+    def __init__(self, config: Config):
+        self.pool = None
+        self.config = config
+
+    async def connect(self):
+        self.pool = await asyncpg.create_pool(
+            host=self.config.postgres_host,
+            user=self.config.postgres_user,
+            password=self.config.postgres_password,
+            database=self.config.postgres_database,
+            port=self.config.postgres_port,
+            min_size=1,
+            max_size=self.config.postgres_pool_size
+        )
+        logging.info("✅ Async PostgreSQL Connection Established")
+
+    async def close(self):
+        await self.pool.close()
+        logging.info("[!] PostgreSQL connection closed.")
+
+    async def insert_batch(self, table_name: str, batch_data: list, columns: list):
+        """Insert data asynchronously using asyncpg."""
+        assert self.pool is not None, 'PostgreSQL connection pool is not initialized.'
+        if not batch_data:
+            return
+
+        placeholders = ", ".join(f"${i+1}" for i in range(len(columns)))
+        col_names = ", ".join(columns)
+        query = f"INSERT INTO {table_name} ({col_names}) VALUES ({placeholders})"
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(query, batch_data)
+
+        logging.info(f"[✅] Inserted {len(batch_data)} rows into {table_name}")
@@ -0,0 +1,326 @@
+import asyncio
+import logging
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable, Sequence
+
+import pandas as pd
+
+from crypto_hft.utils.config import Config
+
+logging.basicConfig(level=logging.INFO)
+
+'''
+Fallback storage for the batches that could not be inserted into PostgreSQL.
+
+Failed batches are written as parquet to a local staging directory by a thread pool and
+queued for upload to GCS by a background thread, so the event loop never waits on disk or
+network while the database is down. Files that cannot be uploaded (GCS down, no bucket
+configured) stay staged and are retried. `FallbackReplayer` imports the staged and uploaded
+files back into PostgreSQL once it accepts inserts again.
+
+Files are named `{data_type}/{symbol}/{timestamp}.parquet`, in the bucket and in the staging
+directory.
+'''
+
+
+class LocalDirectoryBucket:
+    """Stand-in for `google.cloud.storage.Bucket` backed by a local directory, used when
+    `GCS_BUCKET` is a `file://` path (tests, local runs)."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.name = str(self.root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def blob(self, name: str) -> "LocalBlob":
+        return LocalBlob(self, name)
+
+    def list_blobs(self, prefix: str = "") -> list["LocalBlob"]:
+        return [
+            LocalBlob(self, path.relative_to(self.root).as_posix())
+            for path in sorted(self.root.rglob("*.parquet"))
+            if path.relative_to(self.root).as_posix().startswith(prefix)
+        ]
+
+
+class LocalBlob:
+    def __init__(self, bucket: LocalDirectoryBucket, name: str):
+        self.bucket = bucket
+        self.name = name
+        self.path = bucket.root / name
+
+    def upload_from_filename(self, filename: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        shutil.copyfile(filename, tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def download_to_filename(self, filename: str):
+        shutil.copyfile(self.path, filename)
+
+    def delete(self):
+        self.path.unlink()
+
+
+def connect_bucket(bucket_name: str):
+    if bucket_name.startswith("file://"):
+        return LocalDirectoryBucket(bucket_name[len("file://"):])
+    from google.cloud import storage # type: ignore
+    return storage.Client().bucket(bucket_name)
+
+
+def parse_path(path: str) -> tuple[str, str]:
+    """(data_type, symbol) of a fallback file."""
+    parts = Path(path).parts
+    return parts[-3], parts[-2]
+
+
+class GCSFallbackWriter:
+    def __init__(
+        self,
+        bucket_name: str | None,
+        staging_dir: str = Config.gcs_fallback_staging_dir,
+        workers: int = Config.gcs_fallback_workers,
+        retry_interval: float = Config.gcs_fallback_retry_interval,
+        bucket=None,
+    ):
+        self.bucket_name = bucket_name
+        self.bucket = bucket
+        self.staging_dir = Path(staging_dir)
+        self.retry_interval = retry_interval
+
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gcs-fallback")
+        self.upload_queue: queue.Queue[str | None] = queue.Queue()
+        self.closed = threading.Event()
+
+        # staged files not uploaded yet, shared with the replayer
+        self.lock = threading.Lock()
+        self.pending: set[str] = set()
+        self.uploading: str | None = None
+
+        self.staged = 0
+        self.uploaded = 0
+        self.upload_failures = 0
+
+        # files left over by a previous run
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self.staging_dir.glob("*/*/*.parquet")):
+            self._enqueue(str(path))
+
+        self.uploader = threading.Thread(target=self._upload_loop, name="gcs-uploader", daemon=True)
+        self.uploader.start()
+
+    def _make_path(self, symbol: str, data_type: str) -> str:
+        now = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S_%f")
+        return f"{data_type}/{symbol}/{now}.parquet"
+
+    def _enqueue(self, local_path: str):
+        with self.lock:
+            self.pending.add(local_path)
+        self.upload_queue.put(local_path)
+
+    def submit(self, symbol: str, data_type: str, columns: list[str], batch_data: Sequence[Sequence]) -> Future:
+        """Stages the batch from the thread pool and queues it for upload, returns immediately."""
+        future = self.executor.submit(self.save, symbol, data_type, columns, batch_data)
+        future.add_done_callback(partial(self._log_save_error, symbol))
+        return future
+
+    @staticmethod
+    def _log_save_error(symbol: str, future: Future):
+        if not future.cancelled() and (error := future.exception()) is not None:
+            logging.error(f"[GCS ❌] Failed to stage fallback for {symbol}: {error}")
+
+    def save(self, symbol: str, data_type: str, columns: list[str], batch_data: Sequence[Sequence]):
+        if not batch_data:
+            return
+
+        # Save using only the columns provided by QueueProcessor
+        df = pd.DataFrame(batch_data, columns=columns)
+        local_path = self.staging_dir / self._make_path(symbol, data_type)
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # written under a temporary name, so that a crash never leaves a truncated file to replay
+        tmp_path = local_path.with_suffix(".tmp")
+        df.to_parquet(tmp_path, engine="pyarrow")
+        os.replace(tmp_path, local_path)
+
+        self.staged += 1
+        logging.warning(f"[GCS 💾] Staged fallback: {local_path} ({len(batch_data)} rows)")
+        self._enqueue(str(local_path))
+
+    @property
+    def has_bucket(self) -> bool:
+        return self.bucket is not None or bool(self.bucket_name)
+
+    def get_bucket(self):
+        if self.bucket is None and self.bucket_name:
+            self.bucket = connect_bucket(self.bucket_name)
+        return self.bucket
+
+    def _upload(self, local_path: str) -> bool:
+        try:
+            bucket = self.get_bucket()
+            gcs_path = Path(local_path).relative_to(self.staging_dir).as_posix()
+            bucket.blob(gcs_path).upload_from_filename(local_path)
+            logging.warning(f"[GCS ✅] Uploaded fallback: gs://{bucket.name}/{gcs_path}")
+            return True
+        except Exception as e:
+            logging.error(f"[GCS ❌] Failed to upload {local_path}, keeping it staged: {e}")
+            return False
+
+    def _upload_loop(self):
+        while True:
+            local_path = self.upload_queue.get()
+            if local_path is None:
+                return
+
+            with self.lock:
+                if local_path not in self.pending:
+                    continue # replayed in the meantime
+                self.uploading = local_path
+
+            # without a bucket the file stays staged for the replayer
+            uploaded = self.has_bucket and self._upload(local_path)
+
+            with self.lock:
+                self.uploading = None
+                if uploaded:
+                    self.pending.discard(local_path)
+            if uploaded:
+                self.uploaded += 1
+                os.remove(local_path)
+            elif self.has_bucket:
+                self.upload_failures += 1
+                # retry later, or at the next start if shutting down
+                if not self.closed.wait(self.retry_interval):
+                    self.upload_queue.put(local_path)
+
+    def claim_staged(self) -> list[str]:
+        """Takes the staged files not being uploaded away from the uploader."""
+        with self.lock:
+            paths = sorted(path for path in self.pending if path != self.uploading)
+            self.pending.difference_update(paths)
+        return paths
+
+    def release(self, paths: list[str]):
+        """Gives back claimed files that could not be replayed."""
+        for path in paths:
+            self._enqueue(path)
+
+    def metrics(self) -> dict:
+        return {
+            "staged": self.staged,
+            "uploaded": self.uploaded,
+            "upload_failures": self.upload_failures,
+            "pending": len(self.pending),
+        }
+
+    def close(self):
+        """Waits for the batches being staged, then stops the uploader (files still pending stay staged)."""
+        self.executor.shutdown(wait=True)
+        self.closed.set()
+        self.upload_queue.put(None)
+        self.uploader.join()
+
+
+def read_records(path: str) -> tuple[list[str], list[tuple]]:
+    """Columns and rows of a fallback file, with Python values for asyncpg."""
+    df = pd.read_parquet(path, engine="pyarrow")
+    columns = list(df.columns)
+    values = {}
+    for column in columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values[column] = [None if pd.isna(ts) else ts.to_pydatetime() for ts in series]
+        else:
+            values[column] = [None if pd.isna(v) else v for v in series.astype(object)]
+    return columns, list(zip(*(values[column] for column in columns)))
+
+
+class FallbackReplayer:
+    """
+    Imports the fallback files back into PostgreSQL: the files still staged locally first,
+    then the ones uploaded to the bucket. A file is deleted once its rows are inserted; the
+    pass stops at the first failed insert (the database is still down) and is retried every
+    `interval` seconds.
+    """
+
+    def __init__(
+        self,
+        db,
+        writer: GCSFallbackWriter,
+        table_name_fn: Callable[[str, str], str],
+        interval: float = Config.gcs_fallback_replay_interval,
+    ):
+        self.db = db
+        self.writer = writer
+        self.table_name_fn = table_name_fn
+        self.interval = interval
+        self.replayed_files = 0
+        self.replayed_rows = 0
+
+    async def insert_file(self, path: str, name: str):
+        data_type, symbol = parse_path(name)
+        columns, rows = await asyncio.to_thread(read_records, path)
+        await self.db.insert_batch(self.table_name_fn(data_type, symbol), rows, columns)
+        self.replayed_files += 1
+        self.replayed_rows += len(rows)
+        logging.info(f"[♻️] Replayed {len(rows)} fallback rows of {symbol} from {name}")
+
+    async def replay_staged(self) -> bool:
+        paths = self.writer.claim_staged()
+        for i, path in enumerate(paths):
+            try:
+                await self.insert_file(path, path)
+            except Exception as e:
+                logging.warning(f"[♻️] Replay of {path} failed, retrying later: {e}")
+                self.writer.release(paths[i:])
+                return False
+            await asyncio.to_thread(os.remove, path)
+        return True
+
+    async def replay_bucket(self) -> bool:
+        if not self.writer.has_bucket:
+            return True
+        bucket = await asyncio.to_thread(self.writer.get_bucket)
+        blobs = await asyncio.to_thread(lambda: list(bucket.list_blobs()))
+        download_dir = self.writer.staging_dir / ".replay"
+        download_dir.mkdir(exist_ok=True)
+
+        for blob in blobs:
+            if not blob.name.endswith(".parquet"):
+                continue
+            local_path = str(download_dir / Path(blob.name).name)
+            try:
+                await asyncio.to_thread(blob.download_to_filename, local_path)
+                await self.insert_file(local_path, blob.name)
+            except Exception as e:
+                logging.warning(f"[♻️] Replay of gs://{bucket.name}/{blob.name} failed, retrying later: {e}")
+                return False
+            finally:
+                if os.path.exists(local_path):
+                    os.remove(local_path)
+            await asyncio.to_thread(blob.delete)
+        return True
+
+    async def replay_once(self) -> bool:
+        """One pass over the fallback files, returns whether all of them were replayed."""
+        return await self.replay_staged() and await self.replay_bucket()
+
+    async def run(self, shutdown_event: asyncio.Event):
+        while not shutdown_event.is_set():
+            try:
+                await self.replay_once()
+            except Exception as e:
+                logging.error(f"[♻️] Fallback replay error: {e}")
+            try:
+                await asyncio.wait_for(shutdown_event.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+from crypto_hft.utils.config import Config
+from crypto_hft.ingestion.database import PostgreSQLDatabase
+from crypto_hft.ingestion.columnar_buffer import ColumnarBuffer
+from crypto_hft.ingestion.batch_controller import AdaptiveBatchController
+from crypto_hft.ingestion.writer_scheduler import WriterScheduler
+from crypto_hft.ingestion.gcs_fallback_writer import GCSFallbackWriter
+
+if TYPE_CHECKING:
+    from crypto_hft.spot.websocket_streamer import WebsocketStreamer
+
+
+class QueueProcessor:
+    """Handles queue processing and batch insertion into PostgreSQL.
+
+    Each (table, symbol) buffer is drained by its own task, in batches chosen by an
+    `AdaptiveBatchController` and inserted through a `WriterScheduler` sharing the pool.
+    Batches that cannot be inserted go to the `fallback` writer, if any. Pipelines name
+    their tables by overriding `table_name`.
+    """
+
+    def __init__(self, db: PostgreSQLDatabase, config: Config | type[Config], fallback: GCSFallbackWriter | None = None):
+        self.db = db
+        self.config = config
+        self.fallback = fallback
+        self.shutdown_event = asyncio.Event()
+        self.queue_thresholds = {
+            "orderbook": config.orderbook_queue_threshold,
+            "trade": config.trade_queue_threshold,
+            "bars": config.bar_queue_threshold,
+            "bbo": config.bbo_queue_threshold,
+        }
+        self.batch_controllers: dict[str, AdaptiveBatchController] = {}
+        self.scheduler = WriterScheduler(db)
+        self.tables: dict[str, tuple[str, str]] = {} # table -> (symbol, table prefix)
+
+    def table_name(self, table_prefix: str, symbol: str) -> str:
+        return f"{table_prefix}_{symbol.lower()}"
+
+    async def process_queue(self, symbol: str, queue: ColumnarBuffer, table_prefix: str):
+        table_name = self.table_name(table_prefix, symbol)
+        # the table threshold is only the initial batch size, the controller adapts it
+        controller = AdaptiveBatchController(table_name, self.queue_thresholds[table_prefix])
+        self.batch_controllers[table_name] = controller
+        self.tables[table_name] = (symbol, table_prefix)
+        self.scheduler.register(table_name, queue, WriterScheduler.table_weight(table_prefix, symbol))
+
+        last_poll_time = time.time()
+        last_size = 0
+        oldest_row_time = None
+
+        while not self.shutdown_event.is_set():
+            try:
+                now = time.time()
+                queue_size = queue.qsize()
+                controller.record_arrivals(queue_size - last_size, now - last_poll_time)
+                last_poll_time, last_size = now, queue_size
+                if queue_size and oldest_row_time is None:
+                    oldest_row_time = now
+
+                if oldest_row_time is not None and controller.should_flush(queue_size, now - oldest_row_time):
+                    batch_data = queue.drain(controller.batch_size).records()
+                    last_size = queue.qsize()
+
+                    try:
+                        # the insert waits for its turn in the shared pool, ordered by weight and deadline
+                        deadline = oldest_row_time + controller.freshness_target
+                        latency = await self.scheduler.write(table_name, batch_data, queue.columns, deadline)
+                        controller.record_insert(len(batch_data), latency, time.time() - latency - oldest_row_time)
+                    except Exception as e:
+                        logging.error(f"[❌] Insert Error for {symbol}: {e}")
+                        if self.fallback is not None:
+                            logging.warning(f"[⏳] Fallback to GCS for {symbol}...")
+                            # staged and uploaded from the writer's threads, the loop keeps draining the queue
+                            self.fallback.submit(symbol, table_prefix, queue.columns, batch_data)
+
+                    # leftover rows are at least as old, so they are flushed on the next poll if overdue
+                    if not last_size:
+                        oldest_row_time = None
+
+                await asyncio.sleep(controller.poll_interval)
+            except Exception as e:
+                logging.error(f"[❌] Queue Processing Error for {symbol}: {e}")
+                await asyncio.sleep(controller.poll_interval)
+
+    async def process_queues(self, queues: dict[str, ColumnarBuffer], table_prefix: str):
+        tasks = [asyncio.create_task(self.process_queue(symbol, queue, table_prefix)) for symbol, queue in queues.items()]
+        await asyncio.gather(*tasks)
+
+    def metrics(self) -> list[dict]:
+        """Current decisions and observations of the batch controller of every table."""
+        return [controller.metrics() for controller in self.batch_controllers.values()]
+
+    async def report_metrics(self, websocket_streamer: 'WebsocketStreamer | None' = None):
+        """Periodically logs the batching metrics and sends them to the `writer_metrics` streamer channel."""
+        while not self.shutdown_event.is_set():
+            await asyncio.sleep(self.config.batch_metrics_interval)
+            metrics = self.metrics()
+            if not metrics:
+                continue
+
+            busiest = max(metrics, key=lambda m: m['arrival_rate'])
+            stalest = max(metrics, key=lambda m: m['staleness'])
+            logging.info(
+                f"[📊] {len(metrics)} tables, busiest {busiest['table']} ({busiest['arrival_rate']:.0f} rows/s, "
+                f"batches of {busiest['batch_size']}), stalest {stalest['table']} ({stalest['staleness']:.2f}s)"
+            )
+            if websocket_streamer is not None:
+                websocket_streamer.send_update('writer_metrics', {
+                    'type': 'writer_metrics',
+                    'tables': metrics,
+                    'scheduler': self.scheduler.metrics(),
+                })
+
+    async def flush(self):
+        """Writes the rows left in the buffers in one batch per table, once the producers and
+        writers stopped (on shutdown). Batches that cannot be inserted go to the fallback."""
+        for table_name, queue in self.scheduler.buffers.items():
+            if queue.empty():
+                continue
+            batch_data = queue.drain().records()
+            try:
+                await self.db.insert_batch(table_name, batch_data, queue.columns)
+            except Exception as e:
+                logging.error(f"[❌] Final insert error for {table_name}: {e}")
+                if self.fallback is not None:
+                    symbol, table_prefix = self.tables[table_name]
+                    self.fallback.submit(symbol, table_prefix, queue.columns, batch_data)
+
+    async def shutdown(self):
+        logging.info("[!] Stopping queue processor...")
+        self.shutdown_event.set()
+        if self.fallback is not None:
+            # flush the batches still being staged
+            await asyncio.to_thread(self.fallback.close)
@@ -0,0 +1,31 @@
+from crypto_hft.utils.config import Config
+from crypto_hft.ingestion.columnar_buffer import FLOAT, TIMESTAMP, CATEGORY, INT, OBJECT
+
+'''
+Normalized events shared by the spot and perps pipelines: the columns of every table, in
+insert order, with their kind in the `ColumnarBuffer`. Missing book levels are None (NULL).
+'''
+
+BOOK_LEVEL_COLUMNS = [
+    f"{side}_{i}_{field}"
+    for side, field in (("bid", "sz"), ("bid", "px"), ("ask", "sz"), ("ask", "px"))
+    for i in range(Config.orderbook_levels)
+]
+
+ORDER_BOOK_SCHEMA = {
+    "exchange": CATEGORY, "timestamp": TIMESTAMP, "local_timestamp": TIMESTAMP,
+    **{column: FLOAT for column in BOOK_LEVEL_COLUMNS},
+}
+TRADE_SCHEMA = {
+    "exchange": CATEGORY, "trade_id": OBJECT, "price": FLOAT, "amount": FLOAT, "side": CATEGORY,
+    "timestamp": TIMESTAMP, "local_timestamp": TIMESTAMP,
+}
+BAR_SCHEMA = {
+    "exchange": CATEGORY, "resolution": CATEGORY, "timestamp": TIMESTAMP, "local_timestamp": TIMESTAMP,
+    "open": FLOAT, "high": FLOAT, "low": FLOAT, "close": FLOAT,
+    "volume": FLOAT, "quote_volume": FLOAT, "vwap": FLOAT, "buy_volume": FLOAT, "sell_volume": FLOAT, "trade_count": INT,
+}
+BBO_SCHEMA = {
+    "exchange": CATEGORY, "timestamp": TIMESTAMP, "local_timestamp": TIMESTAMP,
+    "bid_px": FLOAT, "bid_sz": FLOAT, "ask_px": FLOAT, "ask_sz": FLOAT, "mid": FLOAT, "spread": FLOAT,
+}
@@ -0,0 +1,132 @@
+import asyncio
+import math
+import time
+from typing import TYPE_CHECKING
+from crypto_hft.utils.config import Config
+from crypto_hft.ingestion.columnar_buffer import ColumnarBuffer
+
+if TYPE_CHECKING:
+    from crypto_hft.ingestion.database import PostgreSQLDatabase
+
+class WriteJob:
+    __slots__ = ('table_name', 'rows', 'columns', 'deadline', 'start_tag', 'future')
+
+    def __init__(self, table_name: str, rows: list, columns: list[str], deadline: float, start_tag: float) -> None:
+        self.table_name = table_name
+        self.rows = rows
+        self.columns = columns
+        self.deadline = deadline
+        self.start_tag = start_tag
+        self.future: asyncio.Future[float] = asyncio.get_running_loop().create_future()
+
+class WriterScheduler:
+    """Shares the connection pool between the tables' writers.
+
+    Batches are started in start-time fair queueing order, with each table charged its rows
+    divided by its weight, so a hot table gets its weighted share without starving the small
+    tables. Batches within `Config.writer_urgent_margin` of their deadline go first, earliest
+    deadline first. The number of concurrent inserts follows the total backlog, between
+    `Config.writer_min_concurrency` and the pool size.
+
+    Each table has at most one batch pending or running (`write` waits for the insert), so
+    the rows of a table are committed in order.
+    """
+
+    def __init__(
+        self,
+        db: 'PostgreSQLDatabase',
+        min_concurrency: int = Config.writer_min_concurrency,
+        max_concurrency: int = Config.postgres_pool_size,
+        rows_per_connection: int = Config.writer_rows_per_connection,
+        urgent_margin: float = Config.writer_urgent_margin
+    ) -> None:
+        self.db = db
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.rows_per_connection = rows_per_connection
+        self.urgent_margin = urgent_margin
+
+        self.buffers: dict[str, ColumnarBuffer] = {}
+        self.weights: dict[str, float] = {}
+        self.pending: dict[str, WriteJob] = {}
+        self.finish_tags: dict[str, float] = {}
+        self.virtual_time = 0.
+        self.running = 0
+        self.tasks: set[asyncio.Task] = set()
+
+        self.rows_written: dict[str, int] = {}
+        self.urgent_jobs = 0
+        self.missed_deadlines = 0
+
+    @staticmethod
+    def table_weight(table_prefix: str, symbol: str) -> float:
+        return Config.writer_table_weights.get(table_prefix, 1.) * Config.writer_symbol_weights.get(symbol, 1.)
+
+    def register(self, table_name: str, queue: ColumnarBuffer, weight: float = 1.) -> None:
+        """Registers the buffer of a table, its backlog counts towards the concurrency."""
+        self.buffers[table_name] = queue
+        self.weights[table_name] = weight
+        self.rows_written[table_name] = 0
+
+    def backlog(self) -> int:
+        return sum(len(job.rows) for job in self.pending.values()) + sum(queue.qsize() for queue in self.buffers.values())
+
+    def target_concurrency(self) -> int:
+        wanted = math.ceil(self.backlog() / self.rows_per_connection)
+        return min(max(wanted, self.min_concurrency), self.max_concurrency)
+
+    async def write(self, table_name: str, rows: list, columns: list[str], deadline: float) -> float:
+        """Inserts `rows` once scheduled, returns the insert latency in seconds."""
+        assert table_name not in self.pending, f'{table_name} already has a pending batch'
+        start_tag = max(self.virtual_time, self.finish_tags.get(table_name, 0.))
+        self.finish_tags[table_name] = start_tag + len(rows) / self.weights.get(table_name, 1.)
+
+        job = WriteJob(table_name, rows, columns, deadline, start_tag)
+        self.pending[table_name] = job
+        self.dispatch()
+        return await job.future
+
+    def next_job(self) -> WriteJob:
+        now = time.time()
+        urgent = [job for job in self.pending.values() if job.deadline - now <= self.urgent_margin]
+        if urgent:
+            self.urgent_jobs += 1
+            return min(urgent, key=lambda job: job.deadline)
+        return min(self.pending.values(), key=lambda job: job.start_tag)
+
+    def dispatch(self) -> None:
+        while self.pending and self.running < self.target_concurrency():
+            job = self.next_job()
+            del self.pending[job.table_name]
+            self.virtual_time = max(self.virtual_time, job.start_tag)
+            self.running += 1
+            task = asyncio.create_task(self.run_job(job))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run_job(self, job: WriteJob) -> None:
+        start = time.perf_counter()
+        try:
+            await self.db.insert_batch(job.table_name, job.rows, job.columns)
+            self.rows_written[job.table_name] += len(job.rows)
+            if time.time() > job.deadline:
+                self.missed_deadlines += 1
+            if not job.future.done():
+                job.future.set_result(time.perf_counter() - start)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            self.running -= 1
+            self.dispatch()
+
+    def metrics(self) -> dict:
+        return {
+            'running': self.running,
+            'target_concurrency': self.target_concurrency(),
+            'pending': len(self.pending),
+            'backlog': self.backlog(),
+            'urgent_jobs': self.urgent_jobs,
+            'missed_deadlines': self.missed_deadlines,
+            'rows_written': self.rows_written,
+        }
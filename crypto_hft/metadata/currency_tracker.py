@@ -1,16 +1,17 @@
 import asyncio
 import logging
 import time
-from crypto_hft.utils.config import Config
+from crypto_hft.utils.config import get_config
 from crypto_hft.metadata.fetcher import fetch_exchange_metadata
 from crypto_hft.metadata.inserter import CurrencyMetadataInserter
 from crypto_hft.metadata.differ import compare_snapshots
+from crypto_hft.utils.market_catalog import MarketCatalog
+from crypto_hft.utils.rate_limiter import rate_limiter
 
-config = Config()
 EXCHANGES = ["binance", "poloniex"]
 
 async def main():
-    config = Config()
+    config = get_config()
     db = CurrencyMetadataInserter({
         "host": config.postgres_host,
         "port": config.postgres_port,
@@ -19,12 +20,17 @@ async def main():
         "database": config.postgres_database
     })
     await db.connect()
+    catalog = await MarketCatalog(EXCHANGES).load()
+    metrics_task = asyncio.create_task(rate_limiter.report_metrics()) # noqa: F841 # referenced so that it is not garbage collected
 
     while True:
         logging.info("\n🔁 Starting currency metadata cycle...")
+        stale = catalog.stale_exchanges()
+        if stale:
+            await catalog.refresh(stale)
         for exchange_id in EXCHANGES:
             try:
-                currencies = await fetch_exchange_metadata(exchange_id)
+                currencies = await fetch_exchange_metadata(exchange_id, catalog)
                 for ccy in currencies:
                     old = await db.get_latest_snapshot(ccy.exchange, ccy.ccy)
                     new_snapshot_id = await db.insert_snapshot(ccy)
@@ -1,21 +1,22 @@
 import ccxt.pro as ccxt # type: ignore
 import logging
-from crypto_hft.utils.config import Config
+from crypto_hft.utils.config import get_config
+from crypto_hft.utils.rate_limiter import rate_limiter
 from crypto_hft.metadata.models import ExchangeCurrency, Network, Limit
 
-config = Config()
-
-async def fetch_exchange_metadata(exchange_id: str) -> list[ExchangeCurrency]:
+async def fetch_exchange_metadata(exchange_id: str, catalog=None) -> list[ExchangeCurrency]:
+    config = get_config()
     try:
         logging.info(f"[🔍] Fetching metadata from {exchange_id}...")
 
-        exchange = ccxt.binance({
-            'enableRateLimit': True,
+        exchange = rate_limiter.create(ccxt, exchange_id, {
             'apiKey': config.binance_api_key,
-            'secret': config.binance_secret,
-        }) if exchange_id == "binance" else getattr(ccxt, exchange_id)({'enableRateLimit': True})
+            'secret': config.binance_api_secret, # type: ignore
+        } if exchange_id == "binance" else None)
 
-        await exchange.load_markets()
+        # the markets come from the MarketCatalog when it has them
+        if catalog is None or not catalog.set_markets(exchange):
+            await exchange.load_markets()
         currencies = await exchange.fetch_currencies()
 
         if not isinstance(currencies, dict):
@@ -1,12 +1,7 @@
-import ccxt.async_support as ccxt
 import logging
 import json
 from typing import Literal
 from datetime import datetime
-from crypto_hft.utils.config import Config
-
-config = Config()
-config = Config()
 
 class Limit():
     def __init__(self, type: str, min: float, max: float):
@@ -1,2 +1,25 @@
-from .fair_value_model import FairValueModel as FairValueModel
-from .cross_exchange_arb import CrossExchangeArb as CrossExchangeArb
\ No newline at end of file
+"""Trading models.
+
+The models are imported lazily so that importing `crypto_hft.models` (e.g. from the
+dashboard or a CLI tool) does not pull polars/statsmodels until a model is used.
+"""
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .fair_value_model import FairValueModel as FairValueModel
+    from .cross_exchange_arb import CrossExchangeArb as CrossExchangeArb
+
+_LAZY_IMPORTS = {
+    'FairValueModel': '.fair_value_model',
+    'CrossExchangeArb': '.cross_exchange_arb',
+}
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        from importlib import import_module
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = list(_LAZY_IMPORTS)
@@ -38,6 +38,20 @@ class LastQuote():
         # recompute the midprice
         self.midprice = (self.best_bid[0] + self.best_ask[0]) / 2
 
+    def update_bbo(self, best_bid: tuple[float, float], best_ask: tuple[float, float]) -> None:
+        """Replace both sides of the quote at once, e.g. from a BBO event.
+
+        Parameters
+        ----------
+        best_bid : tuple[float, float]
+            The (price, amount) at the best bid.
+        best_ask : tuple[float, float]
+            The (price, amount) at the best ask.
+        """
+        self.best_bid = best_bid
+        self.best_ask = best_ask
+        self.midprice = (best_bid[0] + best_ask[0]) / 2
+
     @classmethod
     def empty_quote(cls) -> 'LastQuote':
         """Create an empty LastQuote object with NaN values."""
@@ -88,6 +102,26 @@ class CrossExchangeArb():
         # update the last stored quote
         last_quote_symbol.update(price=price, amount=amount, side_is_bid=side_is_bid)
 
+    def process_bbo_update(self, bbo: dict) -> None:
+        """Process a BBO event from the `bbo_{symbol}` stream (see `BBOTracker`).
+
+        Both sides are updated in one call, missing sides are stored as NaN.
+
+        Parameters
+        ----------
+        bbo : dict
+            The BBO event, with the `symbol`, `exchange`, `bid_px`, `bid_sz`, `ask_px` and `ask_sz` keys.
+        """
+        def _level(px: float | None, sz: float | None) -> tuple[float, float]:
+            return (np.nan, np.nan) if px is None else (px, sz) # type: ignore
+
+        key = (bbo['symbol'].lower(), bbo['exchange'])
+        last_quote = self.price_data.setdefault(key, LastQuote.empty_quote())
+        last_quote.update_bbo(
+            best_bid=_level(bbo['bid_px'], bbo['bid_sz']),
+            best_ask=_level(bbo['ask_px'], bbo['ask_sz'])
+        )
+
     def compute_arbs_for_symbol(self, symbol: str) -> pl.LazyFrame: 
         """Compute the arbitrage in bps when buying on the illiquid exchange and selling on the liquid exchange. 
 
@@ -1,14 +1,15 @@
 import polars as pl
 import numpy as np
-from typing import Literal
+from typing import Literal, TYPE_CHECKING
 import polars.selectors as cs
 from itertools import product
 from loguru import logger
 from pathlib import Path
-from statsmodels.iolib.smpickle import load_pickle # type: ignore
-from statsmodels.regression.linear_model import OLSResults # type: ignore
-import statsmodels.api as sm # type: ignore
-import pandas as pd
+
+if TYPE_CHECKING:
+    # statsmodels and pandas take seconds to import, they are only loaded when the model is used
+    import pandas as pd
+    from statsmodels.regression.linear_model import OLSResults # type: ignore
 
 _bbo_cols_px: dict[str, pl.DataType] = {
     f'{side}_{i}_px': pl.Float64()
@@ -145,9 +146,11 @@ class FairValueModel():
         self.order_book = pl.LazyFrame(schema=_order_book_schema)
         self.trades = pl.LazyFrame(schema=_trades_schema)
 
-        self.model: OLSResults = self.load_model()
+        self.model: 'OLSResults' = self.load_model()
 
     def load_model(self): 
+        from statsmodels.iolib.smpickle import load_pickle # type: ignore
+
         model_path = Path(__file__).parent.joinpath('model.pkl').resolve()
         return load_pickle(model_path)
 
@@ -167,7 +170,9 @@ class FairValueModel():
         ob_update = pl.LazyFrame([order_book_data], schema=_order_book_schema)
         self.order_book = pl.concat([self.order_book, ob_update], how='vertical')
 
-    def run(self) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+    def run(self) -> tuple['pd.DataFrame', 'pd.DataFrame'] | None:
+        import statsmodels.api as sm # type: ignore
+
         signals = self._compute_signals()
 
         if signals is None: 
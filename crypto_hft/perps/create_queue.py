@@ -1,14 +1,21 @@
-from crypto_hft.utils.config import Config
-from normalizers import normalize_symbol
-import asyncio
+from crypto_hft.utils.config import TARGET_TOKENS, Config
+from crypto_hft.ingestion.columnar_buffer import ColumnarBuffer
+from crypto_hft.ingestion.conflating_buffer import ConflatingBuffer
+from crypto_hft.ingestion.schemas import ORDER_BOOK_SCHEMA, TRADE_SCHEMA
+from crypto_hft.perps.normalizers import normalize_symbol
 
-config = Config()
-order_book_queues_perps: dict[str, asyncio.Queue] = {}
-trade_queues_perps: dict[str, asyncio.Queue] = {}
+# the perps tables store naive UTC timestamps
+# order books only keep the latest book of each exchange between samples, trades are lossless
+order_book_queues_perps: dict[str, ColumnarBuffer] = {}
+trade_queues_perps: dict[str, ColumnarBuffer] = {}
 
-for token in config.TARGET_TOKENS:
+for token in TARGET_TOKENS:
     # Use the actual market format you're streaming (e.g., "BTC/USDT:USDT" for perps)
     market = f"{token}/USDT:USDT"
     normalized = normalize_symbol(market)
-    order_book_queues_perps[normalized] = asyncio.Queue()
-    trade_queues_perps[normalized] = asyncio.Queue()
+    order_book_queues_perps[normalized] = (
+        ConflatingBuffer(ORDER_BOOK_SCHEMA, tz_aware=False)
+        if Config.perps_book_sample_interval > 0 else
+        ColumnarBuffer(ORDER_BOOK_SCHEMA, tz_aware=False)
+    )
+    trade_queues_perps[normalized] = ColumnarBuffer(TRADE_SCHEMA, tz_aware=False)
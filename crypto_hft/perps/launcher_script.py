@@ -1,11 +1,13 @@
 import asyncio
 import logging
 import signal
-from crypto_hft.utils.config import Config
+from crypto_hft.utils.config import get_config, Config
 
-from create_queue import order_book_queues_perps, trade_queues_perps
-from streamer import main as run_streamer
-from postgres_utils import PostgreSQLDatabase, QueueProcessor
+from crypto_hft.perps.create_queue import order_book_queues_perps, trade_queues_perps
+from crypto_hft.perps.streamer import main as run_streamer
+from crypto_hft.perps.postgres_utils import PostgreSQLDatabase, QueueProcessor
+from crypto_hft.ingestion.gcs_fallback_writer import FallbackReplayer
+from crypto_hft.ingestion.conflating_buffer import sample_all, sample_periodically
 
 # --- Global state ---
 shutdown_event = asyncio.Event()
@@ -35,7 +37,7 @@ async def main():
     logging.info("[+] Starting Crypto Collector System")
     setup_signal_handlers()
 
-    config = Config()
+    config = get_config()
     db = PostgreSQLDatabase(config)
     await db.connect()
 
@@ -45,13 +47,22 @@ async def main():
     ob_task = asyncio.create_task(processor.batch_insert_order_books(order_book_queues_perps))
     tr_task = asyncio.create_task(processor.batch_insert_trades(trade_queues_perps))
     streamer_task = asyncio.create_task(run_streamer())
+    replayer = FallbackReplayer(db, processor.fallback, processor.table_name)
+    replay_task = asyncio.create_task(replayer.run(shutdown_event))
 
-    running_tasks.extend([ob_task, tr_task, streamer_task])
+    running_tasks.extend([ob_task, tr_task, streamer_task, replay_task])
+    if Config.perps_book_sample_interval > 0:
+        running_tasks.append(asyncio.create_task(sample_periodically(
+            order_book_queues_perps.values(), Config.perps_book_sample_interval, shutdown_event
+        )))
 
     try:
         await shutdown_event.wait()
     finally:
         logging.info("📦 Shutting down components...")
+        # the latest books not sampled yet, and everything still buffered
+        sample_all(order_book_queues_perps.values())
+        await processor.flush()
         await processor.shutdown()
         await db.close()
         await asyncio.gather(*running_tasks, return_exceptions=True)
@@ -0,0 +1,185 @@
+import asyncio
+import random
+import time
+from crypto_hft.utils.config import TARGET_TOKENS
+from crypto_hft.utils.time_utils import unix_to_iso8601
+
+'''
+Local stand-in for a ccxt.pro exchange, to run the perps streamer and writers without a
+network connection (see `crypto_hft/benchmarks/perps_pipeline.py`).
+
+Books and trades are generated at `book_rate` / `trade_rate` updates per second per symbol.
+Like ccxt.pro, `watch_order_book` returns the full current book and `watch_trades` the trades
+since the previous call. The exchange timestamp of every update is its generation time, so
+the end-to-end latency of a stored row is its insert time minus its `timestamp`.
+
+`fetch_funding_rate_history` serves a deterministic funding rate every `funding_interval`
+seconds, after `request_latency` seconds, to run the funding backfill offline (see
+`crypto_hft/funding_rate/funding_backfill.py --mock`). `watch_mark_prices` streams mark and
+index prices at `book_rate` with a constant premium per symbol (`premiums`) plus noise, for
+the funding estimator (`crypto_hft/funding_rate/funding_estimator.py --mock`).
+'''
+
+class MockExchange:
+    def __init__(
+        self,
+        exchange_id: str = 'mock',
+        n_symbols: int = len(TARGET_TOKENS),
+        book_rate: float = 10,
+        trade_rate: float = 10,
+        depth: int = 20,
+        multi_symbol: bool = True,
+        seed: int = 0,
+        funding_interval: float = 8 * 3600,
+        request_latency: float = 0.0,
+    ):
+        self.id = exchange_id
+        self.book_rate = book_rate
+        self.trade_rate = trade_rate
+        self.depth = depth
+        self.rng = random.Random(seed)
+        self.funding_interval = funding_interval
+        self.request_latency = request_latency
+
+        # the target tokens first, so that the streamer has queues for them
+        tokens = list(TARGET_TOKENS) + [f'SYN{i}' for i in range(max(n_symbols - len(TARGET_TOKENS), 0))]
+        self.symbols = [f'{token}/USDT:USDT' for token in tokens[:n_symbols]]
+        self.markets: dict[str, dict] = {}
+        self.mids = {symbol: 100 * (1 + self.rng.random()) for symbol in self.symbols}
+        self.premiums = {symbol: 1e-4 * (i % 7 - 2) for i, symbol in enumerate(self.symbols)}
+
+        self.has = {
+            'watchOrderBook': True,
+            'watchTrades': True,
+            'watchOrderBookForSymbols': multi_symbol,
+            'watchTradesForSymbols': multi_symbol,
+            'fetchFundingRateHistory': True,
+            'watchMarkPrices': True,
+        }
+        # next update time of every subscription, (method, symbols) -> time
+        self.schedule: dict[tuple, float] = {}
+        self.books_sent = 0
+        self.trades_sent = 0
+        self.closed = False
+        self.funding_requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def load_markets(self) -> dict[str, dict]:
+        self.markets = {
+            symbol: {
+                'id': symbol.split(':')[0].replace('/', ''), 'symbol': symbol, 'base': symbol.split('/')[0],
+                'quote': 'USDT', 'settle': 'USDT', 'type': 'swap', 'swap': True, 'linear': True, 'active': True,
+            }
+            for symbol in self.symbols
+        }
+        return self.markets
+
+    async def _wait(self, key: tuple, rate: float) -> int:
+        """Waits for the next update of a subscription, returns the number of updates due
+        (more than one when the consumer is slower than `rate`)."""
+        if self.closed:
+            raise ConnectionError(f'{self.id} is closed')
+        now = time.time()
+        next_time = self.schedule.setdefault(key, now)
+        if next_time > now:
+            await asyncio.sleep(next_time - now)
+            now = time.time()
+        due = int((now - next_time) * rate) + 1
+        self.schedule[key] = next_time + due / rate
+        return due
+
+    def _book(self, symbol: str) -> dict:
+        mid = self.mids[symbol] = self.mids[symbol] * (1 + 1e-4 * self.rng.gauss(0, 1))
+        now = time.time()
+        self.books_sent += 1
+        return {
+            'symbol': symbol,
+            'timestamp': int(now * 1000),
+            'datetime': unix_to_iso8601(now),
+            'nonce': self.books_sent,
+            'bids': [[mid * (1 - 1e-4 * (i + 1)), self.rng.random()] for i in range(self.depth)],
+            'asks': [[mid * (1 + 1e-4 * (i + 1)), self.rng.random()] for i in range(self.depth)],
+        }
+
+    def _trades(self, symbol: str, count: int) -> list[dict]:
+        now = time.time()
+        trades = []
+        for _ in range(count):
+            self.trades_sent += 1
+            side = self.rng.choice(('buy', 'sell'))
+            trades.append({
+                'id': str(self.trades_sent),
+                'symbol': symbol,
+                'timestamp': int(now * 1000),
+                'datetime': unix_to_iso8601(now),
+                'side': side,
+                'price': self.mids[symbol] * (1 + (1e-4 if side == 'buy' else -1e-4)),
+                'amount': self.rng.random(),
+            })
+        return trades
+
+    async def watch_order_book(self, symbol: str, limit: int | None = None, params: dict = {}) -> dict:
+        await self._wait(('book', symbol), self.book_rate)
+        return self._book(symbol)
+
+    async def watch_trades(self, symbol: str, since: int | None = None, limit: int | None = None, params: dict = {}) -> list[dict]:
+        due = await self._wait(('trades', symbol), self.trade_rate)
+        return self._trades(symbol, due)
+
+    async def watch_order_book_for_symbols(self, symbols: list[str], limit: int | None = None, params: dict = {}) -> dict:
+        # one update per symbol and 1 / book_rate, for a random symbol of the subscription
+        await self._wait(('book', tuple(symbols)), self.book_rate * len(symbols))
+        return self._book(self.rng.choice(symbols))
+
+    async def watch_trades_for_symbols(self, symbols: list[str], since: int | None = None, limit: int | None = None, params: dict = {}) -> list[dict]:
+        due = await self._wait(('trades', tuple(symbols)), self.trade_rate * len(symbols))
+        return self._trades(self.rng.choice(symbols), due)
+
+    async def fetch_funding_rate_history(self, symbol: str, since: int | None = None, limit: int | None = None, params: dict = {}) -> list[dict]:
+        """Funding rates of `symbol` from `since` to `params['until']` (ms, inclusive), oldest first, at most `limit`."""
+        self.funding_requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.request_latency)
+        finally:
+            self.in_flight -= 1
+
+        interval = int(self.funding_interval * 1000)
+        now = int(time.time() * 1000)
+        until = min(params.get('until', now), now)
+        limit = limit or 100
+        first = -(-(since or until - limit * interval) // interval) * interval # first funding time >= since
+        offset = self.symbols.index(symbol)
+        return [
+            {
+                'symbol': symbol,
+                'fundingRate': 1e-4 * (1 + ((timestamp // interval + offset) % 7 - 3) / 10),
+                'timestamp': timestamp,
+                'datetime': unix_to_iso8601(timestamp / 1000),
+            }
+            for timestamp in range(first, until + 1, interval)
+        ][:limit]
+
+    fetchFundingRateHistory = fetch_funding_rate_history
+
+    async def watch_mark_prices(self, symbols: list[str] | None = None, params: dict = {}) -> dict[str, dict]:
+        # one update per symbol and 1 / book_rate, for a random symbol of the subscription
+        symbols = symbols or self.symbols
+        await self._wait(('mark', tuple(symbols)), self.book_rate * len(symbols))
+        symbol = self.rng.choice(symbols)
+        mid = self.mids[symbol] = self.mids[symbol] * (1 + 1e-4 * self.rng.gauss(0, 1))
+        premium = self.premiums[symbol] + 1e-5 * self.rng.gauss(0, 1)
+        now = time.time()
+        return {symbol: {
+            'symbol': symbol,
+            'timestamp': int(now * 1000),
+            'datetime': unix_to_iso8601(now),
+            'markPrice': mid,
+            'indexPrice': mid / (1 + premium),
+            'info': {},
+        }}
+
+    async def close(self) -> None:
+        self.closed = True
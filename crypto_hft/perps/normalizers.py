@@ -2,10 +2,22 @@
 
 import logging
 from typing import Dict, Any
+from itertools import zip_longest
+from crypto_hft.utils.config import Config
 
 logger = logging.getLogger(__name__)
 
-ORDERBOOK_LEVELS = 15
+ORDERBOOK_LEVELS = Config.orderbook_levels
+
+# flattened book columns, in the order `flatten_order_book` fills them
+BOOK_LEVEL_KEYS = [
+    f"{side}_{i}_{field}"
+    for i in range(ORDERBOOK_LEVELS)
+    for side in ("bid", "ask")
+    for field in ("px", "sz")
+]
+_NO_LEVEL = (None, None)
+_PADDING = [None] * len(BOOK_LEVEL_KEYS)
 
 def normalize_symbol(symbol: str) -> str:
     """
@@ -59,3 +71,21 @@ def normalize_trade(exchange_id: str, raw: dict) -> Dict[str, Any]:
     except Exception as e:
         logger.warning(f"[TRADES] Normalization error for {exchange_id} {raw.get('symbol')}: {e}")
         return {}
+
+
+def flatten_order_book(normalized: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replace the bids/asks lists by `bid_{i}_px`, `bid_{i}_sz`, `ask_{i}_px`, `ask_{i}_sz` columns,
+    padded with None up to ORDERBOOK_LEVELS (as the spot books).
+    """
+    bids = normalized.pop("bids", [])[:ORDERBOOK_LEVELS]
+    asks = normalized.pop("asks", [])[:ORDERBOOK_LEVELS]
+
+    values: list[float | None] = []
+    for bid, ask in zip_longest(bids, asks):
+        values += (float(bid[0]), float(bid[1])) if bid else _NO_LEVEL
+        values += (float(ask[0]), float(ask[1])) if ask else _NO_LEVEL
+    values += _PADDING[len(values):]
+
+    normalized.update(zip(BOOK_LEVEL_KEYS, values))
+    return normalized
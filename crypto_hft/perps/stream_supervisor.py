@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Coroutine, Optional
+
+from crypto_hft.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class SupervisedStream:
+    """A restartable stream: `run(stream)` watches the exchange and calls `stream.on_message()`
+    for every update, `resubscribe()` (optional) drops the exchange subscription."""
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[["SupervisedStream"], Coroutine[Any, Any, None]],
+        resubscribe: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        self.name = name
+        self.run = run
+        self.resubscribe = resubscribe
+        self.task: Optional[asyncio.Task] = None
+
+        self.started_at: Optional[float] = None
+        self.last_message_at: Optional[float] = None
+        self.messages = 0
+        self.restarts = 0
+        self.resubscribes = 0
+        self.failures = 0  # consecutive, drives the backoff
+        self.last_error: Optional[str] = None
+        self.stale = False
+        self.silent_resubscribes = 0  # resubscribes without a message since, quiet markets back off
+
+    def on_message(self):
+        self.last_message_at = time.time()
+        self.messages += 1
+        self.silent_resubscribes = 0
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def uptime(self, now: float) -> float:
+        return now - self.started_at if self.running and self.started_at else 0.0
+
+    def message_age(self, now: float) -> Optional[float]:
+        """Seconds since the last message, or since the (re)start if none was received since."""
+        if self.started_at is None:
+            return None
+        return now - max(self.last_message_at or 0.0, self.started_at)
+
+    def metrics(self, now: float) -> dict:
+        return {
+            "stream": self.name,
+            "running": self.running,
+            "uptime": self.uptime(now),
+            "last_message_age": self.message_age(now),
+            "messages": self.messages,
+            "restarts": self.restarts,
+            "resubscribes": self.resubscribes,
+            "last_error": self.last_error,
+        }
+
+
+class StreamSupervisor:
+    """
+    Keeps the perps streams running: a stream that raises is restarted after a jittered
+    exponential backoff, and a stream without messages for `silence_timeout` seconds is
+    cancelled, resubscribed and restarted right away (the timeout doubles, up to 8x, while
+    resubscribing does not bring messages back).
+    """
+
+    def __init__(
+        self,
+        shutdown_event: asyncio.Event,
+        silence_timeout: float = Config.perps_stream_silence_timeout,
+        base_backoff: float = Config.perps_stream_base_backoff,
+        max_backoff: float = Config.perps_stream_max_backoff,
+        report_interval: float = Config.perps_stream_report_interval,
+    ):
+        self.shutdown_event = shutdown_event
+        self.silence_timeout = silence_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.report_interval = report_interval
+        self.streams: list[SupervisedStream] = []
+
+    def add(self, stream: SupervisedStream):
+        self.streams.append(stream)
+
+    def backoff(self, failures: int) -> float:
+        delay = min(self.base_backoff * 2 ** (failures - 1), self.max_backoff)
+        # jitter so that streams failing together (e.g. on a disconnect) do not reconnect together
+        return random.uniform(delay / 2, delay)
+
+    async def supervise(self, stream: SupervisedStream):
+        while not self.shutdown_event.is_set():
+            stream.started_at = time.time()
+            stream.task = asyncio.create_task(stream.run(stream), name=stream.name)
+            try:
+                await stream.task
+                return  # the stream ended on shutdown
+            except asyncio.CancelledError:
+                current = asyncio.current_task()
+                if (current is not None and current.cancelling()) or not stream.stale:
+                    stream.task.cancel()
+                    raise
+                # cancelled by the watchdog, resubscribe and restart immediately
+                stream.stale = False
+                stream.resubscribes += 1
+                stream.silent_resubscribes += 1
+                if stream.resubscribe is not None:
+                    try:
+                        await stream.resubscribe()
+                    except Exception as e:
+                        logger.warning(f"[SUPERVISOR] {stream.name} unsubscribe error: {e}")
+            except Exception as e:
+                # a stream that ran long enough starts over from the smallest backoff
+                if time.time() - stream.started_at > self.max_backoff:
+                    stream.failures = 0
+                stream.failures += 1
+                stream.restarts += 1
+                stream.last_error = repr(e)
+                delay = self.backoff(stream.failures)
+                logger.warning(f"[SUPERVISOR] {stream.name} failed: {e}. Restarting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def watchdog(self):
+        while not self.shutdown_event.is_set():
+            await asyncio.sleep(min(5.0, self.silence_timeout / 4))
+            now = time.time()
+            for stream in self.streams:
+                age = stream.message_age(now)
+                # a stream that stays silent after being resubscribed is probably an illiquid market
+                timeout = self.silence_timeout * 2 ** min(stream.silent_resubscribes, 3)
+                if stream.running and not stream.stale and age is not None and age > timeout:
+                    logger.warning(f"[SUPERVISOR] {stream.name} silent for {age:.0f}s, resubscribing")
+                    stream.stale = True
+                    stream.task.cancel()
+
+    def metrics(self) -> list[dict]:
+        now = time.time()
+        return [stream.metrics(now) for stream in self.streams]
+
+    async def report(self):
+        while not self.shutdown_event.is_set():
+            await asyncio.sleep(self.report_interval)
+            metrics = self.metrics()
+            running = sum(m["running"] for m in metrics)
+            ages = [m["last_message_age"] for m in metrics if m["last_message_age"] is not None]
+            logger.info(
+                f"[SUPERVISOR] {running}/{len(metrics)} streams running, "
+                f"{sum(m['restarts'] for m in metrics)} restarts, {sum(m['resubscribes'] for m in metrics)} resubscribes, "
+                f"oldest message {max(ages, default=0):.0f}s ago"
+            )
+
+    async def run(self):
+        tasks = [asyncio.create_task(self.supervise(stream)) for stream in self.streams]
+        tasks += [asyncio.create_task(self.watchdog()), asyncio.create_task(self.report())]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
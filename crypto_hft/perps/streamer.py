@@ -2,12 +2,16 @@ import asyncio
 import ccxt.pro as ccxt
 import logging
 import signal
-from create_queue import order_book_queues_perps, trade_queues_perps
-from timeutils import time_iso8601
+from crypto_hft.perps.create_queue import order_book_queues_perps, trade_queues_perps
+from crypto_hft.ingestion.columnar_buffer import ColumnarBuffer
+from crypto_hft.utils.time_utils import time_iso8601
+from crypto_hft.perps.stream_supervisor import StreamSupervisor, SupervisedStream
+from crypto_hft.utils.market_catalog import MarketCatalog
+from crypto_hft.utils.rate_limiter import rate_limiter
 
-from crypto_hft.utils.config import TARGET_TOKENS
-from normalizers import normalize_symbol
-from normalizers import normalize_order_book, normalize_trade
+from crypto_hft.utils.config import TARGET_TOKENS, Config
+from crypto_hft.perps.normalizers import normalize_symbol
+from crypto_hft.perps.normalizers import normalize_order_book, normalize_trade, flatten_order_book
 
 # --- Logging ---
 logging.basicConfig(level=logging.INFO)
@@ -26,22 +30,6 @@ def silence_cancelled_errors(loop):
         loop.default_exception_handler(context)
     loop.set_exception_handler(handler)
 
-def flatten_order_book(normalized):
-    bids = normalized.pop("bids", [])
-    asks = normalized.pop("asks", [])
-
-    for i in range(15):
-        bid = bids[i] if i < len(bids) else [0.0, 0.0]
-        ask = asks[i] if i < len(asks) else [0.0, 0.0]
-
-        normalized[f"bid_{i}_px"] = float(bid[0])
-        normalized[f"bid_{i}_sz"] = float(bid[1])
-        normalized[f"ask_{i}_px"] = float(ask[0])
-        normalized[f"ask_{i}_sz"] = float(ask[1])
-
-    return normalized
-
-
 # --- Utils ---
 def get_valid_symbol(exchange_id, token):
     base = token.upper()
@@ -56,48 +44,147 @@ def get_valid_symbol(exchange_id, token):
     return None
 
 
-async def get_symbols(exchange):
-    await exchange.load_markets()
+async def get_symbols(exchange, catalog=None):
+    if catalog is None or not catalog.set_markets(exchange):
+        await exchange.load_markets()
     return [
         s for t in TARGET_TOKENS
         if (s := get_valid_symbol(exchange.id, t)) in exchange.markets
     ]
 
 
+# (exchange id, ccxt symbol) -> (order book queue, trade queue)
+queue_routes: dict[tuple[str, str], tuple[ColumnarBuffer, ColumnarBuffer] | None] = {}
+
+def get_route(exchange_id, symbol):
+    """Queues of a symbol, `normalize_symbol` only runs the first time a symbol is seen."""
+    key = (exchange_id, symbol)
+    if key not in queue_routes:
+        normalized = normalize_symbol(symbol)
+        if normalized in order_book_queues_perps:
+            queue_routes[key] = (order_book_queues_perps[normalized], trade_queues_perps[normalized])
+        else:
+            logger.warning(f"[ROUTES] No queue for {exchange_id} {symbol}, its updates will be dropped")
+            queue_routes[key] = None
+    return queue_routes[key]
+
+
+def build_routes(exchange_id, symbols):
+    """Maps each ccxt symbol of an exchange to its (order book queue, trade queue)."""
+    return {symbol: route for symbol in symbols if (route := get_route(exchange_id, symbol)) is not None}
+
+
+def chunked(symbols, size):
+    return [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+
 # --- Streamers ---
-async def stream_order_book(exchange, symbol):
-    try:
-        while not shutdown_event.is_set():
-            ob = await exchange.watch_order_book(symbol)
-            normalized = normalize_order_book(exchange.id, ob)
+# Errors propagate to the StreamSupervisor, which restarts the stream with backoff.
+async def stream_order_book(exchange, symbol, stream):
+    queue = get_route(exchange.id, symbol)[0]
+    while not shutdown_event.is_set():
+        ob = await exchange.watch_order_book(symbol)
+        stream.on_message()
+        normalized = normalize_order_book(exchange.id, ob)
+
+        if normalized:
+            normalized["local_timestamp"] = time_iso8601()
+            normalized = flatten_order_book(normalized)
+            await queue.put(normalized)
 
+async def stream_trades(exchange, symbol, stream):
+    queue = get_route(exchange.id, symbol)[1]
+    while not shutdown_event.is_set():
+        trades = await exchange.watch_trades(symbol)
+        stream.on_message()
+        for trade in trades:
+            normalized = normalize_trade(exchange.id, trade)
             if normalized:
                 normalized["local_timestamp"] = time_iso8601()
-                normalized = flatten_order_book(normalized)
-                await order_book_queues_perps[normalize_symbol(normalized["symbol"])].put(normalized)
+                await queue.put(normalized)
 
-    except asyncio.CancelledError:
-        logger.info(f"[ORDERBOOK] Cancelled: {exchange.id} {symbol}")
-    except Exception as e:
-        logger.warning(f"[ORDERBOOK] {exchange.id} {symbol} error: {e}")
-        await asyncio.sleep(5)
+                #logger.info(f"[📥 TRADE QUEUE] {exchange.id} {symbol}")
 
-async def stream_trades(exchange, symbol):
-    try:
-        while not shutdown_event.is_set():
-            trades = await exchange.watch_trades(symbol)
-            for trade in trades:
-                normalized = normalize_trade(exchange.id, trade)
-                if normalized:
-                    normalized["local_timestamp"] = time_iso8601()
-                    await trade_queues_perps[normalize_symbol(normalized["symbol"])].put(normalized)
-
-                    #logger.info(f"[📥 TRADE QUEUE] {exchange.id} {symbol}")
-    except asyncio.CancelledError:
-        logger.info(f"[TRADES] Cancelled: {exchange.id} {symbol}")
-    except Exception as e:
-        logger.warning(f"[TRADES] {exchange.id} {symbol} error: {e}")
-        await asyncio.sleep(5)
+
+async def stream_order_books(exchange, symbols, routes, stream):
+    """One subscription for several symbols, each update is routed to its symbol's queue."""
+    while not shutdown_event.is_set():
+        ob = await exchange.watch_order_book_for_symbols(symbols)
+        stream.on_message()
+        route = routes.get(ob.get("symbol"))
+        if route is None:
+            continue
+        normalized = normalize_order_book(exchange.id, ob)
+
+        if normalized:
+            normalized["local_timestamp"] = time_iso8601()
+            normalized = flatten_order_book(normalized)
+            await route[0].put(normalized)
+
+async def stream_trades_for_symbols(exchange, symbols, routes, stream):
+    """One subscription for several symbols, each trade is routed to its symbol's queue."""
+    while not shutdown_event.is_set():
+        trades = await exchange.watch_trades_for_symbols(symbols)
+        stream.on_message()
+        for trade in trades:
+            route = routes.get(trade.get("symbol"))
+            if route is None:
+                continue
+            normalized = normalize_trade(exchange.id, trade)
+            if normalized:
+                normalized["local_timestamp"] = time_iso8601()
+                await route[1].put(normalized)
+
+
+def unsubscriber(exchange, method, *args):
+    """Drops the exchange subscription of a silent stream, if ccxt supports it for this exchange."""
+    capability = "unW" + method[1:]  # watchOrderBook -> unWatchOrderBook
+    if not exchange.has.get(capability):
+        return None
+    python_name = "un_watch" + "".join(f"_{c.lower()}" if c.isupper() else c for c in method[5:])
+
+    async def resubscribe():
+        await getattr(exchange, python_name)(*args)
+    return resubscribe
+
+
+def add_streams(supervisor, exchange, symbols):
+    """Registers multi-symbol streams (chunks of `Config.perps_symbols_per_subscription`) where the
+    exchange supports them, one stream per symbol otherwise."""
+    routes = build_routes(exchange.id, symbols)
+    symbols = [s for s in symbols if s in routes]
+    chunks = chunked(symbols, Config.perps_symbols_per_subscription)
+    streams = []
+
+    if exchange.has.get("watchOrderBookForSymbols"):
+        streams += [SupervisedStream(
+            f"{exchange.id} orderbook {','.join(chunk)}",
+            lambda s, chunk=chunk: stream_order_books(exchange, chunk, routes, s),
+            unsubscriber(exchange, "watchOrderBookForSymbols", chunk),
+        ) for chunk in chunks]
+    else:
+        streams += [SupervisedStream(
+            f"{exchange.id} orderbook {sym}",
+            lambda s, sym=sym: stream_order_book(exchange, sym, s),
+            unsubscriber(exchange, "watchOrderBook", sym),
+        ) for sym in symbols]
+
+    if exchange.has.get("watchTradesForSymbols"):
+        streams += [SupervisedStream(
+            f"{exchange.id} trades {','.join(chunk)}",
+            lambda s, chunk=chunk: stream_trades_for_symbols(exchange, chunk, routes, s),
+            unsubscriber(exchange, "watchTradesForSymbols", chunk),
+        ) for chunk in chunks]
+    else:
+        streams += [SupervisedStream(
+            f"{exchange.id} trades {sym}",
+            lambda s, sym=sym: stream_trades(exchange, sym, s),
+            unsubscriber(exchange, "watchTrades", sym),
+        ) for sym in symbols]
+
+    for stream in streams:
+        supervisor.add(stream)
+    logger.info(f"[✅] Streaming {exchange.id} {len(symbols)} symbols with {len(streams)} streams")
 
 
 # --- Signal Handler ---
@@ -109,15 +196,20 @@ def handle_signal():
 
 
 # --- Main ---
-async def main():
-    exchanges = [
-        ccxt.coinbase({'enableRateLimit': True}),
-        ccxt.poloniexfutures({'enableRateLimit': True}),
-        ccxt.binance({
-    'enableRateLimit': True,
-    'options': {'defaultType': 'future'}})  
-        # ccxt.hyperliquid({'enableRateLimit': True}),   # Add if needed
-    ]
+async def main(exchanges=None, symbols=None):
+    """Streams the live exchanges, or `exchanges` (e.g. `MockExchange`s) if given.
+    `symbols` maps exchange ids to the symbols to stream, `TARGET_TOKENS` by default."""
+    catalog = None
+    if exchanges is None:
+        exchanges = [
+            rate_limiter.create(ccxt, 'coinbase'),
+            rate_limiter.create(ccxt, 'poloniexfutures'),
+            rate_limiter.create(ccxt, 'binance', {'options': {'defaultType': 'future'}}),
+            # rate_limiter.create(ccxt, 'hyperliquid'),   # Add if needed
+        ]
+        catalog = await MarketCatalog([ex.id for ex in exchanges]).load()
+        running_tasks.append(asyncio.create_task(catalog.refresh_periodically(shutdown_event)))
+        running_tasks.append(asyncio.create_task(rate_limiter.report_metrics(shutdown_event)))
 
     # Register Ctrl+C / SIGTERM handler
     loop = asyncio.get_running_loop()
@@ -125,12 +217,15 @@ async def main():
         loop.add_signal_handler(sig, handle_signal)
 
     try:
+        supervisor = StreamSupervisor(shutdown_event)
         for ex in exchanges:
-            symbols = await get_symbols(ex)
-            for sym in symbols:
-                logger.info(f"[✅] Streaming {ex.id} {sym}")
-                running_tasks.append(asyncio.create_task(stream_order_book(ex, sym)))
-                running_tasks.append(asyncio.create_task(stream_trades(ex, sym)))
+            if symbols is not None and ex.id in symbols:
+                await ex.load_markets()
+                ex_symbols = symbols[ex.id]
+            else:
+                ex_symbols = await get_symbols(ex, catalog)
+            add_streams(supervisor, ex, ex_symbols)
+        running_tasks.append(asyncio.create_task(supervisor.run()))
 
         await shutdown_event.wait()
 
@@ -145,6 +240,7 @@ async def main():
                 await ex.close()
             except Exception as e:
                 logger.warning(f"[{ex.id}] Close error: {e}")
+        await rate_limiter.close()
 
         logger.info("✅ Shutdown complete.")
 
@@ -0,0 +1,143 @@
+import time
+from crypto_hft.utils.config import Config
+from crypto_hft.utils.time_utils import iso8601_to_unix, unix_to_iso8601
+
+class Bar:
+    """OHLCV bar being built for one (exchange, symbol, resolution).
+
+    Volumes are in base currency, `quote_volume` is the traded notional and is used for the VWAP.
+    """
+    __slots__ = (
+        'exchange', 'symbol', 'resolution', 'start_ms',
+        'open', 'high', 'low', 'close',
+        'volume', 'quote_volume', 'buy_volume', 'sell_volume', 'trade_count',
+    )
+
+    def __init__(self, exchange: str, symbol: str, resolution: str, start_ms: int, price: float) -> None:
+        self.exchange = exchange
+        self.symbol = symbol
+        self.resolution = resolution
+        self.start_ms = start_ms
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0.
+        self.quote_volume = 0.
+        self.buy_volume = 0.
+        self.sell_volume = 0.
+        self.trade_count = 0
+
+    def update(self, price: float, amount: float, side: str | None) -> None:
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.add_volume(price, amount, side)
+
+    def add_volume(self, price: float, amount: float, side: str | None) -> None:
+        """Count a trade without touching OHLC, for late trades."""
+        self.volume += amount
+        self.quote_volume += price * amount
+        if side == 'buy':
+            self.buy_volume += amount
+        elif side == 'sell':
+            self.sell_volume += amount
+        self.trade_count += 1
+
+    def merge_volume(self, other: 'Bar') -> None:
+        self.volume += other.volume
+        self.quote_volume += other.quote_volume
+        self.buy_volume += other.buy_volume
+        self.sell_volume += other.sell_volume
+        self.trade_count += other.trade_count
+
+    def to_dict(self) -> dict:
+        """Completed bar, in the format sent to the streamer and to the `bars_{symbol}` tables."""
+        return {
+            "type": "bar",
+            "exchange": self.exchange,
+            "symbol": self.symbol,
+            "resolution": self.resolution,
+            "timestamp": unix_to_iso8601(self.start_ms / 1000),
+            "local_timestamp": unix_to_iso8601(time.time()),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+            "quote_volume": self.quote_volume,
+            "vwap": self.quote_volume / self.volume if self.volume else self.close,
+            "buy_volume": self.buy_volume,
+            "sell_volume": self.sell_volume,
+            "trade_count": self.trade_count,
+        }
+
+class BarBuilder:
+    """Incremental multi-resolution OHLCV/VWAP bar engine fed by the trade stream.
+
+    Keeps one open bar per (exchange, symbol, resolution) and updates it in O(1) for every
+    trade, so charts and models can read pre-aggregated bars instead of re-aggregating the
+    raw trades. A bar is completed when the first trade of the next bucket arrives, or by
+    `close_expired` once its bucket is over for quiet symbols. Buckets without trades
+    produce no bar.
+    """
+
+    def __init__(self, resolutions: dict[str, int] = Config.bar_resolutions) -> None:
+        # resolution label -> bucket length in ms
+        self.resolutions = {label: seconds * 1000 for label, seconds in resolutions.items()}
+        self.open_bars: dict[tuple[str, str, str], Bar] = {}
+        # start of the last bar closed by `close_expired`, which must not be opened again
+        self.closed_starts: dict[tuple[str, str, str], int] = {}
+        # volume of the late trades of closed bars, added to the next bar
+        self.late_volume: dict[tuple[str, str, str], Bar] = {}
+
+    def update(self, trade: dict) -> list[dict]:
+        """Add a processed trade (see `process_trade_data`) to the open bars.
+
+        Returns the bars completed by this trade, if any. Late trades (older than the open
+        bar) only add their volume to the open bar, so no volume is lost and its OHLC is not
+        moved by stale prices. Late trades of a bar already closed by `close_expired` do not
+        open a bar: their volume is added to the next bar opened by a current trade.
+        """
+        exchange, symbol = trade["exchange"], trade["symbol"]
+        price, amount, side = trade["price"], trade["amount"], trade["side"]
+        ts_ms = int(iso8601_to_unix(trade["timestamp"]) * 1000)
+        completed = []
+
+        for resolution, resolution_ms in self.resolutions.items():
+            start_ms = ts_ms - ts_ms % resolution_ms
+            key = (exchange, symbol, resolution)
+            bar = self.open_bars.get(key)
+
+            if bar is None:
+                if start_ms <= self.closed_starts.get(key, -1):
+                    late = self.late_volume.get(key)
+                    if late is None:
+                        late = self.late_volume[key] = Bar(exchange, symbol, resolution, start_ms, price)
+                    late.add_volume(price, amount, side)
+                    continue
+                bar = self.open_bars[key] = Bar(exchange, symbol, resolution, start_ms, price)
+                if (late := self.late_volume.pop(key, None)) is not None:
+                    bar.merge_volume(late)
+            elif start_ms > bar.start_ms:
+                completed.append(bar.to_dict())
+                bar = self.open_bars[key] = Bar(exchange, symbol, resolution, start_ms, price)
+            elif start_ms < bar.start_ms:
+                bar.add_volume(price, amount, side)
+                continue
+
+            bar.update(price, amount, side)
+
+        return completed
+
+    def close_expired(self, now: float | None = None, grace_period: float = Config.bar_close_grace_period) -> list[dict]:
+        """Complete the open bars whose bucket ended more than `grace_period` seconds before `now`."""
+        now_ms = (time.time() if now is None else now) * 1000
+        grace_ms = grace_period * 1000
+        expired = [
+            key for key, bar in self.open_bars.items()
+            if bar.start_ms + self.resolutions[bar.resolution] + grace_ms <= now_ms
+        ]
+        bars = [self.open_bars.pop(key) for key in expired]
+        for key, bar in zip(expired, bars):
+            self.closed_starts[key] = bar.start_ms
+        return [bar.to_dict() for bar in bars]
@@ -0,0 +1,35 @@
+class BBOTracker:
+    """Derives top-of-book (BBO) events from the processed order book snapshots.
+
+    Most consumers only need level 0, so the BBO is published on its own narrow stream
+    and table. An event is only emitted when the best bid or ask (price or size) of an
+    (exchange, symbol) changed since the last snapshot.
+    """
+
+    def __init__(self) -> None:
+        self.last_quotes: dict[tuple[str, str], tuple] = {}
+
+    def update(self, order_book: dict) -> dict | None:
+        """Return the BBO event for a processed order book (see `process_order_book_data`), or None if unchanged."""
+        quote = (order_book["bid_0_px"], order_book["bid_0_sz"], order_book["ask_0_px"], order_book["ask_0_sz"])
+        key = (order_book["exchange"], order_book["symbol"])
+
+        if self.last_quotes.get(key) == quote:
+            return None
+        self.last_quotes[key] = quote
+
+        bid_px, bid_sz, ask_px, ask_sz = quote
+        both_sides = bid_px is not None and ask_px is not None
+        return {
+            "type": "bbo",
+            "exchange": order_book["exchange"],
+            "symbol": order_book["symbol"],
+            "timestamp": order_book["timestamp"],
+            "local_timestamp": order_book["local_timestamp"],
+            "bid_px": bid_px,
+            "bid_sz": bid_sz,
+            "ask_px": ask_px,
+            "ask_sz": ask_sz,
+            "mid": (bid_px + ask_px) / 2 if both_sides else None,
+            "spread": ask_px - bid_px if both_sides else None,
+        }
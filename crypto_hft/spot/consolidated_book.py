@@ -0,0 +1,212 @@
+import time
+from bisect import bisect_left, bisect_right
+from typing import Literal
+from crypto_hft.utils.config import Config
+
+Side = Literal['bid', 'ask']
+
+class ConsolidatedSide:
+    """One side of a consolidated ladder, with the size of every venue at each price.
+
+    Prices are kept in a sorted list (negated for bids) so index 0 is always the best level,
+    and only the levels touched by a venue update are inserted or removed.
+    """
+
+    def __init__(self, is_bid: bool) -> None:
+        self.is_bid = is_bid
+        self.keys: list[float] = []
+        self.levels: dict[float, dict[str, float]] = {}
+
+    def _key(self, price: float) -> float:
+        return -price if self.is_bid else price
+
+    def set_size(self, price: float, venue: str, size: float) -> None:
+        """Set the size of `venue` at `price`, a size of 0 removes the venue from the level."""
+        level = self.levels.get(price)
+
+        if size > 0:
+            if level is None:
+                key = self._key(price)
+                self.keys.insert(bisect_left(self.keys, key), key)
+                level = self.levels[price] = {}
+            level[venue] = size
+        elif level is not None:
+            level.pop(venue, None)
+            if not level:
+                del self.levels[price]
+                key = self._key(price)
+                del self.keys[bisect_left(self.keys, key)]
+
+    def best(self) -> tuple[float, float, dict[str, float]] | None:
+        """(price, total size, size per venue) of the best level, or None if the side is empty."""
+        if not self.keys:
+            return None
+        price = self._key(self.keys[0])
+        level = self.levels[price]
+        return price, sum(level.values()), dict(level)
+
+    def depth_at_price(self, price: float) -> dict[str, float]:
+        """Size per venue quoted exactly at `price`."""
+        return dict(self.levels.get(price, {}))
+
+    def cumulative_size(self, price: float) -> float:
+        """Total size quoted at `price` or better (i.e. available to a taker with this limit price)."""
+        # keys are sorted best first, so the levels at `price` or better are a prefix of the list
+        end = bisect_right(self.keys, self._key(price))
+        return sum(sum(self.levels[self._key(key)].values()) for key in self.keys[:end])
+
+    def ladder(self, depth: int) -> list[tuple[float, float, dict[str, float]]]:
+        """Best `depth` levels as (price, total size, size per venue)."""
+        ladder = []
+        for key in self.keys[:depth]:
+            price = self._key(key)
+            level = self.levels[price]
+            ladder.append((price, sum(level.values()), dict(level)))
+        return ladder
+
+class ConsolidatedBook:
+    """Order book of one symbol merged across venues.
+
+    The latest book of each venue is kept so that, when a single venue updates, only the
+    price levels of that venue which actually changed are touched in the consolidated ladder.
+    Venues which stopped updating are dropped by `expire`.
+    """
+
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol
+        self.bids = ConsolidatedSide(is_bid=True)
+        self.asks = ConsolidatedSide(is_bid=False)
+        self.venue_books: dict[str, tuple[dict[float, float], dict[float, float]]] = {}
+        self.venue_updated: dict[str, float] = {}
+
+    @staticmethod
+    def _apply_diff(side: ConsolidatedSide, venue: str, old: dict[float, float], new: dict[float, float]) -> None:
+        for price in old.keys() - new.keys():
+            side.set_size(price, venue, 0.)
+        for price, size in new.items():
+            if old.get(price) != size:
+                side.set_size(price, venue, size)
+
+    def update(self, venue: str, bids: dict[float, float], asks: dict[float, float], now: float | None = None) -> bool:
+        """Replace the book of `venue` (price -> size per side), `now` is a `time.monotonic()` timestamp.
+
+        Returns True if the consolidated BBO changed.
+        """
+        previous_bbo = self._top()
+        old_bids, old_asks = self.venue_books.get(venue, ({}, {}))
+
+        self._apply_diff(self.bids, venue, old_bids, bids)
+        self._apply_diff(self.asks, venue, old_asks, asks)
+        self.venue_books[venue] = (bids, asks)
+        self.venue_updated[venue] = time.monotonic() if now is None else now
+
+        return self._top() != previous_bbo
+
+    def expire(self, now: float, timeout: float) -> bool:
+        """Remove the levels of the venues not updated for more than `timeout` seconds.
+
+        Returns True if the consolidated BBO changed.
+        """
+        stale = [venue for venue, updated in self.venue_updated.items() if now - updated > timeout]
+        if not stale:
+            return False
+
+        previous_bbo = self._top()
+        for venue in stale:
+            old_bids, old_asks = self.venue_books.pop(venue)
+            del self.venue_updated[venue]
+            self._apply_diff(self.bids, venue, old_bids, {})
+            self._apply_diff(self.asks, venue, old_asks, {})
+
+        return self._top() != previous_bbo
+
+    def _top(self) -> tuple:
+        return (self.bids.best(), self.asks.best())
+
+    def side(self, side: Side) -> ConsolidatedSide:
+        return self.bids if side == 'bid' else self.asks
+
+    def bbo(self) -> dict:
+        """Consolidated BBO with the venues quoting at the best bid and ask."""
+        best_bid, best_ask = self.bids.best(), self.asks.best()
+        bid_px, bid_sz, bid_venues = best_bid if best_bid else (None, None, {})
+        ask_px, ask_sz, ask_venues = best_ask if best_ask else (None, None, {})
+        both_sides = bid_px is not None and ask_px is not None
+
+        return {
+            "type": "consolidated_bbo",
+            "symbol": self.symbol,
+            "bid_px": bid_px,
+            "bid_sz": bid_sz,
+            "bid_venues": bid_venues,
+            "ask_px": ask_px,
+            "ask_sz": ask_sz,
+            "ask_venues": ask_venues,
+            "mid": (bid_px + ask_px) / 2 if both_sides else None, # type: ignore
+            "spread": ask_px - bid_px if both_sides else None, # type: ignore
+        }
+
+class ConsolidatedBookManager:
+    """Consolidated books of all symbols, fed with the processed order book snapshots of every venue.
+
+    Books are only created by `update`, queries on a symbol without a book raise a ValueError.
+    """
+
+    def __init__(self, levels: int = Config.orderbook_levels, venue_timeout: float = Config.consolidated_book_venue_timeout) -> None:
+        self.books: dict[str, ConsolidatedBook] = {}
+        self.venue_timeout = venue_timeout
+        self._bid_keys = [(f"bid_{i}_px", f"bid_{i}_sz") for i in range(levels)]
+        self._ask_keys = [(f"ask_{i}_px", f"ask_{i}_sz") for i in range(levels)]
+
+    def book(self, symbol: str) -> ConsolidatedBook:
+        """Existing book of `symbol`, without the venues which stopped updating."""
+        book = self.books.get(symbol)
+        if book is None:
+            raise ValueError(f'Unknown symbol {symbol}')
+        book.expire(time.monotonic(), self.venue_timeout)
+        return book
+
+    @staticmethod
+    def _levels(order_book: dict, keys: list[tuple[str, str]]) -> dict[float, float]:
+        levels = {}
+        for px_key, sz_key in keys:
+            price = order_book[px_key]
+            if price is None:
+                break
+            levels[price] = order_book[sz_key]
+        return levels
+
+    def update(self, order_book: dict) -> dict | None:
+        """Update with a processed snapshot (see `process_order_book_data`).
+
+        Returns the new consolidated BBO if it changed, else None.
+        """
+        symbol = order_book["symbol"]
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = ConsolidatedBook(symbol)
+
+        now = time.monotonic()
+        expired = book.expire(now, self.venue_timeout)
+        changed = book.update(
+            order_book["exchange"],
+            bids=self._levels(order_book, self._bid_keys),
+            asks=self._levels(order_book, self._ask_keys),
+            now=now
+        )
+        return book.bbo() if changed or expired else None
+
+    def bbo(self, symbol: str) -> dict:
+        return self.book(symbol).bbo()
+
+    def depth_at_price(self, symbol: str, side: Side, price: float) -> dict[str, float]:
+        """Size per venue quoted exactly at `price` on `side`."""
+        return self.book(symbol).side(side).depth_at_price(price)
+
+    def cumulative_size(self, symbol: str, side: Side, price: float) -> float:
+        """Total size across venues quoted at `price` or better on `side`."""
+        return self.book(symbol).side(side).cumulative_size(price)
+
+    def ladder(self, symbol: str, side: Side, depth: int = Config.orderbook_levels) -> list[tuple[float, float, dict[str, float]]]:
+        """Best `depth` consolidated levels of `side` as (price, total size, size per venue)."""
+        return self.book(symbol).side(side).ladder(depth)
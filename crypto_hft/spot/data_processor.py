@@ -4,8 +4,7 @@ import logging
 from crypto_hft.utils.config import Config
 
 # Load configuration
-config = Config()
-orderbook_levels = config.orderbook_levels  
+orderbook_levels = Config.orderbook_levels  
 
 def process_trade_data(trade: dict, received_symbol: str) -> dict | None:
     """
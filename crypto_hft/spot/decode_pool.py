@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable
+import msgspec
+import numpy as np
+from crypto_hft.utils.config import Config
+from crypto_hft.utils.symbol_mapper import REVERSE_SYMBOL_MAP
+
+'''
+Pipeline mode of the spot consumer: the event loop only reads frames and batches them,
+a process pool decodes the JSON and normalizes the messages into columnar batches, and
+the loop dispatches the batches in arrival order while the next ones are being decoded.
+'''
+
+BOOK, TRADE = 0, 1
+
+orderbook_levels = Config.orderbook_levels
+# same key order as `process_order_book_data`, matching the (level, [bid_sz, bid_px, ask_sz, ask_px]) layout below
+BOOK_LEVEL_KEYS = [
+    key
+    for i in range(orderbook_levels)
+    for key in (f"bid_{i}_sz", f"bid_{i}_px", f"ask_{i}_sz", f"ask_{i}_px")
+]
+
+class DecodedBatch:
+    """Normalized messages of a batch of frames, in columns.
+
+    `kinds` gives the order of the messages (BOOK or TRADE), the book and trade columns
+    are each in arrival order.
+    """
+    __slots__ = ('kinds', 'book_meta', 'book_levels', 'trade_meta', 'trade_values', 'errors')
+
+    def __init__(self, n_frames: int) -> None:
+        self.kinds = np.empty(n_frames, dtype=np.int8)
+        # (exchange, symbol, timestamp, local_timestamp)
+        self.book_meta: list[tuple] = []
+        # (n_books, levels, 4), NaN where the book is shallower
+        self.book_levels = np.full((n_frames, orderbook_levels, 4), np.nan)
+        # (exchange, symbol, trade_id, side, timestamp, local_timestamp)
+        self.trade_meta: list[tuple] = []
+        # (n_trades, 2) price, amount
+        self.trade_values = np.empty((n_frames, 2))
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def messages(self):
+        """Yields (data_type, symbol, processed_data), with the same dicts as the data processor."""
+        levels = self.book_levels.reshape(len(self.book_levels), -1)
+        # NaN -> None for the whole batch at once
+        book_rows = np.where(np.isnan(levels), None, levels).tolist()
+        trade_rows = self.trade_values.tolist()
+
+        n_book = n_trade = 0
+        for kind in self.kinds.tolist():
+            if kind == BOOK:
+                exchange, symbol, timestamp, local_timestamp = self.book_meta[n_book]
+                processed = {
+                    "exchange": exchange,
+                    "symbol": symbol,
+                    "timestamp": timestamp,
+                    "local_timestamp": local_timestamp,
+                }
+                processed.update(zip(BOOK_LEVEL_KEYS, book_rows[n_book]))
+                n_book += 1
+                yield "book_snapshot", symbol, processed
+            else:
+                exchange, symbol, trade_id, side, timestamp, local_timestamp = self.trade_meta[n_trade]
+                price, amount = trade_rows[n_trade]
+                n_trade += 1
+                yield "trade", symbol, {
+                    "exchange": exchange,
+                    "symbol": symbol,
+                    "trade_id": trade_id,
+                    "price": price,
+                    "amount": amount,
+                    "side": side,
+                    "timestamp": timestamp,
+                    "local_timestamp": local_timestamp,
+                }
+
+_decoder = msgspec.json.Decoder()
+
+def decode_frames(frames: list[str | bytes]) -> DecodedBatch:
+    """Decodes and normalizes a batch of Tardis frames (runs in the pool workers)."""
+    batch = DecodedBatch(len(frames))
+    n_messages = n_book = n_trade = 0
+
+    for frame in frames:
+        try:
+            data: dict = _decoder.decode(frame)
+            data_type = data['type']
+            exchange = data['exchange']
+            symbol = REVERSE_SYMBOL_MAP[exchange].get(data['symbol'], data['symbol'])
+
+            if data_type == "book_snapshot":
+                levels = batch.book_levels[n_book]
+                for column, side in ((0, data.get("bids", [])), (2, data.get("asks", []))):
+                    for i, level in enumerate(side[:orderbook_levels]):
+                        levels[i, column] = level["amount"]
+                        levels[i, column + 1] = level["price"]
+                batch.book_meta.append((exchange, symbol, data["timestamp"], data.get("localTimestamp", None)))
+                batch.kinds[n_messages] = BOOK
+                n_book += 1
+            elif data_type == "trade":
+                if data["side"] is None:
+                    logging.warning(f"⚠️ Trade missing 'side' field: {data}")
+                batch.trade_values[n_trade] = (data["price"], data["amount"])
+                batch.trade_meta.append((exchange, symbol, data["id"], data["side"], data["timestamp"], data.get("localTimestamp", None)))
+                batch.kinds[n_messages] = TRADE
+                n_trade += 1
+            else:
+                continue
+            n_messages += 1
+        except Exception as e:
+            # a book that failed halfway may have written some levels
+            if n_book < len(batch.book_levels):
+                batch.book_levels[n_book] = np.nan
+            batch.errors += 1
+            logging.error(f"[PROCESSING ERROR] Failed to decode frame: {e}")
+
+    batch.kinds = batch.kinds[:n_messages]
+    batch.book_levels = batch.book_levels[:n_book]
+    batch.trade_values = batch.trade_values[:n_trade]
+    return batch
+
+class DecodePipeline:
+    """Batches raw frames on the event loop and decodes them in a process pool.
+
+    `submit` never decodes on the loop: frames are sent to the pool every `batch_size`
+    frames or `batch_interval` seconds, with at most `max_in_flight` batches being decoded,
+    and `on_batch` is awaited for the decoded batches in submission order.
+    """
+
+    def __init__(
+        self,
+        on_batch: Callable[[DecodedBatch], Awaitable[None]],
+        workers: int = Config.decode_pool_workers,
+        batch_size: int = Config.decode_batch_size,
+        batch_interval: float = Config.decode_batch_interval,
+        max_in_flight: int = Config.decode_max_in_flight
+    ) -> None:
+        self.on_batch = on_batch
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        # spawned workers do not inherit the event loop (or its threads) of the consumer
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'))
+        self.in_flight: asyncio.Queue[asyncio.Future] = asyncio.Queue(maxsize=max_in_flight)
+        self.frames: list[str | bytes] = []
+        self.first_frame_at = 0.
+        self.batches = 0
+        self.errors = 0
+
+    async def submit(self, frame: str | bytes) -> None:
+        if not self.frames:
+            self.first_frame_at = time.perf_counter()
+        self.frames.append(frame)
+        if len(self.frames) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.frames:
+            return
+        frames, self.frames = self.frames, []
+        future = asyncio.get_running_loop().run_in_executor(self.pool, decode_frames, frames)
+        # blocks the reader when `max_in_flight` batches are already being decoded
+        await self.in_flight.put(future)
+
+    async def flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.batch_interval)
+            if self.frames and time.perf_counter() - self.first_frame_at >= self.batch_interval:
+                await self.flush()
+
+    async def dispatch_results(self) -> None:
+        while True:
+            future = await self.in_flight.get()
+            try:
+                batch: DecodedBatch = await future
+                self.batches += 1
+                self.errors += batch.errors
+                await self.on_batch(batch)
+            except Exception as e:
+                logging.error(f"[❌] Failed to decode or dispatch a batch: {e}")
+            finally:
+                self.in_flight.task_done()
+
+    async def join(self) -> None:
+        """Flushes the pending frames and waits for every batch to be dispatched."""
+        await self.flush()
+        await self.in_flight.join()
+
+    async def run(self) -> None:
+        await asyncio.gather(self.flush_periodically(), self.dispatch_results())
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -6,9 +6,12 @@ import uvloop
 
 from crypto_hft.spot.queue_manager import order_book_queues, trade_queues
 from crypto_hft.spot.websocket_streamer import WebsocketStreamer
+from crypto_hft.spot.consolidated_book import ConsolidatedBookManager
+from crypto_hft.spot.tick_store import TickStore, TickStoreServer
+from crypto_hft.spot.shared_market_data import SharedMarketDataWriter
 from crypto_hft.spot.websocket import WebSocketConsumer
 from crypto_hft.spot.db_writer import PostgreSQLDatabase, QueueProcessor
-from crypto_hft.utils.config import Config
+from crypto_hft.utils.config import get_config
 
 # -----------------------------
 # 🔧 Setup Logging
@@ -28,13 +31,35 @@ logging.basicConfig(
 # -----------------------------
 # ✅ Main Application Logic
 # -----------------------------
-async def main():
+async def main(
+    symbols: list[str] | None = None,
+    websocket_streamer: WebsocketStreamer | None = None,
+    shared_market_data: SharedMarketDataWriter | None = None,
+    tick_store_port: int | None = None
+):
+    """Runs the collector for `symbols` (all of `Config.base_tickers` by default).
+
+    The sharded collector (`supervisor.py`) runs one of these per worker process, with a
+    relay to the supervisor's streamer and a writer attached to the shared memory segments
+    the supervisor created.
+    """
     tasks = []
     logging.info("[+] Starting WebSocket consumer and database writers...")
 
-    config = Config()
-    websocket_streamer = WebsocketStreamer()
-    websocket = WebSocketConsumer(websocket_streamer=websocket_streamer)
+    config = get_config()
+    consolidated_book = ConsolidatedBookManager(config.orderbook_levels)
+    if websocket_streamer is None:
+        websocket_streamer = WebsocketStreamer(consolidated_book=consolidated_book)
+    else:
+        websocket_streamer.consolidated_book = consolidated_book
+    tick_store = TickStore()
+    websocket = WebSocketConsumer(
+        websocket_streamer=websocket_streamer,
+        consolidated_book=consolidated_book,
+        tick_store=tick_store,
+        shared_market_data=shared_market_data or SharedMarketDataWriter(),
+        symbols=symbols
+    )
     db = PostgreSQLDatabase(config)
 
     try:
@@ -46,7 +71,11 @@ async def main():
             asyncio.create_task(websocket.run(), name='websocket_task'),
             asyncio.create_task(queue_processor.batch_insert_order_books(), name='ob_processor'),
             asyncio.create_task(queue_processor.batch_insert_trades(), name='trade_processor'),
+            asyncio.create_task(queue_processor.batch_insert_bars(), name='bar_processor'),
+            asyncio.create_task(queue_processor.batch_insert_bbos(), name='bbo_processor'),
+            asyncio.create_task(queue_processor.report_metrics(websocket_streamer), name='writer_metrics'),
             asyncio.create_task(websocket_streamer.start(), name='websocket_server'),
+            asyncio.create_task(TickStoreServer(tick_store, port=tick_store_port or config.tick_store_port).serve(), name='tick_store_api'),
             # asyncio.create_task(monitor_queues(), name='queue_monitor'),
         ]
 
@@ -73,6 +102,8 @@ async def cleanup(websocket: WebSocketConsumer, queue_processor: QueueProcessor,
     logging.info("[🛑] Cleaning up all components...")
     try:
         await websocket.shutdown()
+        # the rows still buffered, once the consumer stopped producing
+        await queue_processor.flush()
         await queue_processor.shutdown()
         await db.close()
     except Exception as e:
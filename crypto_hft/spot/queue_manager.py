@@ -1,11 +1,11 @@
 # crypto_hft/data_layer/queue_manager.py
-import asyncio
 from crypto_hft.utils.config import Config
+from crypto_hft.ingestion.columnar_buffer import ColumnarBuffer
+from crypto_hft.ingestion.schemas import ORDER_BOOK_SCHEMA, TRADE_SCHEMA, BAR_SCHEMA, BBO_SCHEMA
 
+'''sets up columnar buffers (with the producer side of an asyncio.Queue) for handling order book and trade data for multiple trading symbols'''
 
-config = Config()
-
-'''sets up asynchronous queues for handling order book and trade data for multiple trading symbols'''
-
-order_book_queues: dict[str, asyncio.Queue] = {symbol: asyncio.Queue() for symbol in config.base_tickers}
-trade_queues: dict[str, asyncio.Queue] = {symbol: asyncio.Queue() for symbol in config.base_tickers}
\ No newline at end of file
+order_book_queues: dict[str, ColumnarBuffer] = {symbol: ColumnarBuffer(ORDER_BOOK_SCHEMA) for symbol in Config.base_tickers}
+trade_queues: dict[str, ColumnarBuffer] = {symbol: ColumnarBuffer(TRADE_SCHEMA) for symbol in Config.base_tickers}
+bar_queues: dict[str, ColumnarBuffer] = {symbol: ColumnarBuffer(BAR_SCHEMA) for symbol in Config.base_tickers}
+bbo_queues: dict[str, ColumnarBuffer] = {symbol: ColumnarBuffer(BBO_SCHEMA) for symbol in Config.base_tickers}
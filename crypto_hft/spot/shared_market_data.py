@@ -0,0 +1,265 @@
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from loguru import logger
+from crypto_hft.utils.config import Config
+from crypto_hft.utils.time_utils import iso8601_to_unix
+
+LAYOUT_VERSION = 1
+HEADER_DTYPE = np.dtype([('version', 'u8'), ('n_slots', 'u8'), ('levels', 'u8'), ('depth', 'u8')])
+
+def book_dtype(levels: int) -> np.dtype:
+    return np.dtype([
+        ('ts', 'i8'), # ns, exchange timestamp
+        ('local_ts', 'i8'), # ns, time the record was published
+        ('bid_px', 'f8', (levels,)),
+        ('bid_sz', 'f8', (levels,)),
+        ('ask_px', 'f8', (levels,)),
+        ('ask_sz', 'f8', (levels,)),
+    ])
+
+BBO_DTYPE = np.dtype([
+    ('ts', 'i8'),
+    ('local_ts', 'i8'),
+    ('bid_px', 'f8'),
+    ('bid_sz', 'f8'),
+    ('ask_px', 'f8'),
+    ('ask_sz', 'f8'),
+    ('mid', 'f8'),
+    ('spread', 'f8'),
+])
+
+TRADE_DTYPE = np.dtype([
+    ('ts', 'i8'),
+    ('local_ts', 'i8'),
+    ('price', 'f8'),
+    ('amount', 'f8'),
+    ('side', 'i1'), # 1 buy, -1 sell, 0 unknown
+])
+
+def trades_dtype(depth: int) -> np.dtype:
+    """Per-slot ring of the last `depth` trades, `count` is the number of trades ever written."""
+    return np.dtype([('count', 'u8'), ('trades', TRADE_DTYPE, (depth,))])
+
+def slot_keys(exchanges: list[str] = Config.exchanges, symbols: list[str] = Config.base_tickers) -> list[tuple[str, str]]:
+    """Fixed (exchange, symbol) -> slot layout, shared by the writer and the readers."""
+    return [(exchange, symbol) for exchange in exchanges for symbol in symbols]
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        # readers must not unlink the segment when they exit (python >= 3.13)
+        return shared_memory.SharedMemory(name=name, track=False) # type: ignore
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+class SeqlockSegment:
+    """Fixed-layout NumPy array of records in a shared memory segment, one record per slot.
+
+    Each slot has a sequence counter: the writer makes it odd while the record is being
+    written and even once done, and readers retry until they copy a record with the same
+    even counter before and after the copy. There is a single writer (the collector) and
+    readers never block it.
+    """
+
+    def __init__(self, name: str, dtype: np.dtype, n_slots: int, levels: int, depth: int, create: bool) -> None:
+        self.name = name
+        size = HEADER_DTYPE.itemsize + 8 * n_slots + dtype.itemsize * n_slots
+
+        if create:
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # left over by a collector that crashed
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = _attach(name)
+
+        buf = self.shm.buf
+        self.header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=buf)
+        self.seq = np.ndarray((n_slots,), dtype='u8', buffer=buf, offset=HEADER_DTYPE.itemsize)
+        self.data = np.ndarray((n_slots,), dtype=dtype, buffer=buf, offset=HEADER_DTYPE.itemsize + 8 * n_slots)
+
+        if create:
+            self.seq[:] = 0
+            self.data[:] = np.zeros(1, dtype=dtype)
+            self.header[0] = (LAYOUT_VERSION, n_slots, levels, depth)
+        elif tuple(self.header[0]) != (LAYOUT_VERSION, n_slots, levels, depth):
+            raise ValueError(f'Shared memory segment {name} has layout {tuple(self.header[0])}, expected {(LAYOUT_VERSION, n_slots, levels, depth)}')
+
+    def begin_write(self, slot: int) -> None:
+        self.seq[slot] += 1
+
+    def end_write(self, slot: int) -> None:
+        self.seq[slot] += 1
+
+    def recover(self, slots: list[int]) -> None:
+        """Rounds odd counters of `slots` up to even, for a writer taking over slots whose previous
+        writer died in the middle of a write (readers would otherwise wait for it forever)."""
+        seq = self.seq[slots]
+        self.seq[slots] = seq + (seq & 1)
+
+    def write(self, slot: int, record: tuple) -> None:
+        self.begin_write(slot)
+        self.data[slot] = record
+        self.end_write(slot)
+
+    def read(self, slot: int, retries: int = Config.shm_read_retries) -> tuple[np.void, int] | None:
+        """Consistent copy of the record of `slot` and its version, or None if never written or
+        still being written after `retries` attempts (a writer that died in the middle of a write)."""
+        for _ in range(retries):
+            before = int(self.seq[slot])
+            if before & 1:
+                continue
+            record = self.data[slot].copy()
+            if int(self.seq[slot]) == before:
+                return (record, before) if before else None
+        return None
+
+    def close(self, unlink: bool = False) -> None:
+        # drop the views before closing, the buffer cannot be released while exported
+        del self.header, self.seq, self.data
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+class _SharedMarketData:
+    def __init__(self, prefix: str, levels: int, depth: int, create: bool) -> None:
+        self.keys = slot_keys()
+        self.slots = {key: i for i, key in enumerate(self.keys)}
+        n_slots = len(self.keys)
+
+        self.books = SeqlockSegment(f'{prefix}_books', book_dtype(levels), n_slots, levels, depth, create)
+        self.bbos = SeqlockSegment(f'{prefix}_bbo', BBO_DTYPE, n_slots, levels, depth, create)
+        self.trades = SeqlockSegment(f'{prefix}_trades', trades_dtype(depth), n_slots, levels, depth, create)
+
+class SharedMarketDataWriter(_SharedMarketData):
+    """Publishes the latest books, BBOs and recent trades of the collector to shared memory.
+
+    Local processes (model runners, dashboards, notebooks) read them with
+    `SharedMarketDataReader` without any serialization, and without any cost for the
+    ingestion loop beyond a few array assignments per update.
+
+    With `create=False` the writer attaches to segments created by another process (the
+    sharded collector supervisor) and only publishes `symbols`, so every slot keeps a
+    single writer.
+    """
+
+    def __init__(
+        self,
+        prefix: str = Config.shm_prefix,
+        levels: int = Config.orderbook_levels,
+        depth: int = Config.shm_trades_per_symbol,
+        create: bool = True,
+        symbols: list[str] | None = None
+    ) -> None:
+        super().__init__(prefix, levels, depth, create=create)
+        self.owner = create
+        self.depth = depth
+        if symbols is not None:
+            self.slots = {key: slot for key, slot in self.slots.items() if key[1] in symbols}
+        if not create:
+            # a previous writer of these slots may have died in the middle of a write
+            for segment in (self.books, self.bbos, self.trades):
+                segment.recover(list(self.slots.values()))
+        self._book_keys = [
+            [f"{side}_{i}_{field}" for i in range(levels)]
+            for side, field in (('bid', 'px'), ('bid', 'sz'), ('ask', 'px'), ('ask', 'sz'))
+        ]
+        self._trade_counts = self.trades.data['count']
+        self._trade_rows = self.trades.data['trades']
+        logger.info(f'Publishing market data to shared memory segments {prefix}_*')
+
+    def publish_order_book(self, order_book: dict) -> None:
+        """Publish a processed order book snapshot (see `process_order_book_data`)."""
+        slot = self.slots.get((order_book["exchange"], order_book["symbol"]))
+        if slot is None:
+            return
+
+        nan = np.nan
+        levels = [
+            [nan if (value := order_book[key]) is None else value for key in keys]
+            for keys in self._book_keys
+        ]
+        ts = int(iso8601_to_unix(order_book["timestamp"]) * 1e9)
+        self.books.write(slot, (ts, time.time_ns(), *levels))
+
+    def publish_bbo(self, bbo: dict) -> None:
+        """Publish a BBO event (see `BBOTracker`)."""
+        slot = self.slots.get((bbo["exchange"], bbo["symbol"]))
+        if slot is None:
+            return
+
+        nan = np.nan
+        values = [nan if (v := bbo[k]) is None else v for k in ("bid_px", "bid_sz", "ask_px", "ask_sz", "mid", "spread")]
+        ts = int(iso8601_to_unix(bbo["timestamp"]) * 1e9)
+        self.bbos.write(slot, (ts, time.time_ns(), *values))
+
+    def publish_trade(self, trade: dict) -> None:
+        """Append a processed trade (see `process_trade_data`) to the trade ring of its slot."""
+        slot = self.slots.get((trade["exchange"], trade["symbol"]))
+        if slot is None:
+            return
+
+        side = 1 if trade["side"] == 'buy' else -1 if trade["side"] == 'sell' else 0
+        ts = int(iso8601_to_unix(trade["timestamp"]) * 1e9)
+
+        self.trades.begin_write(slot)
+        count = int(self._trade_counts[slot])
+        self._trade_rows[slot, count % self.depth] = (ts, time.time_ns(), trade["price"], trade["amount"], side)
+        self._trade_counts[slot] = count + 1
+        self.trades.end_write(slot)
+
+    def close(self) -> None:
+        """Close the segments, and remove them if this writer created them (attached readers keep their mapping)."""
+        for segment in (self.books, self.bbos, self.trades):
+            segment.close(unlink=self.owner)
+
+class SharedMarketDataReader(_SharedMarketData):
+    """Reads the market data published by `SharedMarketDataWriter` from another process.
+
+    Reads return a consistent copy of a single record (no decoding), or None if the
+    (exchange, symbol) was never published (or its writer died in the middle of a write).
+    """
+
+    def __init__(self, prefix: str = Config.shm_prefix, levels: int = Config.orderbook_levels, depth: int = Config.shm_trades_per_symbol) -> None:
+        super().__init__(prefix, levels, depth, create=False)
+
+    def _slot(self, exchange: str, symbol: str) -> int:
+        try:
+            return self.slots[(exchange, symbol.upper())]
+        except KeyError:
+            raise KeyError(f'{exchange} {symbol} is not published to shared memory')
+
+    def read_order_book(self, exchange: str, symbol: str) -> np.void | None:
+        result = self.books.read(self._slot(exchange, symbol))
+        return None if result is None else result[0]
+
+    def read_bbo(self, exchange: str, symbol: str) -> np.void | None:
+        result = self.bbos.read(self._slot(exchange, symbol))
+        return None if result is None else result[0]
+
+    def read_trades(self, exchange: str, symbol: str) -> np.ndarray:
+        """Last trades (oldest first), up to the ring depth."""
+        result = self.trades.read(self._slot(exchange, symbol))
+        if result is None:
+            return np.empty(0, dtype=TRADE_DTYPE)
+
+        record, _ = result
+        count, trades = int(record['count']), record['trades']
+        depth = len(trades)
+        if count <= depth:
+            return trades[:count]
+        start = count % depth
+        return np.concatenate([trades[start:], trades[:start]])
+
+    def version(self, kind: str, exchange: str, symbol: str) -> int:
+        """Sequence counter of a slot (`books`, `bbos` or `trades`), it changes on every update."""
+        segment: SeqlockSegment = getattr(self, kind)
+        return int(segment.seq[self._slot(exchange, symbol)])
+
+    def close(self) -> None:
+        for segment in (self.books, self.bbos, self.trades):
+            segment.close()
@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+import uvloop
+from loguru import logger
+from crypto_hft.utils.config import Config
+from crypto_hft.spot.queue_manager import order_book_queues, trade_queues, bar_queues, bbo_queues
+from crypto_hft.spot.websocket_streamer import WebsocketStreamer
+from crypto_hft.spot.shared_market_data import SharedMarketDataWriter
+
+'''
+Sharded collector: the supervisor splits the tracked symbols across worker processes, each
+running the full single-process collector (`main_loop.main`) for its shard with its own
+database pool and writers. Workers relay their streamer updates to the supervisor, which
+keeps serving the single websocket endpoint on port 9999, restarts dead or silent workers
+and aggregates their metrics.
+'''
+
+def partition_symbols(symbols: list[str], n_workers: int) -> list[list[str]]:
+    """Round-robin split of the symbols across workers.
+
+    A symbol is collected on every exchange by the same worker, so its consolidated book
+    and bars stay complete.
+    """
+    n_shards = max(1, min(n_workers, len(symbols)))
+    return [symbols[i::n_shards] for i in range(n_shards)]
+
+class StreamerRelay(WebsocketStreamer):
+    """Takes the place of the `WebsocketStreamer` inside a worker process.
+
+    Updates are encoded in the worker and sent to the supervisor, but only for the tokens
+    that currently have subscribers, and are dropped (and counted) if the supervisor falls
+    behind. Instead of serving websockets, `start` answers the supervisor's control messages
+    (subscriptions, consolidated book queries) and reports the worker metrics.
+    """
+
+    def __init__(self, worker_id: int, outbox: mp.Queue, inbox: mp.Queue) -> None:
+        super().__init__()
+        self.worker_id = worker_id
+        self.outbox = outbox
+        self.inbox = inbox
+        self.subscriptions: set[str] = set()
+        self.updates = 0
+        self.relayed = 0
+        self.dropped = 0
+
+    def send_update(self, token: str, data: dict) -> None:
+        self.updates += 1
+        if 'all' not in self.subscriptions and token not in self.subscriptions:
+            return
+        try:
+            self.outbox.put_nowait(('stream', token, self.json_encoder.encode(data)))
+            self.relayed += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def metrics(self) -> dict:
+        queued = sum(
+            q.qsize()
+            for queues in (order_book_queues, trade_queues, bar_queues, bbo_queues)
+            for q in queues.values()
+        )
+        return {
+            'updates': self.updates,
+            'relayed': self.relayed,
+            'dropped': self.dropped,
+            'queued': queued,
+        }
+
+    async def serve_inbox(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # short timeout so the executor thread does not outlive the event loop
+                message = await loop.run_in_executor(None, self.inbox.get, True, 1)
+            except queue.Empty:
+                continue
+
+            if message[0] == 'subscriptions':
+                self.subscriptions = message[1]
+            elif message[0] == 'query':
+                _, request_id, query = message
+                response = await self.answer_query(query)
+                try:
+                    self.outbox.put_nowait(('query_result', request_id, response))
+                except queue.Full:
+                    logger.warning(f'Worker {self.worker_id}: outbox full, dropping query result {request_id}')
+
+    async def report_metrics(self) -> None:
+        while True:
+            try:
+                self.outbox.put_nowait(('metrics', self.worker_id, self.metrics()))
+            except queue.Full:
+                pass
+            await asyncio.sleep(Config.supervisor_metrics_interval)
+
+    async def start(self) -> None:
+        await asyncio.gather(self.serve_inbox(), self.report_metrics())
+
+def run_worker(worker_id: int, symbols: list[str], outbox: mp.Queue, inbox: mp.Queue) -> None:
+    """Entry point of a worker process."""
+    # imported here so the supervisor process does not load the collector stack
+    from crypto_hft.spot.main_loop import main
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    try:
+        asyncio.run(main(
+            symbols=symbols,
+            websocket_streamer=StreamerRelay(worker_id, outbox, inbox),
+            shared_market_data=SharedMarketDataWriter(create=False, symbols=symbols),
+            tick_store_port=Config.supervisor_tick_store_base_port + worker_id
+        ))
+    except KeyboardInterrupt:
+        pass
+
+class Worker:
+    """Supervisor-side state of a worker process."""
+
+    def __init__(self, worker_id: int, symbols: list[str]) -> None:
+        self.worker_id = worker_id
+        self.symbols = symbols
+        self.process: mp.process.BaseProcess | None = None
+        self.inbox: mp.Queue | None = None
+        self.started_at = 0.
+        self.restarts = 0
+        self.failures = 0 # consecutive, drives the restart backoff
+        self.restart_at: float | None = None
+        self.last_heartbeat: float | None = None
+        self.metrics: dict = {}
+        self.updates_per_sec = 0.
+
+    def is_healthy(self, now: float) -> bool:
+        if self.process is None or not self.process.is_alive():
+            return False
+        last_seen = self.last_heartbeat or self.started_at
+        return now - last_seen < Config.supervisor_heartbeat_timeout
+
+    def summary(self, now: float) -> dict:
+        process = self.process if self.process is not None and self.process.is_alive() else None
+        alive = process is not None
+        return {
+            'worker_id': self.worker_id,
+            'pid': process.pid if process is not None else None,
+            'symbols': self.symbols,
+            'alive': alive,
+            'healthy': self.is_healthy(now),
+            'restarts': self.restarts,
+            'uptime': now - self.started_at if alive else 0.,
+            'updates_per_sec': self.updates_per_sec,
+            **self.metrics,
+        }
+
+class ShardedStreamer(WebsocketStreamer):
+    """Public websocket endpoint of the sharded collector, queries are routed to the worker owning the symbol."""
+
+    def __init__(self, supervisor: 'Supervisor') -> None:
+        super().__init__()
+        self.supervisor = supervisor
+
+    async def answer_query(self, msg: str | bytes) -> bytes | None:
+        try:
+            symbol = self.json_decoder.decode(msg)['symbol'].upper()
+            worker = self.supervisor.workers[self.supervisor.owner[symbol]]
+        except Exception as e:
+            return self.json_encoder.encode({'type': 'error', 'error': f'Invalid query: {e}'})
+        return await self.supervisor.query(worker, msg)
+
+class Supervisor:
+    def __init__(self, n_workers: int = Config.supervisor_workers, symbols: list[str] | None = None) -> None:
+        self.ctx = mp.get_context('spawn')
+        self.outbox: mp.Queue = self.ctx.Queue(maxsize=Config.supervisor_relay_queue_size)
+        self.workers = [
+            Worker(worker_id, shard)
+            for worker_id, shard in enumerate(partition_symbols(symbols or Config.base_tickers, n_workers))
+        ]
+        self.owner = {symbol: worker.worker_id for worker in self.workers for symbol in worker.symbols}
+        self.streamer = ShardedStreamer(self)
+        self.subscriptions: set[str] = set()
+        self.pending_queries: dict[int, asyncio.Future] = {}
+        self.request_ids = itertools.count()
+        self.stopping = threading.Event()
+
+    def start_worker(self, worker: Worker) -> None:
+        worker.inbox = self.ctx.Queue()
+        worker.inbox.put(('subscriptions', self.subscriptions))
+        process = self.ctx.Process(
+            target=run_worker,
+            args=(worker.worker_id, worker.symbols, self.outbox, worker.inbox),
+            name=f'collector-{worker.worker_id}'
+        )
+        process.start()
+        worker.process = process
+        worker.started_at = time.time()
+        worker.last_heartbeat = None
+        worker.restart_at = None
+        logger.info(f'Started worker {worker.worker_id} (pid {process.pid}) for {", ".join(worker.symbols)}')
+
+    def read_outbox(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Thread forwarding the workers' messages to the event loop."""
+        while not self.stopping.is_set():
+            try:
+                message = self.outbox.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            loop.call_soon_threadsafe(self.dispatch, message)
+
+    def dispatch(self, message: tuple) -> None:
+        kind = message[0]
+        if kind == 'stream':
+            self.streamer.send_encoded(message[1], message[2])
+        elif kind == 'metrics':
+            _, worker_id, metrics = message
+            worker = self.workers[worker_id]
+            now = time.time()
+            if worker.last_heartbeat is not None and 'updates' in worker.metrics:
+                elapsed = max(now - worker.last_heartbeat, 1e-9)
+                worker.updates_per_sec = max(metrics['updates'] - worker.metrics['updates'], 0) / elapsed
+            worker.last_heartbeat = now
+            worker.metrics = metrics
+            if now - worker.started_at > Config.supervisor_max_restart_backoff:
+                worker.failures = 0
+        elif kind == 'query_result':
+            _, request_id, response = message
+            future = self.pending_queries.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_result(response)
+
+    async def query(self, worker: Worker, msg: str | bytes) -> bytes | None:
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending_queries[request_id] = future
+        try:
+            assert worker.inbox is not None
+            worker.inbox.put(('query', request_id, msg))
+            return await asyncio.wait_for(future, timeout=Config.supervisor_query_timeout)
+        except asyncio.TimeoutError:
+            return self.streamer.json_encoder.encode({'type': 'error', 'error': f'Worker {worker.worker_id} did not answer'})
+        finally:
+            self.pending_queries.pop(request_id, None)
+
+    async def monitor_workers(self) -> None:
+        """Restarts dead workers with exponential backoff, kills workers that stopped reporting."""
+        while True:
+            await asyncio.sleep(1)
+            now = time.time()
+
+            for worker in self.workers:
+                assert worker.process is not None
+                if not worker.process.is_alive():
+                    if worker.restart_at is None:
+                        backoff = min(2 ** worker.failures, Config.supervisor_max_restart_backoff)
+                        worker.failures += 1
+                        worker.restart_at = now + backoff
+                        logger.error(f'Worker {worker.worker_id} exited with code {worker.process.exitcode}, restarting in {backoff}s')
+                    elif now >= worker.restart_at:
+                        worker.restarts += 1
+                        self.start_worker(worker)
+                elif not worker.is_healthy(now):
+                    logger.error(f'Worker {worker.worker_id} sent no metrics for {Config.supervisor_heartbeat_timeout}s, terminating it')
+                    worker.process.terminate()
+
+            tokens = self.streamer.subscribed_tokens()
+            if tokens != self.subscriptions:
+                self.subscriptions = tokens
+                for worker in self.workers:
+                    if worker.inbox is not None:
+                        worker.inbox.put(('subscriptions', tokens))
+
+    def metrics(self) -> dict:
+        now = time.time()
+        workers = [worker.summary(now) for worker in self.workers]
+        return {
+            'type': 'supervisor_metrics',
+            'timestamp': now,
+            'workers': workers,
+            'healthy_workers': sum(w['healthy'] for w in workers),
+            'updates_per_sec': sum(w['updates_per_sec'] for w in workers),
+            'queued': sum(w.get('queued', 0) for w in workers),
+            'dropped': sum(w.get('dropped', 0) for w in workers),
+        }
+
+    async def report_metrics(self) -> None:
+        while True:
+            await asyncio.sleep(Config.supervisor_metrics_interval)
+            metrics = self.metrics()
+            logger.info(
+                f"{metrics['healthy_workers']}/{len(self.workers)} workers healthy, "
+                f"{metrics['updates_per_sec']:.0f} updates/s, {metrics['queued']} queued, {metrics['dropped']} dropped"
+            )
+            self.streamer.send_update('supervisor_metrics', metrics)
+
+    def stop_workers(self) -> None:
+        self.stopping.set()
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            # workers receive the SIGINT of the terminal too, give them time to flush their queues
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                logger.warning(f'Worker {worker.worker_id} did not exit, terminating it')
+                worker.process.terminate()
+                worker.process.join()
+
+    async def run(self) -> None:
+        # the supervisor owns the shared memory segments, workers attach to them
+        shared_market_data = SharedMarketDataWriter()
+        for worker in self.workers:
+            self.start_worker(worker)
+
+        loop = asyncio.get_running_loop()
+        reader = threading.Thread(target=self.read_outbox, args=(loop,), name='outbox_reader', daemon=True)
+        reader.start()
+
+        try:
+            await asyncio.gather(
+                self.streamer.start(),
+                self.monitor_workers(),
+                self.report_metrics(),
+            )
+        finally:
+            self.stop_workers()
+            shared_market_data.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the spot collector sharded across worker processes.')
+    parser.add_argument('--workers', type=int, default=Config.supervisor_workers, help='number of worker processes')
+    args = parser.parse_args()
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    try:
+        asyncio.run(Supervisor(n_workers=args.workers).run())
+    except KeyboardInterrupt:
+        logger.info('Supervisor stopped')
@@ -0,0 +1,209 @@
+import asyncio
+import time
+import numpy as np
+import msgspec
+from aiohttp import web
+from loguru import logger
+from crypto_hft.utils.config import Config
+from crypto_hft.utils.time_utils import iso8601_to_unix
+
+SIDES = {'buy': 1, 'sell': -1}
+
+TRADE_DTYPE = np.dtype([
+    ('local_ts', 'i8'), # ns, time the row was stored
+    ('ts', 'i8'), # ns, exchange timestamp
+    ('price', 'f8'),
+    ('amount', 'f8'),
+    ('side', 'i1'), # 1 buy, -1 sell, 0 unknown
+])
+
+def book_dtype(levels: int) -> np.dtype:
+    """Row of an order book ring buffer, missing levels are NaN."""
+    return np.dtype([
+        ('local_ts', 'i8'),
+        ('ts', 'i8'),
+        ('bid_px', 'f8', (levels,)),
+        ('bid_sz', 'f8', (levels,)),
+        ('ask_px', 'f8', (levels,)),
+        ('ask_sz', 'f8', (levels,)),
+    ])
+
+class RingBuffer:
+    """Fixed-capacity ring buffer of records indexed by the time they were stored.
+
+    The records (and their timestamps) are written twice, at `i` and `i + capacity`, so
+    the last `capacity` rows are always contiguous in memory: every query returns a
+    zero-copy view, with no concatenation on wrap-around. Views are overwritten once
+    `capacity` new rows are appended, copy them if they are kept around.
+    """
+
+    def __init__(self, dtype: np.dtype, capacity: int) -> None:
+        self.capacity = capacity
+        self.data = np.zeros(2 * capacity, dtype=dtype)
+        self.local_ts = np.zeros(2 * capacity, dtype='i8')
+        self.count = 0 # total number of rows ever appended
+
+    def append(self, row: tuple) -> None:
+        """Append a row, whose first field is the `local_ts` index (ns, non-decreasing)."""
+        i = self.count % self.capacity
+        self.data[i] = row
+        self.data[i + self.capacity] = row
+        self.local_ts[i] = self.local_ts[i + self.capacity] = row[0]
+        self.count += 1
+
+    def _bounds(self) -> tuple[int, int]:
+        size = min(self.count, self.capacity)
+        start = self.count % self.capacity if self.count >= self.capacity else 0
+        return start, start + size
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def latest(self, n: int) -> np.ndarray:
+        """View of the last `n` rows (oldest first)."""
+        start, end = self._bounds()
+        return self.data[max(start, end - n):end]
+
+    def between(self, start_ns: int, end_ns: int) -> np.ndarray:
+        """View of the rows stored between `start_ns` and `end_ns` (inclusive)."""
+        start, end = self._bounds()
+        ts = self.local_ts[start:end]
+        lo = int(np.searchsorted(ts, start_ns, side='left'))
+        hi = int(np.searchsorted(ts, end_ns, side='right'))
+        return self.data[start + lo:start + hi]
+
+class TickStore:
+    """In-memory store of the recent trades and books of the collector.
+
+    Holds one `RingBuffer` per (exchange, symbol, data type), where data type is `trade`
+    or `book`, so recent-history questions are answered from memory instead of Postgres.
+    """
+
+    def __init__(
+        self,
+        trade_capacity: int = Config.tick_store_trade_capacity,
+        book_capacity: int = Config.tick_store_book_capacity,
+        levels: int = Config.orderbook_levels
+    ) -> None:
+        self.capacities = {'trade': trade_capacity, 'book': book_capacity}
+        self.dtypes = {'trade': TRADE_DTYPE, 'book': book_dtype(levels)}
+        self.buffers: dict[tuple[str, str, str], RingBuffer] = {}
+        self._last_local_ts = 0
+        self._book_keys = [
+            [f"{side}_{i}_{field}" for i in range(levels)]
+            for side, field in (('bid', 'px'), ('bid', 'sz'), ('ask', 'px'), ('ask', 'sz'))
+        ]
+
+    def buffer(self, exchange: str, symbol: str, data_type: str) -> RingBuffer:
+        key = (exchange, symbol, data_type)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = self.buffers[key] = RingBuffer(self.dtypes[data_type], self.capacities[data_type])
+        return buffer
+
+    def _now_ns(self) -> int:
+        # guard against the wall clock going backwards, the index must be sorted
+        self._last_local_ts = max(time.time_ns(), self._last_local_ts)
+        return self._last_local_ts
+
+    def add_trade(self, trade: dict) -> None:
+        """Store a processed trade (see `process_trade_data`)."""
+        self.buffer(trade["exchange"], trade["symbol"], 'trade').append((
+            self._now_ns(),
+            int(iso8601_to_unix(trade["timestamp"]) * 1e9),
+            trade["price"],
+            trade["amount"],
+            SIDES.get(trade["side"], 0),
+        ))
+
+    def add_order_book(self, order_book: dict) -> None:
+        """Store a processed order book snapshot (see `process_order_book_data`)."""
+        nan = np.nan
+        levels = [
+            [nan if (value := order_book[key]) is None else value for key in keys]
+            for keys in self._book_keys
+        ]
+        self.buffer(order_book["exchange"], order_book["symbol"], 'book').append((
+            self._now_ns(),
+            int(iso8601_to_unix(order_book["timestamp"]) * 1e9),
+            *levels,
+        ))
+
+    def query(self, exchange: str, symbol: str, data_type: str, start: float, end: float | None = None) -> np.ndarray:
+        """Zero-copy view of the rows stored between `start` and `end` (unix seconds, default now),
+        empty for an (exchange, symbol) never stored (queries do not allocate buffers)."""
+        buffer = self.buffers.get((exchange, symbol, data_type))
+        if buffer is None:
+            return np.empty(0, dtype=self.dtypes[data_type])
+        end_ns = time.time_ns() if end is None else int(end * 1e9)
+        return buffer.between(int(start * 1e9), end_ns)
+
+    def lookback(self, exchange: str, symbol: str, data_type: str, seconds: float) -> np.ndarray:
+        """Zero-copy view of the rows stored in the last `seconds` seconds."""
+        return self.query(exchange, symbol, data_type, time.time() - seconds)
+
+class TickStoreServer:
+    """Local HTTP API serving the `TickStore`.
+
+    * `GET /ticks` lists the available (exchange, symbol, data type) buffers
+    * `GET /ticks/{exchange}/{symbol}/{data_type}?start=...&end=...` or `?lookback=<seconds>`
+      returns the raw rows, with the NumPy dtype in the `X-Dtype` header (see `decode_ticks`)
+    """
+
+    def __init__(self, tick_store: TickStore, host: str = 'localhost', port: int = Config.tick_store_port) -> None:
+        self.tick_store = tick_store
+        self.host = host
+        self.port = port
+        self.json_encoder = msgspec.json.Encoder()
+
+    async def list_buffers(self, request: web.Request) -> web.Response:
+        keys = [
+            {'exchange': exchange, 'symbol': symbol, 'data_type': data_type, 'rows': len(buffer)}
+            for (exchange, symbol, data_type), buffer in self.tick_store.buffers.items()
+        ]
+        return web.Response(body=self.json_encoder.encode(keys), content_type='application/json')
+
+    async def get_ticks(self, request: web.Request) -> web.Response:
+        exchange, symbol, data_type = (request.match_info[k] for k in ('exchange', 'symbol', 'data_type'))
+        if data_type not in self.tick_store.dtypes:
+            raise web.HTTPNotFound(text=f'Unknown data type {data_type}')
+        if (exchange, symbol, data_type) not in self.tick_store.buffers:
+            raise web.HTTPNotFound(text=f'No {data_type} rows for {exchange} {symbol}')
+
+        params = request.query
+        try:
+            if 'lookback' in params:
+                rows = self.tick_store.lookback(exchange, symbol, data_type, float(params['lookback']))
+            else:
+                end = float(params['end']) if 'end' in params else None
+                rows = self.tick_store.query(exchange, symbol, data_type, float(params.get('start', 0)), end)
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+
+        return web.Response(
+            body=rows.tobytes(),
+            content_type='application/octet-stream',
+            headers={'X-Dtype': self.json_encoder.encode(rows.dtype.descr).decode(), 'X-Rows': str(len(rows))}
+        )
+
+    async def serve(self) -> None:
+        app = web.Application()
+        app.router.add_get('/ticks', self.list_buffers)
+        app.router.add_get('/ticks/{exchange}/{symbol}/{data_type}', self.get_ticks)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, self.port)
+        await site.start()
+        logger.info(f"Tick store API listening on http://{self.host}:{self.port}/ticks")
+
+        try:
+            while True:
+                await asyncio.sleep(3600)
+        finally:
+            await runner.cleanup()
+
+def decode_ticks(body: bytes, dtype_header: str) -> np.ndarray:
+    """Decode a `/ticks/...` response of `TickStoreServer` into a structured array (no copy)."""
+    descr = [tuple(field) for field in msgspec.json.decode(dtype_header)]
+    return np.frombuffer(body, dtype=np.lib.format.descr_to_dtype(descr))
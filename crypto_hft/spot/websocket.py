@@ -4,11 +4,18 @@ import aiohttp
 import urllib.parse
 import msgspec
 import logging
-from crypto_hft.utils.config import Config
+from crypto_hft.utils.config import get_config
 from crypto_hft.utils.symbol_mapper import EXCHANGE_SYMBOLS, REVERSE_SYMBOL_MAP
 from crypto_hft.spot.data_processor import process_order_book_data, process_trade_data
-from crypto_hft.spot.queue_manager import order_book_queues, trade_queues
+from crypto_hft.spot.queue_manager import order_book_queues, trade_queues, bar_queues, bbo_queues
 from crypto_hft.spot.websocket_streamer import WebsocketStreamer
+from crypto_hft.spot.bar_builder import BarBuilder
+from crypto_hft.spot.bbo import BBOTracker
+from crypto_hft.spot.consolidated_book import ConsolidatedBookManager
+from crypto_hft.spot.tick_store import TickStore
+from crypto_hft.spot.shared_market_data import SharedMarketDataWriter
+from crypto_hft.spot.decode_pool import DecodePipeline, DecodedBatch
+from crypto_hft.ingestion.columnar_buffer import ColumnarBuffer
 from loguru import logger
 
 DRY_RUN = False
@@ -20,9 +27,23 @@ logging.basicConfig(
 )
 
 class WebSocketConsumer:
-    def __init__(self, websocket_streamer: WebsocketStreamer) -> None:
-        self.config = Config()
+    def __init__(
+        self,
+        websocket_streamer: WebsocketStreamer,
+        consolidated_book: ConsolidatedBookManager | None = None,
+        tick_store: TickStore | None = None,
+        shared_market_data: SharedMarketDataWriter | None = None,
+        symbols: list[str] | None = None
+    ) -> None:
+        self.config = get_config()
+        # subset of `Config.base_tickers` streamed by this consumer (all of them by default)
+        self.symbols: list[str] = symbols if symbols is not None else self.config.base_tickers
         self.websocket_streamer = websocket_streamer
+        self.consolidated_book = consolidated_book or ConsolidatedBookManager(self.config.orderbook_levels)
+        self.tick_store = tick_store
+        self.shared_market_data = shared_market_data
+        self.bar_builder = BarBuilder(self.config.bar_resolutions)
+        self.bbo_tracker = BBOTracker()
         self.json_encoder = msgspec.json.Encoder()
         self.json_decoder = msgspec.json.Decoder()
         self.shutdown_event = asyncio.Event()
@@ -30,13 +51,18 @@ class WebSocketConsumer:
         self.ws_url: str = self.build_ws_url()
         self.orderbook_counter = 0
         self.trade_counter = 0
+        self.dispatch_errors = 0 # messages of decoded batches which failed to dispatch
         self.first_raw_logged = False
+        # pipeline mode, frames are decoded and normalized in a process pool
+        self.decode_pipeline: DecodePipeline | None = (
+            DecodePipeline(self.dispatch_batch) if self.config.decode_pool_workers > 0 else None
+        )
     
     def build_ws_url(self) -> str:
         """Constructs the WebSocket URL with properly formatted symbols."""
         options_data : list = [
             {"exchange": ex,
-            "symbols": EXCHANGE_SYMBOLS.get(ex, []),
+            "symbols": [symbol for symbol in EXCHANGE_SYMBOLS.get(ex, []) if REVERSE_SYMBOL_MAP[ex][symbol.upper()] in self.symbols],
             "dataTypes": self.config.data_types}
             for ex in self.config.exchanges
         ]
@@ -62,7 +88,11 @@ class WebSocketConsumer:
                         async for msg in websocket:
                             if self.shutdown_event.is_set():
                                 return
-                            await self.handle_message(msg)
+                            if self.decode_pipeline is not None and msg.type == aiohttp.WSMsgType.TEXT:
+                                self.message_counter += 1
+                                await self.decode_pipeline.submit(msg.data)
+                            else:
+                                await self.handle_message(msg)
 
             except aiohttp.ClientConnectionError as e:
                 retries += 1
@@ -85,6 +115,7 @@ class WebSocketConsumer:
         """Handles incoming WebSocket messages and processes them accordingly."""
         try:
             if msg.type == aiohttp.WSMsgType.TEXT:
+                self.message_counter += 1
                 # Process the message when it's of type TEXT
                 data :dict = self.json_decoder.decode(msg.data)
                 #if not self.first_raw_logged:
@@ -131,40 +162,116 @@ class WebSocketConsumer:
         processed_data = None
 
         if data_type == "book_snapshot":
+            self.orderbook_counter += 1
             processed_data = process_order_book_data(data, standardized_symbol)
         elif data_type == "trade":
+            self.trade_counter += 1
             processed_data = process_trade_data(data, standardized_symbol)
 
         if processed_data:
-            # Log only the first and every 5000th queued order book/trade message
-            
-            #logging.info(f"[PROCESSED MESSAGE] {data_type.upper()} {standardized_symbol}: {processed_data}")
-
-            # Determine the correct queue and enqueue data
-            # logger.info(f'sending update to the websocket streamer for {standardized_symbol} - data:\n{processed_data}')
-            self.websocket_streamer.send_update(standardized_symbol.lower(), processed_data)
-
-            if DRY_RUN: 
-                # logger.info('code is running in dry run mode, not sending data to the queue')
-                return
-            queue = order_book_queues.get(standardized_symbol) if data_type == "book_snapshot" else trade_queues.get(standardized_symbol)
-
-            if queue:
-                await queue.put(processed_data)
-                #if (data_type == "book_snapshot" and (self.orderbook_counter == 1 or self.orderbook_counter % 5000 == 0)) or \
-                #(data_type == "trade" and (self.trade_counter == 1 or self.trade_counter % 5000 == 0)):
-                    #logging.info(f"[QUEUED {data_type.upper()} MESSAGE {self.orderbook_counter if data_type == 'book_snapshot' else self.trade_counter}] {standardized_symbol}: {processed_data}")
-                #logging.info(f"[QUEUED MESSAGE] {data_type.upper()} {standardized_symbol}: {processed_data}")
+            await self.dispatch(data_type, standardized_symbol, processed_data)
+
+    async def dispatch(self, data_type: str, standardized_symbol: str, processed_data: dict) -> None:
+        """Derives, streams and queues a normalized book snapshot or trade."""
+        if data_type == "book_snapshot":
+            if bbo := self.bbo_tracker.update(processed_data):
+                if self.shared_market_data is not None:
+                    self.shared_market_data.publish_bbo(bbo)
+                await self.publish_derived("bbo", bbo, bbo_queues)
+
+            # deeper levels can change without the BBO moving, so the consolidated book sees every snapshot
+            if consolidated_bbo := self.consolidated_book.update(processed_data):
+                self.websocket_streamer.send_update(f"consolidated_{standardized_symbol.lower()}", consolidated_bbo)
+
+            if self.tick_store is not None:
+                self.tick_store.add_order_book(processed_data)
+
+            if self.shared_market_data is not None:
+                self.shared_market_data.publish_order_book(processed_data)
+        elif data_type == "trade":
+            for bar in self.bar_builder.update(processed_data):
+                await self.publish_derived("bars", bar, bar_queues)
+
+            if self.tick_store is not None:
+                self.tick_store.add_trade(processed_data)
+
+            if self.shared_market_data is not None:
+                self.shared_market_data.publish_trade(processed_data)
+
+        # Log only the first and every 5000th queued order book/trade message
+        
+        #logging.info(f"[PROCESSED MESSAGE] {data_type.upper()} {standardized_symbol}: {processed_data}")
+
+        # Determine the correct queue and enqueue data
+        # logger.info(f'sending update to the websocket streamer for {standardized_symbol} - data:\n{processed_data}')
+        self.websocket_streamer.send_update(standardized_symbol.lower(), processed_data)
+
+        if DRY_RUN: 
+            # logger.info('code is running in dry run mode, not sending data to the queue')
+            return
+        queue = order_book_queues.get(standardized_symbol) if data_type == "book_snapshot" else trade_queues.get(standardized_symbol)
+
+        if queue:
+            await queue.put(processed_data)
+            #if (data_type == "book_snapshot" and (self.orderbook_counter == 1 or self.orderbook_counter % 5000 == 0)) or \
+            #(data_type == "trade" and (self.trade_counter == 1 or self.trade_counter % 5000 == 0)):
+                #logging.info(f"[QUEUED {data_type.upper()} MESSAGE {self.orderbook_counter if data_type == 'book_snapshot' else self.trade_counter}] {standardized_symbol}: {processed_data}")
+            #logging.info(f"[QUEUED MESSAGE] {data_type.upper()} {standardized_symbol}: {processed_data}")
+        else:
+            logging.warning(f"[WARNING] No queue found for {standardized_symbol}")
+
+    async def dispatch_batch(self, batch: DecodedBatch) -> None:
+        """Dispatches a batch decoded by the pipeline, in arrival order."""
+        for i, (data_type, standardized_symbol, processed_data) in enumerate(batch.messages(), 1):
+            # let the reader and the writers run during large batches
+            if i % 64 == 0:
+                await asyncio.sleep(0)
+            if data_type == "book_snapshot":
+                self.orderbook_counter += 1
             else:
-                logging.warning(f"[WARNING] No queue found for {standardized_symbol}")
+                self.trade_counter += 1
+            # a failing message must not drop the rest of the batch
+            try:
+                await self.dispatch(data_type, standardized_symbol, processed_data)
+            except Exception as e:
+                self.dispatch_errors += 1
+                logging.error(f"[❌] Failed to dispatch {data_type} {standardized_symbol}: {e}")
+
+    async def publish_derived(self, kind: str, event: dict, queues: dict[str, ColumnarBuffer]) -> None:
+        """Send a derived event (bar, BBO) to its `{kind}_{symbol}` streamer channel and to its writer queue."""
+        symbol: str = event["symbol"]
+        self.websocket_streamer.send_update(f"{kind}_{symbol.lower()}", event)
+
+        if DRY_RUN:
+            return
+        queue = queues.get(symbol)
+        if queue:
+            await queue.put(event)
+
+    async def close_expired_bars(self) -> None:
+        """Periodically complete the bars of symbols that stopped trading."""
+        while not self.shutdown_event.is_set():
+            await asyncio.sleep(1)
+            for bar in self.bar_builder.close_expired():
+                await self.publish_derived("bars", bar, bar_queues)
 
     async def run(self) -> None:
-        await self.connect()
+        tasks = [self.connect(), self.close_expired_bars()]
+        if self.decode_pipeline is not None:
+            tasks.append(self.decode_pipeline.run())
+        await asyncio.gather(*tasks)
 
     async def shutdown(self)-> None:
         logging.info("[!] Shutting down WebSocket Consumer...")
         self.shutdown_event.set()
 
+        if self.decode_pipeline is not None:
+            self.decode_pipeline.shutdown()
+
+        if self.shared_market_data is not None:
+            self.shared_market_data.close()
+            self.shared_market_data = None
+
 # if __name__ == "__main__":
 #     consumer = WebSocketConsumer()
 #     try:
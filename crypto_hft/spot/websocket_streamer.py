@@ -4,15 +4,20 @@ import asyncio
 from loguru import logger
 import msgspec
 import numpy as np
+from crypto_hft.spot.consolidated_book import ConsolidatedBookManager
+from crypto_hft.utils.config import Config
 
 class WebsocketStreamer(): 
-    def __init__(self) -> None: 
+    def __init__(self, consolidated_book: ConsolidatedBookManager | None = None) -> None: 
         # connections is a dict mapping the subscribed tokens to the websocket
         # server connections
         self.connections: dict[str, set[websockets.ServerConnection]] = {
             'all': set(),
         }
         self.json_encoder = msgspec.json.Encoder()
+        self.json_decoder = msgspec.json.Decoder()
+        # when set, clients can query the consolidated book (see `handle_query`)
+        self.consolidated_book = consolidated_book
 
     def send_update(self, token: str, data: dict) -> None: 
         all_users = self.connections['all']
@@ -23,6 +28,16 @@ class WebsocketStreamer():
             # logger.info(f"Sending update to {len(users)} users for token {token}")
             broadcast(users, self.json_encoder.encode(data))
 
+    def send_encoded(self, token: str, payload: bytes) -> None:
+        """Same as `send_update`, for a message that was already JSON-encoded (e.g. by a worker process)."""
+        users = self.connections['all'].union(self.connections.get(token, set()))
+        if len(users) > 0:
+            broadcast(users, payload)
+
+    def subscribed_tokens(self) -> set[str]:
+        """Tokens with at least one connected user (`all` included)."""
+        return {token for token, users in self.connections.items() if users}
+
     async def handler(self, ws: websockets.ServerConnection) -> None: 
         # logger.info(path)
         req = ws.request
@@ -41,13 +56,54 @@ class WebsocketStreamer():
         
         try: 
             async for msg in ws: 
-                logger.info(f'Received message: {str(msg)}')
+                response = await self.answer_query(msg)
+                if response is None:
+                    logger.info(f'Received message: {str(msg)}')
+                    continue
+                await ws.send(response)
         except Exception as e: 
             logger.error(f"Error in WebSocket handler: {e}")
         finally: 
             logger.info(f"Unsubscribing user from {path}")
             self.connections[subscribed_path].remove(ws)
             
+    async def answer_query(self, msg: str | bytes) -> bytes | None:
+        """Encoded answer to a client message, None if the streamer does not answer queries."""
+        if self.consolidated_book is None:
+            return None
+        return self.json_encoder.encode(self.handle_query(msg))
+
+    def handle_query(self, msg: str | bytes) -> dict:
+        """Answer a client query on the consolidated book.
+
+        Queries are JSON objects with a `type` and a `symbol` (e.g. `BTC_USDT`):
+        * `{"type": "consolidated_bbo", "symbol": ...}`
+        * `{"type": "depth_at_price", "symbol": ..., "side": "bid" | "ask", "price": ...}`
+        * `{"type": "cumulative_size", "symbol": ..., "side": "bid" | "ask", "price": ...}`
+        * `{"type": "ladder", "symbol": ..., "side": "bid" | "ask", "depth": ...}` (`Config.orderbook_levels` by default)
+        """
+        assert self.consolidated_book is not None, 'No consolidated book attached to the streamer.'
+        book = self.consolidated_book
+        result: dict[str, float] | float | list[tuple[float, float, dict[str, float]]]
+        try:
+            query: dict = self.json_decoder.decode(msg)
+            query_type, symbol = query['type'], query['symbol'].upper()
+
+            if query_type == 'consolidated_bbo':
+                return book.bbo(symbol)
+            elif query_type == 'depth_at_price':
+                result = book.depth_at_price(symbol, query['side'], query['price'])
+            elif query_type == 'cumulative_size':
+                result = book.cumulative_size(symbol, query['side'], query['price'])
+            elif query_type == 'ladder':
+                result = book.ladder(symbol, query['side'], query.get('depth', Config.orderbook_levels))
+            else:
+                return {'type': 'error', 'error': f'Unknown query type {query_type}'}
+            return {'type': query_type, 'symbol': symbol, 'result': result}
+        except Exception as e:
+            logger.warning(f'Invalid query {str(msg)}: {e}')
+            return {'type': 'error', 'error': str(e)}
+
     async def monitor_connections(self):
         while True: 
             await asyncio.sleep(5)
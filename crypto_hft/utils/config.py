@@ -1,4 +1,5 @@
 from dotenv import load_dotenv
+from functools import cache
 from pathlib import Path
 import os
 
@@ -87,14 +88,93 @@ class Config:
 
     # Order book config
     orderbook_levels = 15
+    consolidated_book_venue_timeout = 10 # seconds without updates before a venue is removed from the consolidated book
 
     # Retry logic
     max_retries = 5
     retry_wait_time = 10
 
+    # Perps streams, symbols per multi-symbol subscription (watch_*_for_symbols)
+    perps_symbols_per_subscription = 10
+    perps_stream_silence_timeout = 120 # seconds without updates before a stream is resubscribed
+    perps_stream_base_backoff = 1
+    perps_stream_max_backoff = 60
+    perps_stream_report_interval = 60
+    perps_book_sample_interval = 0 # seconds between stored order books per (exchange, symbol), 0 (off) stores every update
+
+    # Market catalog (utils/market_catalog.py), shared by the services through a disk cache
+    market_catalog_path = os.getenv("MARKET_CATALOG_PATH", "~/.cache/crypto_hft/market_catalog.json")
+    market_catalog_ttl = 6 * 3600 # seconds before an exchange's markets are reloaded
+    market_catalog_retry_delay = 30 # seconds before the first retry of an exchange that failed to load, doubled on every failure
+
+    # Shared REST rate limiting of the ccxt clients (utils/rate_limiter.py)
+    rate_limits: dict[str, float] = {} # exchange id -> ms per unit of request weight, ccxt's rateLimit by default
+    rate_limit_pool_size = 20 # connections of the aiohttp session shared by the REST clients of an exchange
+    rate_limit_metrics_interval = 60 # seconds between queueing delay logs
+
+    # Funding rates
+    funding_symbols_per_request = 20 # concurrent fetchFundingRate calls per batch, for exchanges without fetchFundingRates
+    funding_poll_interval = 300 # seconds between polls of the predicted rates (or writes of the streamed ones) between settlements
+    funding_settlement_delay = 5 # seconds after a funding time before fetching the settled rates
+    funding_max_missed_fetches = 3 # successful fetches a symbol can be missing from before it is no longer scheduled
+    funding_rate_tolerance = 1e-7 # funding rate change below which a snapshot is not stored
+    funding_price_tolerance = 5e-4 # relative mark / index price change below which a snapshot is not stored
+    funding_backfill_concurrency = {"binance": 8, "bybit": 4, "hyperliquid": 4} # fetchFundingRateHistory requests in flight per exchange
+    funding_backfill_checkpoint = os.getenv("FUNDING_BACKFILL_CHECKPOINT", "funding_backfill_checkpoint.json")
+    funding_interest_rate = 0.0001 # interest component of the estimated funding rate, per 8 hours
+    funding_premium_clamp = 0.0005 # bound of the (interest - premium) term of the estimated funding rate
+    funding_estimate_report_interval = 5 # seconds between estimate logs of funding_estimator.py
+
     # Batching thresholds
     orderbook_queue_threshold = 20000
     trade_queue_threshold = 10000
+    bar_queue_threshold = 500
+    bbo_queue_threshold = 5000
+
+    # Adaptive batching of the spot writers, the thresholds above are the initial batch sizes
+    batch_freshness_target = 2.0 # seconds, max age of a row when it is committed
+    batch_min_size = 1
+    batch_max_size = 20_000
+    batch_ewma_alpha = 0.2 # weight of the last insert in the latency model
+    batch_rate_window = 10.0 # seconds, time constant of the arrival rate average
+    batch_metrics_interval = 60
+
+    # Writer scheduling of the spot tables on the shared connection pool
+    postgres_pool_size = 10
+    writer_min_concurrency = 2
+    writer_rows_per_connection = 5_000 # backlog per concurrent insert before another connection is used
+    writer_urgent_margin = 0.5 # seconds, batches this close to their deadline are written first
+    writer_table_weights = {'orderbook': 1.0, 'trade': 2.0, 'bars': 2.0, 'bbo': 2.0}
+    writer_symbol_weights = {'BTC_USDT': 2.0, 'ETH_USDT': 2.0}
+
+    # OHLCV bars built from the trade stream (label -> seconds)
+    bar_resolutions = {'1s': 1, '5s': 5, '1m': 60, '5m': 300}
+    bar_close_grace_period = 2 # seconds to wait for late trades before closing a bar of a quiet symbol
+
+    # In-memory tick store (rows kept per exchange and symbol, ~500 bytes per book row)
+    tick_store_trade_capacity = 200_000
+    tick_store_book_capacity = 20_000
+    tick_store_port = 9998
+
+    # Shared memory segments for local consumers
+    shm_prefix = 'crypto_hft'
+    shm_trades_per_symbol = 1024
+    shm_read_retries = 100_000 # torn reads before a shared memory read gives up and returns None
+
+    # Pipeline mode of the spot consumer, 0 workers decodes on the event loop
+    decode_pool_workers = 0
+    decode_batch_size = 256 # frames per batch sent to the pool
+    decode_batch_interval = 0.005 # seconds, max wait before a partial batch is sent
+    decode_max_in_flight = 8 # batches being decoded before the reader waits
+
+    # Sharded collector (spot/supervisor.py)
+    supervisor_workers = 4
+    supervisor_metrics_interval = 5 # seconds between worker metric reports
+    supervisor_heartbeat_timeout = 30 # a worker silent for longer is restarted
+    supervisor_max_restart_backoff = 60
+    supervisor_query_timeout = 5
+    supervisor_relay_queue_size = 100_000 # streamer updates in flight between workers and supervisor
+    supervisor_tick_store_base_port = 9100 # worker i serves its tick store on base + i
 
     # Logging settings
     logger_telegram_min_level = 'WARNING'
@@ -109,6 +189,10 @@ class Config:
 
     gcs_bucket = os.getenv("GCS_BUCKET")
     gcs_key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    gcs_fallback_staging_dir = os.getenv("GCS_FALLBACK_STAGING_DIR", "fallback_staging") # failed batches waiting for upload / replay
+    gcs_fallback_workers = 2 # threads writing the parquet files
+    gcs_fallback_retry_interval = 30 # seconds between upload attempts while GCS is unavailable
+    gcs_fallback_replay_interval = 60 # seconds between attempts to replay the fallback files into PostgreSQL
 
     # Postgres fields (populated in __init__)
     postgres_host = None
@@ -135,9 +219,10 @@ class Config:
             setattr(self, secret, val)
 
         #Validate GCS key path if provided
-        if self.gcs_key_path and not os.path.exists(self.gcs_key_path):
-            raise ValueError(f"❌ GOOGLE_APPLICATION_CREDENTIALS path is invalid - {Path(self.gcs_key_path).resolve()}.")
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = self.gcs_key_path
+        if self.gcs_key_path:
+            if not os.path.exists(self.gcs_key_path):
+                raise ValueError(f"❌ GOOGLE_APPLICATION_CREDENTIALS path is invalid - {Path(self.gcs_key_path).resolve()}.")
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = self.gcs_key_path
 
     @property
     def credentials(self) -> dict:
@@ -149,4 +234,15 @@ class Config:
             'poloniex_api_secret': self.poloniex_api_secret, # type: ignore
             'binance_api_key': self.binance_api_key, # type: ignore
             'binance_api_secret': self.binance_api_secret, # type: ignore
-        }
\ No newline at end of file
+        }
+
+@cache
+def get_config() -> Config:
+    """Return the process-wide `Config`, built on first use.
+
+    Loading the `.env` file and validating the secrets only happens once per process,
+    so modules should call this when they actually need a value instead of
+    instantiating `Config` at import time. Class-level constants (tickers, exchanges,
+    thresholds...) can be read from `Config` directly without loading any secret.
+    """
+    return Config()
@@ -1,7 +1,7 @@
 from loguru import logger
 import sys
 from crypto_hft.utils.logging.handlers import TelegramLogger
-from crypto_hft.utils.config import Config
+from crypto_hft.utils.config import get_config
 import asyncio 
 
 def setup_logging(): 
@@ -12,7 +12,7 @@ def setup_logging():
     * File: store all logs (`TRACE` and above) in a file, serialized
     * Console: display logs with level `DEBUG` and above in the console
     """
-    config = Config() 
+    config = get_config()
     telegram_handler = TelegramLogger(
         telegram_api_key=config.telegram_api_key, 
         chat_id=config.telegram_chat_id, 
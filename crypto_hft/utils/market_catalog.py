@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import time
+from importlib.metadata import version, PackageNotFoundError
+from pathlib import Path
+import msgspec
+from crypto_hft.utils.config import Config
+
+'''
+Market metadata of every exchange, shared by the services through a disk cache.
+
+`load()` reads the cache and only calls `load_markets` (concurrently) for the exchanges
+missing from it or older than the TTL, so a service with a fresh cache starts without any
+request and without importing ccxt. The cache is stamped with the catalog format and ccxt
+versions, and is ignored when either changes. Services pass the markets to their ccxt
+clients with `set_markets` instead of loading them again. An exchange that fails to load is
+retried with an exponential backoff from `Config.market_catalog_retry_delay`.
+'''
+
+CATALOG_VERSION = 1
+
+# ccxt ids of the exchanges used by the spot, perps, funding and metadata services
+CATALOG_EXCHANGES = ['binance', 'bybit', 'coinbase', 'hyperliquid', 'poloniex', 'poloniexfutures']
+
+
+def version_stamp() -> str:
+    try:
+        ccxt_version = version('ccxt')
+    except PackageNotFoundError:
+        ccxt_version = 'unknown'
+    return f'{CATALOG_VERSION}/ccxt-{ccxt_version}'
+
+
+class MarketCatalog:
+    def __init__(
+        self,
+        exchanges: list[str] | None = None,
+        path: str = Config.market_catalog_path,
+        ttl: float = Config.market_catalog_ttl,
+    ):
+        self.exchanges = exchanges or CATALOG_EXCHANGES
+        self.path = Path(path).expanduser()
+        self.ttl = ttl
+        self.stamp = version_stamp()
+
+        self.catalog: dict[str, dict[str, dict]] = {} # exchange -> symbol -> market
+        self.loaded_at: dict[str, float] = {}
+        self.failures: dict[str, int] = {} # consecutive failed loads
+        self.retry_at: dict[str, float] = {} # time of the next load of a failed exchange
+        self.index: dict[tuple[str, str | None, str | None], list[dict]] = {} # (exchange, base, type) -> markets
+
+    # --- Disk cache ---
+    def _read_file(self) -> dict:
+        try:
+            cache = msgspec.json.decode(self.path.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"[CATALOG] Ignoring unreadable cache {self.path}: {e}")
+            return {}
+        if cache.get('version') != self.stamp:
+            logging.info(f"[CATALOG] Ignoring cache of version {cache.get('version')} (current {self.stamp})")
+            return {}
+        return cache.get('exchanges', {})
+
+    def read(self) -> None:
+        """Loads the cached exchanges (newer than the ones in memory)."""
+        for name, entry in self._read_file().items():
+            if name in self.exchanges and entry['loaded_at'] > self.loaded_at.get(name, 0):
+                self.catalog[name] = entry['markets']
+                self.loaded_at[name] = entry['loaded_at']
+        self._build_index()
+
+    def write(self) -> None:
+        """Merges the exchanges in memory into the cache (other services may cache other exchanges)."""
+        exchanges = self._read_file()
+        for name, markets in self.catalog.items():
+            if self.loaded_at[name] >= exchanges.get(name, {}).get('loaded_at', 0):
+                exchanges[name] = {'loaded_at': self.loaded_at[name], 'markets': markets}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        tmp_path.write_bytes(msgspec.json.encode({'version': self.stamp, 'exchanges': exchanges}))
+        os.replace(tmp_path, self.path)
+
+    # --- Loading ---
+    def next_load(self, name: str) -> float:
+        """Time at which `name` is loaded again: on expiry, or on its retry after a failure."""
+        return max(self.loaded_at.get(name, 0) + self.ttl, self.retry_at.get(name, 0))
+
+    def stale_exchanges(self, now: float | None = None) -> list[str]:
+        now = now or time.time()
+        return [name for name in self.exchanges if now >= self.next_load(name)]
+
+    async def load(self) -> 'MarketCatalog':
+        """Reads the cache and loads the exchanges missing from it or expired."""
+        self.read()
+        stale = self.stale_exchanges()
+        if stale:
+            await self.refresh(stale)
+        return self
+
+    async def refresh(self, exchanges: list[str] | None = None) -> None:
+        """Loads the markets of `exchanges` (all by default) concurrently and updates the cache.
+        An exchange that fails keeps its previous markets."""
+        import ccxt.async_support as ccxt # type: ignore # deferred: only needed when the cache is stale
+        from crypto_hft.utils.rate_limiter import rate_limiter
+
+        names = exchanges or self.exchanges
+
+        async def load_markets(name: str) -> dict:
+            exchange = rate_limiter.create(ccxt, name)
+            try:
+                return await exchange.load_markets()
+            finally:
+                await exchange.close()
+
+        start = time.time()
+        responses = await asyncio.gather(*(load_markets(name) for name in names), return_exceptions=True)
+        for name, response in zip(names, responses):
+            if isinstance(response, BaseException):
+                self.failures[name] = self.failures.get(name, 0) + 1
+                delay = min(Config.market_catalog_retry_delay * 2 ** (self.failures[name] - 1), self.ttl)
+                self.retry_at[name] = time.time() + delay
+                logging.warning(f"[CATALOG] Failed to load {name} markets: {response}, retrying in {delay:.0f}s")
+                continue
+            self.catalog[name] = response
+            self.loaded_at[name] = time.time()
+            self.failures.pop(name, None)
+            self.retry_at.pop(name, None)
+
+        self._build_index()
+        await asyncio.to_thread(self.write)
+        logging.info(f"[CATALOG] Loaded {len(names)} exchanges in {time.time() - start:.1f}s")
+
+    async def refresh_periodically(self, shutdown_event: asyncio.Event | None = None) -> None:
+        """Refreshes the exchanges as they expire (or their retry is due), in the background."""
+        while shutdown_event is None or not shutdown_event.is_set():
+            next_load = min((self.next_load(name) for name in self.exchanges), default=time.time())
+            await asyncio.sleep(max(next_load - time.time(), 0) + 1)
+            try:
+                # another service may have refreshed the cache already
+                self.read()
+                stale = self.stale_exchanges()
+                if stale:
+                    await self.refresh(stale)
+            except Exception as e:
+                logging.error(f"[CATALOG] Refresh error: {e}")
+
+    # --- Lookups ---
+    def _build_index(self) -> None:
+        index: dict[tuple[str, str | None, str | None], list[dict]] = {}
+        for name, markets in self.catalog.items():
+            for market in markets.values():
+                index.setdefault((name, market.get('base'), market.get('type')), []).append(market)
+        self.index = index
+
+    def markets(self, exchange: str) -> dict[str, dict]:
+        return self.catalog.get(exchange, {})
+
+    def lookup(self, exchange: str, base: str, market_type: str) -> list[dict]:
+        """Markets of `exchange` with base currency `base` and type `market_type` ('spot', 'swap'...)."""
+        return self.index.get((exchange, base, market_type), [])
+
+    def set_markets(self, exchange) -> bool:
+        """Gives the cached markets to a ccxt client (`load_markets` then returns them without a
+        request), returns False if the catalog does not have the exchange."""
+        markets = self.catalog.get(exchange.id)
+        if not markets:
+            return False
+        exchange.set_markets(markets)
+        return True
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from crypto_hft.utils.config import Config
+
+'''
+Process-wide REST rate limiting. Every ccxt client of an exchange (funding fetcher, market
+catalog, metadata fetcher, perps streamer...) has its own `enableRateLimit` throttler, so
+clients running together exceed the exchange limit. `limit_client` replaces the throttle of a
+client with the shared `TokenBucket` of its exchange: ccxt passes the weight of every endpoint
+to `throttle(cost)`, so the bucket is weight-aware, and the requests of all the clients of an
+exchange together stay at its limit. The REST clients of an exchange also share one pooled
+aiohttp session instead of opening their own connections (ccxt.pro clients keep their own: their
+websockets would hold the pooled connections for as long as they stream).
+'''
+
+
+class TokenBucket:
+    """Weight-aware token bucket refilled at `refill_rate` tokens per second up to `capacity`,
+    waiters are served in order (a costly request does not starve behind cheap ones)."""
+
+    def __init__(self, refill_rate: float, capacity: float = 1.0):
+        self.refill_rate = refill_rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.lock = asyncio.Lock()
+
+        self.requests = 0
+        self.cost = 0.0
+        self.waiting = 0
+        self.max_delay = 0.0
+        self.delays: deque[float] = deque(maxlen=1000) # recent queueing delays, seconds
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.tokens + (now - self.updated) * self.refill_rate, self.capacity)
+        self.updated = now
+
+    async def acquire(self, cost: float = 1.0) -> float:
+        """Waits until the request can be sent, returns the queueing delay in seconds."""
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop:
+            # an asyncio.Lock is bound to the loop it is used in
+            self.loop, self.lock = loop, asyncio.Lock()
+        self.waiting += 1
+        try:
+            async with self.lock:
+                self._refill()
+                # a request costlier than the capacity waits for a full bucket and leaves a debt
+                needed = min(cost, self.capacity)
+                if self.tokens < needed:
+                    await asyncio.sleep((needed - self.tokens) / self.refill_rate)
+                    self._refill()
+                self.tokens -= cost
+        finally:
+            self.waiting -= 1
+
+        delay = time.monotonic() - start
+        self.requests += 1
+        self.cost += cost
+        self.max_delay = max(self.max_delay, delay)
+        self.delays.append(delay)
+        return delay
+
+    def metrics(self) -> dict:
+        delays = sorted(self.delays)
+        return {
+            'requests': self.requests,
+            'cost': self.cost,
+            'waiting': self.waiting,
+            'delay_mean': sum(delays) / len(delays) if delays else 0.0,
+            'delay_p99': delays[int(0.99 * (len(delays) - 1))] if delays else 0.0,
+            'delay_max': self.max_delay,
+        }
+
+
+class RateLimiter:
+    def __init__(self, rate_limits: dict[str, float] = Config.rate_limits):
+        self.rate_limits = rate_limits # exchange id -> ms per unit of weight, overrides ccxt's rateLimit
+        self.buckets: dict[str, TokenBucket] = {}
+        self.sessions: dict[str, tuple] = {} # exchange id -> (loop, shared aiohttp session)
+
+    def bucket(self, exchange_id: str, rate_limit: float = 1000.0, capacity: float = 1.0) -> TokenBucket:
+        """The bucket of an exchange, created from the first client's `rateLimit` (ms per unit)."""
+        if exchange_id not in self.buckets:
+            rate_limit = self.rate_limits.get(exchange_id, rate_limit)
+            self.buckets[exchange_id] = TokenBucket(1000 / rate_limit, capacity)
+        return self.buckets[exchange_id]
+
+    def session(self, exchange):
+        """The aiohttp session shared by the clients of `exchange.id` in the running loop,
+        None outside of a loop (the client then opens its own)."""
+        import aiohttp
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        session_loop, session = self.sessions.get(exchange.id, (None, None))
+        if session is None or session.closed or session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                ssl=exchange.ssl_context, limit=Config.rate_limit_pool_size, enable_cleanup_closed=True
+            )
+            session = aiohttp.ClientSession(connector=connector, trust_env=exchange.aiohttp_trust_env)
+            self.sessions[exchange.id] = (loop, session)
+        return session
+
+    def limit_client(self, exchange):
+        """Routes the REST requests of a ccxt async / pro client through the bucket of its
+        exchange and gives an async client the shared session, returns the client."""
+        capacity = (exchange.tokenBucket or {}).get('capacity', 1.0)
+        bucket = self.bucket(exchange.id, exchange.rateLimit, capacity)
+
+        async def throttle(cost=None):
+            await bucket.acquire(1.0 if cost is None else cost)
+
+        exchange.enableRateLimit = True
+        exchange.throttle = throttle
+        # websockets are opened from the session of a ccxt.pro client
+        if exchange.own_session and exchange.session is None and not exchange.has.get('ws'):
+            session = self.session(exchange)
+            if session is not None:
+                exchange.session = session
+                exchange.own_session = False # closing the client leaves the shared session open
+        return exchange
+
+    def create(self, ccxt_module, exchange_id: str, config: dict | None = None):
+        """`getattr(ccxt_module, exchange_id)(config)`, rate limited."""
+        return self.limit_client(getattr(ccxt_module, exchange_id)({'enableRateLimit': True, **(config or {})}))
+
+    def metrics(self) -> dict[str, dict]:
+        return {exchange_id: bucket.metrics() for exchange_id, bucket in self.buckets.items()}
+
+    async def report_metrics(self, shutdown_event: asyncio.Event | None = None) -> None:
+        """Periodically logs the requests and queueing delays of every exchange."""
+        while shutdown_event is None or not shutdown_event.is_set():
+            await asyncio.sleep(Config.rate_limit_metrics_interval)
+            for exchange_id, m in self.metrics().items():
+                logging.info(
+                    f"[RATE] {exchange_id}: {m['requests']} requests (weight {m['cost']:.0f}), {m['waiting']} queued, "
+                    f"delay mean {m['delay_mean']:.3f}s p99 {m['delay_p99']:.3f}s max {m['delay_max']:.3f}s"
+                )
+
+    async def close(self) -> None:
+        for _, session in self.sessions.values():
+            if not session.closed:
+                await session.close()
+        self.sessions = {}
+
+
+# shared by every client of the process
+rate_limiter = RateLimiter()
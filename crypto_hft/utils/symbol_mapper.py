@@ -1,9 +1,7 @@
 from crypto_hft.utils.config import Config
 
-config = Config()
-
 EXCHANGE_SYMBOLS = {}
-REVERSE_SYMBOL_MAP: dict[str, dict] = {exchange: {} for exchange in config.exchanges}
+REVERSE_SYMBOL_MAP: dict[str, dict] = {exchange: {} for exchange in Config.exchanges}
 
 #rules to map standard format to exchange-specific symbol format
 EXCHANGE_MAPPING_RULES = {
@@ -62,8 +60,8 @@ def reverse_map_symbol(exchange, symbol):
     return standardized_symbol
 
 
-for exchange in config.exchanges:
-    EXCHANGE_SYMBOLS[exchange], REVERSE_SYMBOL_MAP[exchange] = map_symbols(exchange, config.base_tickers)
+for exchange in Config.exchanges:
+    EXCHANGE_SYMBOLS[exchange], REVERSE_SYMBOL_MAP[exchange] = map_symbols(exchange, Config.base_tickers)
 
 
 # print(EXCHANGE_SYMBOLS)
@@ -1,12 +1,27 @@
 import datetime
 import ciso8601
+from time import strftime, gmtime, time_ns
+
+def time_iso8601() -> str:
+    """Current UTC time in ISO 8601 format with millisecond precision (e.g. `2025-01-01T00:00:00.000Z`)."""
+    millis = str((time_ns() % 1_000_000_000) // 1_000_000).zfill(3)
+    return f"{strftime('%Y-%m-%dT%H:%M:%S', gmtime())}.{millis}Z"
 
 def iso8601_to_unix(timestamp: str) -> float:
     """Convert ISO 8601 formatted timestamp to Unix timestamp."""
     dt = ciso8601.parse_datetime(timestamp)
     return dt.timestamp()
 
+def iso8601_to_datetime(timestamp: str) -> datetime.datetime:
+    """Convert ISO 8601 formatted timestamp to a (timezone-aware if the timestamp has an offset) datetime."""
+    return ciso8601.parse_datetime(timestamp)
+
 def unix_to_mysql_datetime(unix_time: float) -> str:
     """Convert Unix timestamp to MySQL DATETIME(6) format."""
     dt = datetime.datetime.utcfromtimestamp(unix_time)
     return dt.strftime('%Y-%m-%d %H:%M:%S.') + f"{dt.microsecond:06d}"
+
+def unix_to_iso8601(unix_time: float) -> str:
+    """Convert Unix timestamp to ISO 8601 format with millisecond precision (e.g. `2025-01-01T00:00:00.000Z`)."""
+    dt = datetime.datetime.fromtimestamp(unix_time, datetime.UTC)
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.') + f"{dt.microsecond // 1000:03d}Z"